@@ -0,0 +1,220 @@
+"""
+Local stand-ins for Bria v2 and Gemini, for load tests that must not spend
+real quota. One app serves both (Bria under /v2, Gemini under /v1beta), so
+the API under test only needs:
+
+    BRIA_BASE_URL=http://127.0.0.1:<port>/v2
+    GEMINI_BASE_URL=http://127.0.0.1:<port>/v1beta
+
+Behaviour is configured through the environment:
+
+    FAKE_BRIA_MODE            async (202 + status_url) | sync (200 + result)
+                              | error (job ends in ERROR) | timeout (never ends)
+    FAKE_BRIA_ERROR_RATE      fraction of async jobs that end in ERROR anyway
+    FAKE_BRIA_SUBMIT_LATENCY  latency of POST /v2/image/generate
+    FAKE_BRIA_RENDER_LATENCY  time from submit until the job is COMPLETED
+    FAKE_BRIA_POLL_LATENCY    latency of GET /v2/status/{id}
+    FAKE_GEMINI_LATENCY       latency of generateContent (and of the whole
+                              streamGenerateContent response)
+
+Latencies are distributions: `fixed:S`, `uniform:LO,HI`,
+`lognormal:MEDIAN,SIGMA` or `exp:MEAN` (seconds).
+
+GET /_stats returns per-endpoint call counts; POST /_reset clears them.
+
+Usage (from backend/):  uvicorn bench.fake_upstreams:app --port 9100
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Callable, Dict
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """`kind:args` → zero-arg sampler returning seconds (never negative)."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] if args else []
+
+    if kind == "fixed":
+        return lambda: max(0.0, values[0] if values else 0.0)
+    if kind == "uniform":
+        lo, hi = values
+        return lambda: random.uniform(lo, hi)
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    if kind == "exp":
+        mean, = values
+        return lambda: random.expovariate(1 / mean) if mean > 0 else 0.0
+
+    raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+
+BRIA_MODE = os.getenv("FAKE_BRIA_MODE", "async")
+BRIA_ERROR_RATE = float(os.getenv("FAKE_BRIA_ERROR_RATE", "0"))
+BRIA_SUBMIT_LATENCY = parse_latency(os.getenv("FAKE_BRIA_SUBMIT_LATENCY", "lognormal:0.15,0.3"))
+BRIA_RENDER_LATENCY = parse_latency(os.getenv("FAKE_BRIA_RENDER_LATENCY", "lognormal:2.0,0.4"))
+BRIA_POLL_LATENCY = parse_latency(os.getenv("FAKE_BRIA_POLL_LATENCY", "lognormal:0.05,0.3"))
+GEMINI_LATENCY = parse_latency(os.getenv("FAKE_GEMINI_LATENCY", "lognormal:1.2,0.4"))
+
+if BRIA_MODE not in ("async", "sync", "error", "timeout"):
+    raise ValueError(f"Unknown FAKE_BRIA_MODE: {BRIA_MODE!r}")
+
+app = FastAPI(title="Fake Bria / Gemini")
+
+calls: Counter = Counter()
+
+# request_id → (ready_at, "COMPLETED" | "ERROR" | None for never)
+_jobs: Dict[str, tuple] = {}
+
+
+def _scene(description: str) -> Dict:
+    return {
+        "short_description": description[:200] or "benchmark scene",
+        "objects": [{"description": "a ceramic mug", "location": "center"}],
+        "background_setting": "studio backdrop",
+        "lighting": {"conditions": "softbox", "direction": "front-left"},
+        "aesthetics": {"composition": "rule of thirds", "color_scheme": "warm"},
+        "photographic_characteristics": {"camera_angle": "eye level", "lens_focal_length": "50mm"},
+        "style_medium": "photograph",
+    }
+
+
+# 1×1 PNG served for every render, so media downloads hit this server too.
+_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de"
+    "0000000c4944415408d763f8cfc000000301010018dd8db00000000049454e44ae426082"
+)
+
+
+def _image_result(request: Request, request_id: str) -> Dict:
+    return {
+        "image_url": f"{request.base_url}images/{request_id}.png",
+        "seed": random.randint(0, 2**31),
+    }
+
+
+# ============================================================
+# 🔹 Bria v2
+# ============================================================
+
+@app.post("/v2/image/generate")
+async def bria_generate(request: Request):
+    calls["bria_submit"] += 1
+    await request.body()
+    await asyncio.sleep(BRIA_SUBMIT_LATENCY())
+
+    request_id = uuid.uuid4().hex
+
+    if BRIA_MODE == "sync":
+        return {"request_id": request_id, "result": _image_result(request, request_id)}
+
+    if BRIA_MODE == "timeout":
+        outcome = None
+    elif BRIA_MODE == "error" or random.random() < BRIA_ERROR_RATE:
+        outcome = "ERROR"
+    else:
+        outcome = "COMPLETED"
+
+    _jobs[request_id] = (time.monotonic() + BRIA_RENDER_LATENCY(), outcome)
+    return JSONResponse(
+        {"request_id": request_id, "status_url": f"{request.base_url}v2/status/{request_id}"},
+        status_code=202,
+    )
+
+
+@app.get("/v2/status/{request_id}")
+async def bria_status(request_id: str, request: Request):
+    calls["bria_poll"] += 1
+    await asyncio.sleep(BRIA_POLL_LATENCY())
+
+    job = _jobs.get(request_id)
+    if job is None:
+        raise HTTPException(404, "Unknown request_id")
+
+    ready_at, outcome = job
+    if outcome is None or time.monotonic() < ready_at:
+        return {"request_id": request_id, "status": "IN_PROGRESS"}
+
+    _jobs.pop(request_id, None)
+    if outcome == "ERROR":
+        return {"request_id": request_id, "status": "ERROR", "error": "fake render failure"}
+    return {"request_id": request_id, "status": "COMPLETED", "result": _image_result(request, request_id)}
+
+
+@app.get("/images/{name}")
+def bria_image(name: str):
+    calls["image_download"] += 1
+    return Response(_PNG, media_type="image/png")
+
+
+# ============================================================
+# 🔹 Gemini generateContent / streamGenerateContent
+# ============================================================
+
+def _describe(body: Dict) -> str:
+    """
+    The user's prompt for text requests; for image analysis, a stable digest
+    of the image so identical uploads get identical scenes.
+    """
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            if "inline_data" in part:
+                digest = hashlib.sha1(part["inline_data"].get("data", "").encode()).hexdigest()
+                return f"analyzed image {digest[:12]}"
+            if "User prompt:" in part.get("text", ""):
+                return part["text"].rpartition("User prompt:")[2].strip()
+    return ""
+
+
+@app.post("/v1beta/models/{target}")
+async def gemini(target: str, request: Request):
+    model, _, method = target.partition(":")
+    body = await request.json()
+    text = json.dumps(_scene(_describe(body)))
+
+    if method == "generateContent":
+        calls["gemini"] += 1
+        await asyncio.sleep(GEMINI_LATENCY())
+        return {"candidates": [{"content": {"parts": [{"text": text}]}}], "modelVersion": model}
+
+    if method == "streamGenerateContent":
+        calls["gemini_stream"] += 1
+        pieces = [text[i:i + 64] for i in range(0, len(text), 64)]
+        step = GEMINI_LATENCY() / max(1, len(pieces))
+
+        async def events():
+            for piece in pieces:
+                await asyncio.sleep(step)
+                chunk = {"candidates": [{"content": {"parts": [{"text": piece}]}}]}
+                yield f"data: {json.dumps(chunk)}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    raise HTTPException(404, f"Unsupported method: {method}")
+
+
+# ============================================================
+# 🔹 Bookkeeping
+# ============================================================
+
+@app.get("/_stats")
+def stats():
+    return {"calls": dict(calls), "pending_jobs": len(_jobs)}
+
+
+@app.post("/_reset")
+def reset():
+    calls.clear()
+    _jobs.clear()
+    return {"reset": True}
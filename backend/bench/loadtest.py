@@ -0,0 +1,296 @@
+"""
+Load test for the API against local Bria / Gemini stand-ins.
+
+Starts bench/fake_upstreams.py and the API (uvicorn, one worker each) on
+free local ports, points the API at the fakes through BRIA_BASE_URL /
+GEMINI_BASE_URL, then drives each scenario at a fixed concurrency and
+reports req/s, p50/p95/p99 latency and outbound calls per request.
+
+Usage (from backend/):
+
+    python -m bench.loadtest --scenarios translate,generate --concurrency 32 --requests 200
+    python -m bench.loadtest --bria-mode sync --gemini-latency fixed:0.2
+    python -m bench.loadtest --api-url http://127.0.0.1:8000 --upstream-url http://127.0.0.1:9100
+
+Payloads are unique per request so caches miss; pass --repeat-payloads to
+measure the cached path instead. --json prints the report as JSON (for
+comparing runs in CI).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import zlib
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("translate", "generate", "refine", "inspire", "multi-shot")
+
+BASE_SCENE = {
+    "short_description": "a ceramic mug on a wooden table",
+    "objects": [{"description": "a ceramic mug", "location": "center"}],
+    "background_setting": "sunlit kitchen",
+    "lighting": {"conditions": "morning light", "direction": "left"},
+    "photographic_characteristics": {"camera_angle": "eye level", "lens_focal_length": "50mm"},
+}
+
+
+# ============================================================
+# 🔹 Payloads
+# ============================================================
+
+def _png(seed: str, size: int = 32) -> bytes:
+    """Small random RGB PNG (stdlib only) so uploads differ per request."""
+    rng = random.Random(seed)
+    rows = b"".join(
+        b"\x00" + bytes(rng.randrange(256) for _ in range(size * 3))
+        for _ in range(size)
+    )
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _scene(tag: str) -> Dict:
+    return {**BASE_SCENE, "short_description": f"{BASE_SCENE['short_description']} #{tag}"}
+
+
+def build_request(scenario: str, tag: str) -> Dict:
+    """
+    httpx.request kwargs for `scenario`. Equal tags give identical payloads
+    (cache hits); tags are unique per run and scenario otherwise.
+    """
+    if scenario == "translate":
+        return {"method": "POST", "url": "/translate",
+                "json": {"prompt": f"a ceramic mug on a wooden table, variant {tag}"}}
+    if scenario == "generate":
+        return {"method": "POST", "url": "/generate", "json": {"structured_json": _scene(tag)}}
+    if scenario == "refine":
+        return {"method": "POST", "url": "/refine",
+                "json": {"structured_json": _scene(tag), "instruction": "make it warmer"}}
+    if scenario == "inspire":
+        return {"method": "POST", "url": "/inspire",
+                "files": {"image": (f"bench-{tag}.png", _png(tag), "image/png")}}
+    if scenario == "multi-shot":
+        return {"method": "POST", "url": "/multi-shot",
+                "files": {"image": (f"bench-{tag}.png", _png(tag), "image/png")},
+                "data": {"shot_types_json": json.dumps(["establishing", "hero"])}}
+    raise ValueError(f"Unknown scenario: {scenario!r}")
+
+
+# ============================================================
+# 🔹 Driver
+# ============================================================
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def run_scenario(client, upstream, scenario, total, concurrency, repeat_payloads):
+    run_id = uuid.uuid4().hex[:8]
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    counter = iter(range(total))
+
+    await upstream.post("/_reset")
+
+    async def worker():
+        for n in counter:
+            kwargs = build_request(scenario, f"{scenario}-{run_id}-{0 if repeat_payloads else n}")
+            started = time.perf_counter()
+            try:
+                res = await client.request(**kwargs)
+                status = res.status_code
+            except httpx.HTTPError:
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    upstream_calls = (await upstream.get("/_stats")).json()["calls"]
+
+    return {
+        "scenario": scenario,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": sum(count for status, count in statuses.items() if status != 200),
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "req_per_s": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "outbound": upstream_calls,
+        "outbound_per_request": {
+            name: round(count / total, 2) for name, count in upstream_calls.items()
+        },
+    }
+
+
+def print_report(results):
+    header = f"{'scenario':<12}{'reqs':>6}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  outbound/req"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        outbound = ", ".join(f"{k}={v}" for k, v in sorted(r["outbound_per_request"].items())) or "-"
+        print(
+            f"{r['scenario']:<12}{r['requests']:>6}{r['errors']:>5}{r['req_per_s']:>9}"
+            f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}  {outbound}"
+        )
+
+
+# ============================================================
+# 🔹 Process management
+# ============================================================
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _spawn(app: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+    )
+
+
+async def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {proc.returncode}")
+            with contextlib.suppress(httpx.HTTPError):
+                await client.get(url)
+                return
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready in {timeout}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat-payloads", action="store_true",
+                        help="send the same payload every time (measures cache hits)")
+    parser.add_argument("--api-url", help="use a running API instead of starting one")
+    parser.add_argument("--upstream-url", help="use running fakes instead of starting them")
+    parser.add_argument("--api-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the spawned API (repeatable)")
+    parser.add_argument("--bria-mode", default="async", choices=("async", "sync", "error", "timeout"))
+    parser.add_argument("--bria-error-rate", type=float, default=0.0)
+    parser.add_argument("--bria-submit-latency", default="lognormal:0.15,0.3")
+    parser.add_argument("--bria-render-latency", default="lognormal:2.0,0.4")
+    parser.add_argument("--bria-poll-latency", default="lognormal:0.05,0.3")
+    parser.add_argument("--gemini-latency", default="lognormal:1.2,0.4")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    for scenario in scenarios:
+        if scenario not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario: {scenario}")
+
+    procs = []
+    workdir = tempfile.TemporaryDirectory(prefix="studio-bench-")
+    try:
+        upstream_url = args.upstream_url
+        if not upstream_url:
+            port = _free_port()
+            upstream_url = f"http://127.0.0.1:{port}"
+            procs.append(_spawn("bench.fake_upstreams:app", port, {
+                "FAKE_BRIA_MODE": args.bria_mode,
+                "FAKE_BRIA_ERROR_RATE": str(args.bria_error_rate),
+                "FAKE_BRIA_SUBMIT_LATENCY": args.bria_submit_latency,
+                "FAKE_BRIA_RENDER_LATENCY": args.bria_render_latency,
+                "FAKE_BRIA_POLL_LATENCY": args.bria_poll_latency,
+                "FAKE_GEMINI_LATENCY": args.gemini_latency,
+            }))
+            await _wait_ready(f"{upstream_url}/_stats", procs[-1])
+
+        api_url = args.api_url
+        if not api_url:
+            port = _free_port()
+            api_url = f"http://127.0.0.1:{port}"
+            env = {
+                "BRIA_BASE_URL": f"{upstream_url}/v2",
+                "GEMINI_BASE_URL": f"{upstream_url}/v1beta",
+                "BRIA_API_KEY": "bench",
+                "GEMINI_API_KEY": "bench",
+                # Measure the service, not the production quota pacing.
+                "BRIA_SUBMIT_RPS": "0",
+                "HTTP2_ENABLED": "0",
+                "RESULT_CACHE_DIR": os.path.join(workdir.name, "results"),
+                "SCENE_STORE_DIR": os.path.join(workdir.name, "scenes"),
+                "TRANSLATION_CACHE_DIR": os.path.join(workdir.name, "translations"),
+                "IMAGE_CACHE_DIR": os.path.join(workdir.name, "images"),
+                "MEDIA_DIR": os.path.join(workdir.name, "media"),
+                "JOBS_DB_PATH": os.path.join(workdir.name, "jobs.sqlite3"),
+            }
+            for item in args.api_env:
+                key, _, value = item.partition("=")
+                env[key] = value
+            procs.append(_spawn("main:app", port, env))
+            await _wait_ready(f"{api_url}/health", procs[-1])
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=api_url, timeout=None, limits=limits) as client, \
+                httpx.AsyncClient(base_url=upstream_url) as upstream:
+            results = []
+            for scenario in scenarios:
+                results.append(await run_scenario(
+                    client, upstream, scenario, args.requests, args.concurrency, args.repeat_payloads
+                ))
+
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_report(results)
+        return results
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                proc.wait(timeout=10)
+        workdir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,17 +3,168 @@ from dotenv import load_dotenv
 
 # Load correct .env file depending on environment
 ENV = os.getenv("ENV", "local")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 if ENV == "production":
     load_dotenv(".env.production")
 else:
     load_dotenv(".env.local")
 
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
 class Settings:
     ENV: str = ENV
     BRIA_API_KEY: str = os.getenv("BRIA_API_KEY")
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY")
 
+    # Upstream APIs; point at bench/fake_upstreams.py for load tests
+    BRIA_BASE_URL: str = os.getenv("BRIA_BASE_URL", "https://engine.prod.bria-api.com/v2")
+    GEMINI_BASE_URL: str = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
+
+    # Startup: warm lazy clients/imports after the app starts listening
+    WARMUP_ON_STARTUP: bool = _env_bool("WARMUP_ON_STARTUP", True)
+    WARMUP_BLOCKING: bool = _env_bool("WARMUP_BLOCKING", False)
+
+    # Disk tiers of the caches below and the media store are capped
+    # (*_DISK_MAX_BYTES, MEDIA_MAX_TOTAL_BYTES; 0 = unbounded). Each process
+    # sweeps out expired and least recently read files this often
+    DISK_CACHE_SWEEP_SECONDS: float = _env_float("DISK_CACHE_SWEEP_SECONDS", 600)
+
+    # Render result cache (memory LRU + shared disk tier)
+    RESULT_CACHE_ENABLED: bool = _env_bool("RESULT_CACHE_ENABLED", True)
+    RESULT_CACHE_MAX_ENTRIES: int = _env_int("RESULT_CACHE_MAX_ENTRIES", 512)
+    RESULT_CACHE_TTL_SECONDS: float = _env_float("RESULT_CACHE_TTL_SECONDS", 6 * 3600)
+    RESULT_CACHE_DIR: str = os.getenv("RESULT_CACHE_DIR", os.path.join(BACKEND_DIR, ".cache", "results"))
+    RESULT_CACHE_DISK_MAX_BYTES: int = _env_int("RESULT_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024)
+
+    # Rendered scenes, addressable by scene_hash (base for patch refines)
+    SCENE_STORE_MAX_ENTRIES: int = _env_int("SCENE_STORE_MAX_ENTRIES", 2048)
+    SCENE_STORE_TTL_SECONDS: float = _env_float("SCENE_STORE_TTL_SECONDS", 7 * 24 * 3600)
+    SCENE_STORE_DIR: str = os.getenv("SCENE_STORE_DIR", os.path.join(BACKEND_DIR, ".cache", "scenes"))
+    SCENE_STORE_DISK_MAX_BYTES: int = _env_int("SCENE_STORE_DISK_MAX_BYTES", 512 * 1024 * 1024)
+
+    # Prompt → JSON translation cache
+    TRANSLATION_CACHE_ENABLED: bool = _env_bool("TRANSLATION_CACHE_ENABLED", True)
+    TRANSLATION_CACHE_MAX_ENTRIES: int = _env_int("TRANSLATION_CACHE_MAX_ENTRIES", 2048)
+    TRANSLATION_CACHE_TTL_SECONDS: float = _env_float("TRANSLATION_CACHE_TTL_SECONDS", 24 * 3600)
+    TRANSLATION_CACHE_DIR: str = os.getenv("TRANSLATION_CACHE_DIR", os.path.join(BACKEND_DIR, ".cache", "translations"))
+    TRANSLATION_CACHE_DISK_MAX_BYTES: int = _env_int("TRANSLATION_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024)
+
+    # Image → JSON analysis cache (exact + perceptual near-duplicate)
+    IMAGE_CACHE_ENABLED: bool = _env_bool("IMAGE_CACHE_ENABLED", True)
+    IMAGE_CACHE_MAX_ENTRIES: int = _env_int("IMAGE_CACHE_MAX_ENTRIES", 2048)
+    IMAGE_CACHE_TTL_SECONDS: float = _env_float("IMAGE_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+    IMAGE_CACHE_DIR: str = os.getenv("IMAGE_CACHE_DIR", os.path.join(BACKEND_DIR, ".cache", "images"))
+    IMAGE_CACHE_DISK_MAX_BYTES: int = _env_int("IMAGE_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024)
+    IMAGE_CACHE_PHASH_DISTANCE: int = _env_int("IMAGE_CACHE_PHASH_DISTANCE", 6)
+
+    # Local content-addressed media store (downloaded renders + thumbnails)
+    MEDIA_STORE_ENABLED: bool = _env_bool("MEDIA_STORE_ENABLED", True)
+    MEDIA_DIR: str = os.getenv("MEDIA_DIR", os.path.join(BACKEND_DIR, ".cache", "media"))
+    MEDIA_THUMBNAIL_SIZES: str = os.getenv("MEDIA_THUMBNAIL_SIZES", "256,512")
+    MEDIA_MAX_BYTES: int = _env_int("MEDIA_MAX_BYTES", 50 * 1024 * 1024)
+    MEDIA_MAX_TOTAL_BYTES: int = _env_int("MEDIA_MAX_TOTAL_BYTES", 5 * 1024 * 1024 * 1024)
+    MEDIA_DOWNLOAD_CONCURRENCY: int = _env_int("MEDIA_DOWNLOAD_CONCURRENCY", 4)
+
+    # Shared outbound HTTP pool (Bria / Gemini)
+    HTTP_MAX_CONNECTIONS: int = _env_int("HTTP_MAX_CONNECTIONS", 100)
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = _env_int("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+    HTTP_KEEPALIVE_EXPIRY: float = _env_float("HTTP_KEEPALIVE_EXPIRY", 30)
+    HTTP2_ENABLED: bool = _env_bool("HTTP2_ENABLED", True)
+    HTTP_CONNECT_TIMEOUT: float = _env_float("HTTP_CONNECT_TIMEOUT", 5)
+    HTTP_READ_TIMEOUT: float = _env_float("HTTP_READ_TIMEOUT", 30)
+    HTTP_WRITE_TIMEOUT: float = _env_float("HTTP_WRITE_TIMEOUT", 30)
+    HTTP_POOL_TIMEOUT: float = _env_float("HTTP_POOL_TIMEOUT", 10)
+
+    # Bria submit rate limit (token bucket); 0 disables
+    BRIA_SUBMIT_RPS: float = _env_float("BRIA_SUBMIT_RPS", 5)
+    BRIA_SUBMIT_BURST: float = _env_float("BRIA_SUBMIT_BURST", 10)
+
+    # Outbound admission control: interactive vs bulk lanes
+    BRIA_MAX_CONCURRENCY: int = _env_int("BRIA_MAX_CONCURRENCY", 16)
+    BRIA_BULK_MAX_CONCURRENCY: int = _env_int("BRIA_BULK_MAX_CONCURRENCY", 12)
+    VLM_MAX_CONCURRENCY: int = _env_int("VLM_MAX_CONCURRENCY", 16)
+    VLM_BULK_MAX_CONCURRENCY: int = _env_int("VLM_BULK_MAX_CONCURRENCY", 12)
+    LANE_INTERACTIVE_WEIGHT: float = _env_float("LANE_INTERACTIVE_WEIGHT", 4)
+    LANE_BULK_WEIGHT: float = _env_float("LANE_BULK_WEIGHT", 1)
+
+    # Request deadlines (X-Request-Timeout overrides the default, up to MAX)
+    REQUEST_TIMEOUT_SECONDS: float = _env_float("REQUEST_TIMEOUT_SECONDS", 120)
+    REQUEST_TIMEOUT_BULK_SECONDS: float = _env_float("REQUEST_TIMEOUT_BULK_SECONDS", 600)
+    REQUEST_TIMEOUT_MAX_SECONDS: float = _env_float("REQUEST_TIMEOUT_MAX_SECONDS", 900)
+
+    # Bria status polling / completion callbacks
+    BRIA_DEADLINE_SECONDS: float = _env_float("BRIA_DEADLINE_SECONDS", 90)
+    BRIA_POLL_INITIAL_DELAY: float = _env_float("BRIA_POLL_INITIAL_DELAY", 0.5)
+    BRIA_POLL_BACKOFF: float = _env_float("BRIA_POLL_BACKOFF", 1.6)
+    BRIA_POLL_MAX_DELAY: float = _env_float("BRIA_POLL_MAX_DELAY", 5)
+    BRIA_POLL_JITTER: float = _env_float("BRIA_POLL_JITTER", 0.2)
+    # Callback mode: BRIA_CALLBACK_URL mounts /callbacks/bria, which then
+    # requires BRIA_CALLBACK_TOKEN; waiters still poll every INTERVAL seconds
+    BRIA_CALLBACK_URL: str = os.getenv("BRIA_CALLBACK_URL", "")
+    BRIA_CALLBACK_TOKEN: str = os.getenv("BRIA_CALLBACK_TOKEN", "")
+    BRIA_CALLBACK_POLL_INTERVAL: float = _env_float("BRIA_CALLBACK_POLL_INTERVAL", 10)
+
+    # Upstream resilience: circuit breakers, retry budget, Gemini hedging
+    BREAKER_FAILURE_THRESHOLD: int = _env_int("BREAKER_FAILURE_THRESHOLD", 5)
+    BREAKER_RESET_SECONDS: float = _env_float("BREAKER_RESET_SECONDS", 30)
+    RETRY_MAX_ATTEMPTS: int = _env_int("RETRY_MAX_ATTEMPTS", 3)
+    RETRY_BASE_DELAY: float = _env_float("RETRY_BASE_DELAY", 0.2)
+    RETRY_MAX_DELAY: float = _env_float("RETRY_MAX_DELAY", 2)
+    RETRY_BUDGET_RATIO: float = _env_float("RETRY_BUDGET_RATIO", 0.2)
+    GEMINI_HEDGE_ENABLED: bool = _env_bool("GEMINI_HEDGE_ENABLED", False)
+    GEMINI_HEDGE_PERCENTILE: float = _env_float("GEMINI_HEDGE_PERCENTILE", 0.95)
+    GEMINI_HEDGE_MIN_DELAY: float = _env_float("GEMINI_HEDGE_MIN_DELAY", 0.5)
+
+    # Declarative scene auto-fix rules (see utils/rule_engine.py)
+    AUTO_FIX_RULES_PATH: str = os.getenv(
+        "AUTO_FIX_RULES_PATH", os.path.join(BACKEND_DIR, "config", "auto_fix_rules.json")
+    )
+
+    # Reference-image uploads (/inspire, /multi-shot): size caps and the
+    # downscale applied before the image is sent to Gemini
+    INGEST_MAX_UPLOAD_BYTES: int = _env_int("INGEST_MAX_UPLOAD_BYTES", 25 * 1024 * 1024)
+    INGEST_MAX_PIXELS: int = _env_int("INGEST_MAX_PIXELS", 60_000_000)
+    INGEST_MAX_EDGE: int = _env_int("INGEST_MAX_EDGE", 1536)
+    INGEST_PASSTHROUGH_BYTES: int = _env_int("INGEST_PASSTHROUGH_BYTES", 1024 * 1024)
+    INGEST_JPEG_QUALITY: int = _env_int("INGEST_JPEG_QUALITY", 85)
+
+    # Multi-shot fan-out
+    MULTI_SHOT_CONCURRENCY: int = _env_int("MULTI_SHOT_CONCURRENCY", 4)
+
+    # /generate/batch
+    BATCH_CONCURRENCY: int = _env_int("BATCH_CONCURRENCY", 8)
+    BATCH_MAX_ITEMS: int = _env_int("BATCH_MAX_ITEMS", 1000)
+
+    # /sweep (grid of one scene over field values)
+    SWEEP_CONCURRENCY: int = _env_int("SWEEP_CONCURRENCY", 6)
+    SWEEP_MAX_VARIANTS: int = _env_int("SWEEP_MAX_VARIANTS", 256)
+
+    # Durable job queue (shared by the API and worker processes)
+    JOBS_DB_PATH: str = os.getenv("JOBS_DB_PATH", os.path.join(BACKEND_DIR, ".cache", "jobs.sqlite3"))
+    JOBS_WORKER_CONCURRENCY: int = _env_int("JOBS_WORKER_CONCURRENCY", 4)
+    JOBS_MAX_ATTEMPTS: int = _env_int("JOBS_MAX_ATTEMPTS", 3)
+    JOBS_MAX_ATTEMPTS_LIMIT: int = _env_int("JOBS_MAX_ATTEMPTS_LIMIT", 10)  # cap on per-job overrides
+    JOBS_RETRY_BASE_DELAY: float = _env_float("JOBS_RETRY_BASE_DELAY", 2)
+    JOBS_RETRY_MAX_DELAY: float = _env_float("JOBS_RETRY_MAX_DELAY", 60)
+    JOBS_LEASE_SECONDS: float = _env_float("JOBS_LEASE_SECONDS", 300)
+    JOBS_POLL_INTERVAL: float = _env_float("JOBS_POLL_INTERVAL", 0.5)
+
+    # Project store (scene revision history)
+    PROJECTS_DB_PATH: str = os.getenv("PROJECTS_DB_PATH", os.path.join(BACKEND_DIR, ".cache", "projects.sqlite3"))
+    PROJECT_SNAPSHOT_INTERVAL: int = _env_int("PROJECT_SNAPSHOT_INTERVAL", 25)
+
 settings = Settings()
 
 # Validate keys on startup
@@ -22,3 +173,7 @@ if not settings.BRIA_API_KEY:
 
 if not settings.GEMINI_API_KEY:
     print("⚠️ WARNING: GEMINI_API_KEY missing!")
+
+# An unauthenticated callback endpoint would accept any image_url
+if settings.BRIA_CALLBACK_URL and not settings.BRIA_CALLBACK_TOKEN:
+    raise RuntimeError("BRIA_CALLBACK_TOKEN is required when BRIA_CALLBACK_URL is set.")
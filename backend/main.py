@@ -1,30 +1,225 @@
 # backend/main.py
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Body, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import StreamingResponse, JSONResponse, ORJSONResponse, PlainTextResponse, RedirectResponse
 from pydantic import BaseModel
-from typing import Any, Dict, List, Optional
-import traceback
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
 import json
+import math
+import time
+import uuid
+
+import orjson
 
 from config.settings import settings
 
 # Import VLM / BRIA tools
-from services.vlm_client import (
-    prompt_to_json,
-    image_bytes_to_json,
-    generate_image_and_wait,
-    client
-)
+from services.vlm_client import list_models_async, bria_submit_bucket, bria_upstream, gemini_upstream
 
 from services.agent_service import (
     generate_shot_json,
-    auto_fix_json
+    auto_fix_json,
+    auto_fix_many
+)
+
+from services.render_service import render_scene, load_scene, result_cache, render_flight
+from services.sweep_service import check_axes, iter_variants, sweep_size
+from services.storage_service import media_store, is_digest, THUMBNAIL_MEDIA_TYPE
+from utils.file_response import file_response
+from utils.upload_limit import UploadLimit
+from utils.disconnect import CancelOnDisconnect
+from utils.deadline import DeadlineExceeded, REQUESTS_CANCELLED, deadline_var, parse_timeout
+from services.ingest import ingest_upload, UploadRejected
+from schemas.refine_schema import RefinePatch
+from utils.json_patch import apply_patches
+from services.translation_cache import (
+    cached_prompt_to_json,
+    stream_cached_prompt_to_json,
+    translation_cache,
+    translation_flight
 )
+from services.image_cache import (
+    cached_image_bytes_to_json,
+    image_cache,
+    near_duplicate_stats,
+    analysis_flight
+)
+from services import http_client
+from utils.logger import logger, request_id_var
+from utils.metrics import Histogram, register_collector, render_prometheus
+from utils.validators import SceneValidationError, scene_errors
+from utils.resilience import CircuitOpenError
+from services.warmup import run_warmup
+from services.bria_callbacks import callbacks
+from services.job_queue import get_job_queue
+from services.db_service import get_db
+from services.progress import progress, progress_fields
+from routers.project import router as project_router
+from services.scheduler import LANES, BULK, INTERACTIVE, current_lane, bria_scheduler, vlm_scheduler
 
 # ---------------------------------------------------------
 # FASTAPI SETUP
 # ---------------------------------------------------------
-app = FastAPI(title="StudioDirector API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup = None
+    if settings.WARMUP_BLOCKING:
+        await run_warmup()
+    elif settings.WARMUP_ON_STARTUP:
+        warmup = asyncio.create_task(run_warmup())
+
+    try:
+        yield
+    finally:
+        if warmup is not None:
+            warmup.cancel()
+        await http_client.shutdown()
+
+
+app = FastAPI(
+    title="StudioDirector API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+app.include_router(project_router)
+
+
+# ---------------------------------------------------------
+# ERROR RESPONSES
+# ---------------------------------------------------------
+# Raised from deep inside the render / translate paths and mapped to HTTP
+# once here, for every handler and for background renders alike.
+MAPPED_ERRORS = (CircuitOpenError, DeadlineExceeded, SceneValidationError)
+
+
+def _as_http_error(e: Exception) -> HTTPException:
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(503, str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    if isinstance(e, DeadlineExceeded):
+        return HTTPException(504, str(e))
+    return HTTPException(422, e.errors)
+
+
+@app.exception_handler(CircuitOpenError)
+@app.exception_handler(DeadlineExceeded)
+@app.exception_handler(SceneValidationError)
+async def mapped_error(request: Request, exc: Exception):
+    return await http_exception_handler(request, _as_http_error(exc))
+
+
+# ---------------------------------------------------------
+# UPLOAD SIZE LIMIT
+# ---------------------------------------------------------
+# Enforced while the body streams in; the slack covers the multipart
+# framing and the small form fields sent next to the image.
+UPLOAD_PATHS = ("/inspire", "/multi-shot")
+UPLOAD_FORM_SLACK = 64 * 1024
+
+app.add_middleware(
+    UploadLimit,
+    max_bytes=settings.INGEST_MAX_UPLOAD_BYTES + UPLOAD_FORM_SLACK,
+    paths=UPLOAD_PATHS
+)
+
+
+# ---------------------------------------------------------
+# PRIORITY LANES
+# ---------------------------------------------------------
+# Endpoints that fan out many renders default to the bulk lane; clients can
+# override per request with `X-Priority: interactive|bulk`.
+BULK_PATHS = ("/multi-shot", "/generate/batch", "/sweep", "/jobs")
+
+
+@app.middleware("http")
+async def assign_priority_lane(request: Request, call_next):
+    lane = request.headers.get("x-priority", "").lower()
+    if lane not in LANES:
+        lane = BULK if request.url.path.startswith(BULK_PATHS) else INTERACTIVE
+
+    token = current_lane.set(lane)
+    try:
+        return await call_next(request)
+    finally:
+        current_lane.reset(token)
+
+
+# ---------------------------------------------------------
+# REQUEST DEADLINES
+# ---------------------------------------------------------
+# `X-Request-Timeout: <seconds>` bounds every VLM and Bria wait made for the
+# request (see utils/deadline.py); past it the request answers 504.
+@app.middleware("http")
+async def assign_deadline(request: Request, call_next):
+    default = (
+        settings.REQUEST_TIMEOUT_BULK_SECONDS
+        if request.url.path.startswith(BULK_PATHS)
+        else settings.REQUEST_TIMEOUT_SECONDS
+    )
+    timeout = parse_timeout(
+        request.headers.get("x-request-timeout"), default, settings.REQUEST_TIMEOUT_MAX_SECONDS
+    )
+
+    token = deadline_var.set(asyncio.get_running_loop().time() + timeout)
+    try:
+        response = await call_next(request)
+    finally:
+        deadline_var.reset(token)
+
+    if response.status_code == 504:
+        REQUESTS_CANCELLED.inc(reason="deadline")
+    return response
+
+
+# ---------------------------------------------------------
+# REQUEST IDS + HTTP LATENCY
+# ---------------------------------------------------------
+HTTP_REQUEST_SECONDS = Histogram(
+    "studio_http_request_seconds",
+    "Time to response headers, by route template.",
+    ("method", "route", "status"),
+)
+
+
+@app.middleware("http")
+async def track_request(request: Request, call_next):
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    started = time.perf_counter()
+    status = 500
+    try:
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            # Unhandled errors answer here, inside the request id, rather
+            # than in Starlette's outermost error middleware.
+            logger.exception("Unhandled error", extra={"fields": {"path": request.url.path}})
+            response = ORJSONResponse({"detail": str(e)}, status_code=500)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    except asyncio.CancelledError:
+        status = 499  # client went away; see CancelOnDisconnect
+        raise
+    finally:
+        # Route templates (not raw paths) keep label cardinality bounded.
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+        request_id_var.reset(token)
+
+
+# Outermost, so a disconnect cancels every layer above the socket.
+app.add_middleware(CancelOnDisconnect)
 
 
 # ---------------------------------------------------------
@@ -40,6 +235,7 @@ class TranslateResponse(BaseModel):
 
 class GenerateRequest(BaseModel):
     structured_json: Dict[str, Any]   # renamed from json → avoids warnings
+    project_id: Optional[str] = None  # commit the rendered scene as a revision
 
 
 class GenerateResponse(BaseModel):
@@ -47,21 +243,48 @@ class GenerateResponse(BaseModel):
     json: Dict[str, Any]
     request_id: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    cached: bool = False
+    scene_hash: Optional[str] = None
+    media_url: Optional[str] = None
+    revision: Optional[int] = None
 
 
 class RefineRequest(BaseModel):
     structured_json: Dict[str, Any]
     instruction: str
+    project_id: Optional[str] = None
 
 
 class RefineResponse(BaseModel):
     image_url: str
     json: Dict[str, Any]
+    scene_hash: Optional[str] = None
+    media_url: Optional[str] = None
+    revision: Optional[int] = None
+
+
+class PatchRefineRequest(BaseModel):
+    base_hash: str                    # scene_hash from an earlier response
+    patches: List[RefinePatch]
+    instruction: Optional[str] = None
+    project_id: Optional[str] = None
+
+
+class PatchRefineResponse(BaseModel):
+    image_url: str
+    json: Dict[str, Any]
+    scene_hash: str
+    media_url: Optional[str] = None
+    revision: Optional[int] = None
+    noop: bool
+    cached: bool
 
 
 class InspireResponse(BaseModel):
     image_url: str
     json: Dict[str, Any]
+    scene_hash: Optional[str] = None
+    media_url: Optional[str] = None
 
 
 class MultiShotRequest(BaseModel):
@@ -70,20 +293,167 @@ class MultiShotRequest(BaseModel):
 
 class MultiShotItem(BaseModel):
     type: str
-    image_url: str
-    json: Dict[str, Any]
+    image_url: Optional[str] = None
+    json: Optional[Dict[str, Any]] = None
+    index: Optional[int] = None
+    error: Optional[str] = None
+    scene_hash: Optional[str] = None
+    media_url: Optional[str] = None
 
 
 class MultiShotResponse(BaseModel):
     shots: List[MultiShotItem]
 
 
+class BatchGenerateRequest(BaseModel):
+    items: List[Dict[str, Any]]
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: str                       # ok | error | invalid
+    image_url: Optional[str] = None
+    json: Optional[Dict[str, Any]] = None
+    request_id: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class BatchGenerateResponse(BaseModel):
+    items: List[BatchItemResult]
+    summary: Dict[str, int]
+
+
+class SweepRequest(BaseModel):
+    structured_json: Dict[str, Any]
+    axes: Dict[str, List[Any]]        # JSON pointer → values, e.g. {"/lighting/conditions": [...]}
+
+
+class SweepItem(BaseModel):
+    index: int                        # row-major position in the grid
+    coords: Dict[str, Any]            # axis path → value of this cell
+    status: str                       # ok | error | invalid (a duplicate shares its twin's)
+    image_url: Optional[str] = None
+    scene_hash: Optional[str] = None
+    media_url: Optional[str] = None
+    cached: bool = False
+    duplicate_of: Optional[int] = None
+    error: Optional[str] = None
+
+
+class SweepResponse(BaseModel):
+    axes: Dict[str, List[Any]]
+    items: List[SweepItem]
+    summary: Dict[str, int]
+
+
+class JobSubmitRequest(BaseModel):
+    kind: str
+    payload: Dict[str, Any]
+    idempotency_key: Optional[str] = None
+    max_attempts: Optional[int] = None
+
+
+class JobStatusResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+
 # ---------------------------------------------------------
 # BASIC HEALTH
 # ---------------------------------------------------------
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    upstreams = {"bria": bria_upstream.snapshot(), "gemini": gemini_upstream.snapshot()}
+    degraded = any(u["state"] != "closed" for u in upstreams.values())
+    return {"status": "degraded" if degraded else "ok", "upstreams": upstreams}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "results": result_cache.snapshot(),
+        "translations": translation_cache.snapshot(),
+        "images": {**image_cache.snapshot(), "near_duplicate_hits": near_duplicate_stats["hits"]},
+        "in_flight": {
+            flight.name: flight.snapshot()
+            for flight in (render_flight, translation_flight, analysis_flight)
+        },
+        "bria_submit_bucket": bria_submit_bucket.snapshot(),
+        "media": media_store.snapshot()
+    }
+
+
+@app.get("/scheduler/stats")
+def scheduler_stats():
+    return {
+        "bria": bria_scheduler.snapshot(),
+        "gemini": vlm_scheduler.snapshot()
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@register_collector
+def _cache_samples():
+    caches = {"results": result_cache, "translations": translation_cache, "images": image_cache}
+    for name, cache in caches.items():
+        snap = cache.snapshot()
+        for stat in ("memory_hits", "disk_hits", "misses", "sets"):
+            yield (f"studio_cache_{stat}_total", "counter", f"Cache {stat.replace('_', ' ')}.",
+                   {"cache": name}, snap[stat])
+        yield ("studio_cache_memory_entries", "gauge", "Entries held in the memory tier.",
+               {"cache": name}, snap["memory_entries"])
+        if "disk" in snap:
+            for reason in ("expired", "evicted"):
+                yield ("studio_cache_disk_removed_total", "counter", "Disk-tier files removed by sweeps.",
+                       {"cache": name, "reason": reason}, snap["disk"][reason])
+    yield ("studio_image_near_duplicate_hits_total", "counter",
+           "Image analyses served from a perceptually similar upload.", {}, near_duplicate_stats["hits"])
+
+
+@register_collector
+def _flight_samples():
+    for flight in (render_flight, translation_flight, analysis_flight):
+        snap = flight.snapshot()
+        for stat in ("leaders", "coalesced", "abandoned"):
+            yield (f"studio_singleflight_{stat}_total", "counter", f"Single-flight {stat} calls.",
+                   {"flight": flight.name}, snap[stat])
+        yield ("studio_singleflight_in_flight", "gauge", "Distinct keys currently in flight.",
+               {"flight": flight.name}, snap["in_flight"])
+
+
+@register_collector
+def _scheduler_samples():
+    for upstream, scheduler in (("bria", bria_scheduler), ("gemini", vlm_scheduler)):
+        for lane_name, lane in scheduler.snapshot()["lanes"].items():
+            labels = {"upstream": upstream, "lane": lane_name}
+            yield ("studio_scheduler_queue_depth", "gauge", "Callers waiting for a slot.",
+                   labels, lane["queue_depth"])
+            yield ("studio_scheduler_in_flight", "gauge", "Slots currently held.",
+                   labels, lane["in_flight"])
+            yield ("studio_scheduler_granted_total", "counter", "Slots granted.",
+                   labels, lane["granted"])
+
+    for upstream in (bria_upstream, gemini_upstream):
+        breaker = upstream.breaker.snapshot()
+        yield ("studio_circuit_open", "gauge", "1 while the upstream's circuit is open or half-open.",
+               {"upstream": upstream.name}, int(breaker["state"] != "closed"))
+
+    bucket = bria_submit_bucket.snapshot()
+    yield ("studio_bria_submit_tokens", "gauge", "Tokens left in the Bria submit bucket.",
+           {}, bucket["tokens"])
+    yield ("studio_bria_submit_waited_seconds_total", "counter",
+           "Time spent waiting on the Bria submit bucket.", {}, bucket["waited_seconds"])
 
 
 @app.get("/test-key")
@@ -98,141 +468,688 @@ def test_key():
 # 1️⃣ TRANSLATE — Prompt → JSON
 # ---------------------------------------------------------
 @app.post("/translate", response_model=TranslateResponse)
-def translate(req: TranslateRequest):
-    try:
-        raw_json = prompt_to_json(req.prompt)  # Gemini conversion
-        fixed = auto_fix_json(raw_json)
-        return {"result": fixed}
-    except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(500, str(e))
+async def translate(req: TranslateRequest):
+    raw_json = await cached_prompt_to_json(req.prompt)  # Gemini conversion
+    fixed = auto_fix_json(raw_json)
+    return {"result": fixed}
+
+
+@app.post("/translate/stream")
+async def translate_stream(req: TranslateRequest):
+    """
+    NDJSON: {"field": name, "value": ...} per top-level field as Gemini
+    produces it, then {"result": ...} with the same document /translate
+    returns (or {"error": ...} if the translation fails midway).
+    """
+
+    async def events():
+        try:
+            async for event in stream_cached_prompt_to_json(req.prompt):
+                if event[0] == "field":
+                    yield orjson.dumps({"field": event[1], "value": event[2]}) + b"\n"
+                else:
+                    yield orjson.dumps({"result": auto_fix_json(event[1])}) + b"\n"
+        except Exception as e:
+            logger.exception("Streaming translate failed")
+            yield orjson.dumps({"error": str(e)}) + b"\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+# ---------------------------------------------------------
+# BACKGROUND RENDERS — answer 202, push the outcome over /ws/progress
+# ---------------------------------------------------------
+_background_renders = set()
+
+
+def _run_in_background(handler, *args) -> JSONResponse:
+    """
+    `?background=true`: run `handler(*args)` detached from the HTTP request
+    and answer 202 with the request id at once. The render is bound by its
+    upstream timeouts, not by the request's deadline. Progress arrives as
+    events on /ws/progress, ending with "result" (the handler's response
+    body) or "error" (its HTTP status and detail).
+    """
+    async def run():
+        # The task copied the request's context; it must not inherit its deadline.
+        deadline_var.set(None)
+        try:
+            body = await handler(*args)
+        except (HTTPException, *MAPPED_ERRORS) as e:
+            error = e if isinstance(e, HTTPException) else _as_http_error(e)
+            progress.publish("error", status_code=error.status_code, detail=error.detail)
+        except Exception as e:
+            logger.exception("Background render failed")
+            progress.publish("error", status_code=500, detail=str(e))
+        else:
+            progress.publish("result", body=body)
+
+    task = asyncio.create_task(run())
+    _background_renders.add(task)
+    task.add_done_callback(_background_renders.discard)
+    return JSONResponse({"request_id": request_id_var.get(), "status": "accepted"}, status_code=202)
 
 
 # ---------------------------------------------------------
 # 2️⃣ GENERATE — Structured JSON → Image
 # ---------------------------------------------------------
-@app.post("/generate", response_model=GenerateResponse)
-async def generate(req: GenerateRequest):
+async def _require_project(project_id: Optional[str]):
+    """404 before anything is rendered if the target project doesn't exist."""
+    if project_id and await asyncio.to_thread(get_db().get_project, project_id) is None:
+        raise HTTPException(404, "Project not found.")
+
+
+async def _record_revision(project_id: Optional[str], scene: Dict[str, Any], result, message=None):
+    """Commit a rendered scene to the project's history; returns its number."""
+    if not project_id:
+        return None
     try:
-        if not req.structured_json:
-            raise HTTPException(422, "structured_json is required.")
+        revision = await asyncio.to_thread(
+            get_db().commit, project_id, scene, result["scene_hash"], message
+        )
+    except KeyError:
+        raise HTTPException(404, "Project not found.")
+    return revision["number"]
 
-        fixed_json = auto_fix_json(req.structured_json)
 
-        structured_prompt = json.dumps(fixed_json, ensure_ascii=False)
+@app.post("/generate", response_model=GenerateResponse)
+async def generate(req: GenerateRequest, background: bool = False):
+    await _require_project(req.project_id)
+    if background:
+        return _run_in_background(generate, req)
+    if not req.structured_json:
+        raise HTTPException(422, "structured_json is required.")
 
-        print("\n--- BRIA STRUCTURED PROMPT ---")
-        print(structured_prompt)
-        print("--------------------------------\n")
+    fixed_json = auto_fix_json(req.structured_json)
 
-        result = await generate_image_and_wait({
-            "structured_prompt": structured_prompt
-        })
+    logger.debug("BRIA structured prompt: %s", fixed_json)
 
-        return {
-            "image_url": result["image_url"],
-            "json": fixed_json,
-            "request_id": result.get("request_id"),
-            "metadata": result.get("metadata")
-        }
+    result = await render_scene(fixed_json)
+    revision = await _record_revision(req.project_id, fixed_json, result)
 
-    except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(500, str(e))
+    return {
+        "image_url": result["image_url"],
+        "json": fixed_json,
+        "request_id": result.get("request_id"),
+        "metadata": result.get("metadata"),
+        "cached": result["cached"],
+        "scene_hash": result["scene_hash"],
+        "media_url": result["media_url"],
+        "revision": revision
+    }
 
 
 # ---------------------------------------------------------
 # 3️⃣ REFINE — Modify JSON → New Image
 # ---------------------------------------------------------
 @app.post("/refine", response_model=RefineResponse)
-async def refine(req: RefineRequest):
-    try:
-        refined = req.structured_json.copy()
-        refined["refinement_instruction"] = req.instruction
+async def refine(req: RefineRequest, background: bool = False):
+    await _require_project(req.project_id)
+    if background:
+        return _run_in_background(refine, req)
+    refined = req.structured_json.copy()
+    refined["refinement_instruction"] = req.instruction
 
-        fixed = auto_fix_json(refined)
+    fixed = auto_fix_json(refined)
 
-        result = await generate_image_and_wait({
-            "structured_prompt": json.dumps(fixed)
-        })
+    result = await render_scene(fixed)
+    revision = await _record_revision(req.project_id, fixed, result, message=req.instruction)
 
-        return {"image_url": result["image_url"], "json": fixed}
+    return {
+        "image_url": result["image_url"],
+        "json": fixed,
+        "scene_hash": result["scene_hash"],
+        "media_url": result["media_url"],
+        "revision": revision
+    }
 
-    except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(500, str(e))
+
+@app.post("/refine/patch", response_model=PatchRefineResponse)
+async def refine_patch(req: PatchRefineRequest, background: bool = False):
+    await _require_project(req.project_id)
+    if background:
+        return _run_in_background(refine_patch, req)
+    base = load_scene(req.base_hash)
+    if base is None:
+        raise HTTPException(404, "Unknown base_hash; render the scene first.")
+
+    patches = list(req.patches)
+    if req.instruction is not None:
+        patches.append(RefinePatch(path="/refinement_instruction", value=req.instruction))
+
+    try:
+        patched, changed = apply_patches(base, patches)
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+
+    # A no-op patch list resolves to the base scene's hash, so
+    # render_scene answers from the result cache without calling Bria.
+    fixed = auto_fix_json(patched) if changed else base
+
+    result = await render_scene(fixed)
+    revision = await _record_revision(req.project_id, fixed, result, message=req.instruction)
+
+    return {
+        "image_url": result["image_url"],
+        "json": fixed,
+        "scene_hash": result["scene_hash"],
+        "media_url": result["media_url"],
+        "revision": revision,
+        "noop": not changed,
+        "cached": result["cached"]
+    }
 
 
 # ---------------------------------------------------------
 # 4️⃣ INSPIRE — Image → JSON → New Image
 # ---------------------------------------------------------
-@app.post("/inspire", response_model=InspireResponse)
-async def inspire(image: UploadFile = File(...)):
+async def _ingest(image: UploadFile):
+    """Size-check and downscale an upload before it goes anywhere near Gemini."""
     try:
-        img_bytes = await image.read()
-        extracted = image_bytes_to_json(img_bytes, mime_type=image.content_type)
+        return await ingest_upload(image)
+    except UploadRejected as e:
+        raise HTTPException(e.status_code, str(e))
 
-        fixed = auto_fix_json(extracted)
 
-        result = await generate_image_and_wait({
-            "structured_prompt": json.dumps(fixed)
-        })
+@app.post("/inspire", response_model=InspireResponse)
+async def inspire(image: UploadFile = File(...)):
+    ingested = await _ingest(image)
+    extracted = await cached_image_bytes_to_json(ingested.data, mime_type=ingested.mime_type)
+
+    fixed = auto_fix_json(extracted)
 
-        return {"image_url": result["image_url"], "json": fixed}
+    result = await render_scene(fixed)
 
-    except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(500, str(e))
+    return {
+        "image_url": result["image_url"],
+        "json": fixed,
+        "scene_hash": result["scene_hash"],
+        "media_url": result["media_url"]
+    }
 
 
 # ---------------------------------------------------------
 # 5️⃣ MULTI-SHOT — Generate multiple shots
 # ---------------------------------------------------------
+async def _render_shot(index: int, shot: str, base_json: Dict[str, Any], limiter: asyncio.Semaphore):
+    progress_fields.set({"index": index, "shot": shot})
+    fixed = None
+
+    try:
+        fixed = auto_fix_json(generate_shot_json(base_json, shot))
+        async with limiter:
+            result = await render_scene(fixed)
+    except Exception as e:
+        logger.exception("Shot render failed")
+        return {"index": index, "type": shot, "image_url": None, "json": fixed, "error": str(e)}
+
+    return {
+        "index": index,
+        "type": shot,
+        "image_url": result["image_url"],
+        "json": fixed,
+        "scene_hash": result["scene_hash"],
+        "media_url": result["media_url"]
+    }
+
+
+async def _stream_ndjson(tasks: List[asyncio.Task], finalize):
+    """
+    NDJSON: one line per item as it finishes, then `finalize(ordered_items)`
+    as the last line. Items must carry their `index`.
+    """
+    ordered = [None] * len(tasks)
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            ordered[item["index"]] = item
+            yield orjson.dumps(item) + b"\n"
+
+        yield orjson.dumps(finalize(ordered)) + b"\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 @app.post("/multi-shot", response_model=MultiShotResponse)
 async def multi_shot(
     image: UploadFile = File(...),
-    shot_types_json: Optional[str] = Form(None)
+    shot_types_json: Optional[str] = Form(None),
+    stream: bool = False,
+    background: bool = False
 ):
+    shot_types = _parse_shot_types(shot_types_json)
+    # Ingest now: the upload is closed once a background request's 202 is sent.
+    ingested = await _ingest(image)
+    if background:
+        return _run_in_background(_multi_shot, ingested, shot_types)
+    return await _multi_shot(ingested, shot_types, stream)
+
+
+def _parse_shot_types(shot_types_json: Optional[str]) -> List[str]:
+    """The `shot_types_json` form field: a JSON list of shot names (422 otherwise)."""
+    if not shot_types_json:
+        return ["establishing", "medium", "hero", "closeup"]
     try:
-        img_bytes = await image.read()
-        base_json = image_bytes_to_json(img_bytes, mime_type=image.content_type)
+        shot_types = json.loads(shot_types_json)
+    except ValueError:
+        raise HTTPException(422, "shot_types_json is not valid JSON.")
+    if not isinstance(shot_types, list) or not all(isinstance(shot, str) for shot in shot_types):
+        raise HTTPException(422, "shot_types_json must be a JSON list of strings.")
+    return shot_types
 
-        if shot_types_json:
-            shot_types = json.loads(shot_types_json)
-        else:
-            shot_types = ["establishing", "medium", "hero", "closeup"]
 
-        shots_output = []
+async def _multi_shot(ingested, shot_types: List[str], stream: bool = False):
+    base_json = await cached_image_bytes_to_json(ingested.data, mime_type=ingested.mime_type)
+
+    limiter = asyncio.Semaphore(max(1, settings.MULTI_SHOT_CONCURRENCY))
+    tasks = [
+        asyncio.create_task(_render_shot(i, shot, base_json, limiter))
+        for i, shot in enumerate(shot_types)
+    ]
+
+    if stream:
+        return StreamingResponse(
+            _stream_ndjson(tasks, lambda shots: {"shots": shots}),
+            media_type="application/x-ndjson"
+        )
+
+    shots_output = await asyncio.gather(*tasks)
+
+    return {"shots": shots_output}
 
-        for shot in shot_types:
-            shot_json = generate_shot_json(base_json, shot)
-            fixed = auto_fix_json(shot_json)
 
-            result = await generate_image_and_wait({
-                "structured_prompt": json.dumps(fixed)
-            })
+# ---------------------------------------------------------
+# 6️⃣ BATCH GENERATE — Many structured JSONs → Images
+# ---------------------------------------------------------
+async def _render_batch_item(index: int, fixed: Dict[str, Any], limiter: asyncio.Semaphore):
+    progress_fields.set({"index": index})
+    try:
+        async with limiter:
+            result = await render_scene(fixed)
+    except Exception as e:
+        return {"index": index, "status": "error", "json": fixed, "error": str(e)}
+
+    return {
+        "index": index,
+        "status": "ok",
+        "image_url": result["image_url"],
+        "json": fixed,
+        "request_id": result.get("request_id"),
+        "cached": result["cached"]
+    }
+
 
-            shots_output.append({
-                "type": shot,
-                "image_url": result["image_url"],
-                "json": fixed
-            })
+def _batch_summary(items):
+    summary = {"total": len(items), "ok": 0, "error": 0, "invalid": 0}
+    for item in items:
+        summary[item["status"]] += 1
+    return summary
 
-        return {"shots": shots_output}
 
+@app.post("/generate/batch", response_model=BatchGenerateResponse)
+async def generate_batch(req: BatchGenerateRequest, stream: bool = False):
+    if len(req.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(413, f"At most {settings.BATCH_MAX_ITEMS} items per batch.")
+
+    # One auto-fix + validation pass over the whole batch before anything
+    # is dispatched; invalid items never reach Bria.
+    fixed_items = [item or None for item in auto_fix_many(req.items)]
+    item_errors = [
+        scene_errors(fixed) if fixed else ["structured_json is required."]
+        for fixed in fixed_items
+    ]
+
+    async def _invalid(index):
+        return {"index": index, "status": "invalid", "error": "; ".join(item_errors[index])}
+
+    # Submits are paced by bria_submit_bucket inside generate_image_and_wait.
+    limiter = asyncio.Semaphore(max(1, settings.BATCH_CONCURRENCY))
+    tasks = [
+        asyncio.create_task(
+            _render_batch_item(i, fixed, limiter) if not item_errors[i] else _invalid(i)
+        )
+        for i, fixed in enumerate(fixed_items)
+    ]
+
+    if stream:
+        return StreamingResponse(
+            _stream_ndjson(tasks, lambda items: {"summary": _batch_summary(items)}),
+            media_type="application/x-ndjson"
+        )
+
+    items = await asyncio.gather(*tasks)
+    return {"items": items, "summary": _batch_summary(items)}
+
+
+# ---------------------------------------------------------
+# SWEEP — One scene × a grid of field values
+# ---------------------------------------------------------
+def _sweep_cell(variant: Dict[str, Any], **fields) -> Dict[str, Any]:
+    return {
+        "index": variant["index"],
+        "coords": variant["coords"],
+        "scene_hash": variant["scene_hash"],
+        **fields
+    }
+
+
+async def _render_sweep_cell(variant: Dict[str, Any]):
+    progress_fields.set({"index": variant["index"]})
+    try:
+        result = await render_scene(variant["json"])
     except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(500, str(e))
+        return _sweep_cell(variant, status="error", error=str(e))
+
+    return _sweep_cell(
+        variant,
+        status="ok",
+        image_url=result["image_url"],
+        media_url=result["media_url"],
+        cached=result["cached"]
+    )
+
+
+def _twin_cell(duplicate: Dict[str, Any], twin: Dict[str, Any]) -> Dict[str, Any]:
+    """A duplicate's cell: its own position, the outcome of the cell it resolved to."""
+    return {**twin, "index": duplicate["index"], "coords": duplicate["coords"], "duplicate_of": twin["index"]}
+
+
+async def _sweep_cells(variants: Iterator[Dict[str, Any]], concurrency: int):
+    """
+    Yield cells as they settle. Variants are pulled from the (lazy)
+    iterator only while fewer than `concurrency` renders are in flight, so
+    a large grid is never expanded into scenes and tasks up front. Invalid
+    variants settle at once; duplicates settle with their twin.
+    """
+    pending = set()
+    settled: Dict[int, Dict[str, Any]] = {}
+    waiting: Dict[int, List[Dict[str, Any]]] = {}
+    exhausted = False
+
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < concurrency:
+                variant = next(variants, None)
+                if variant is None:
+                    exhausted = True
+                elif "duplicate_of" in variant:
+                    twin = variant["duplicate_of"]
+                    duplicate = _sweep_cell(variant)
+                    if twin in settled:
+                        yield _twin_cell(duplicate, settled[twin])
+                    else:
+                        waiting.setdefault(twin, []).append(duplicate)
+                elif variant["errors"]:
+                    cell = _sweep_cell(variant, status="invalid", error="; ".join(variant["errors"]))
+                    settled[cell["index"]] = cell
+                    yield cell
+                else:
+                    pending.add(asyncio.create_task(_render_sweep_cell(variant)))
+
+            if not pending:
+                continue
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                cell = task.result()
+                settled[cell["index"]] = cell
+                yield cell
+                for duplicate in waiting.pop(cell["index"], ()):
+                    yield _twin_cell(duplicate, cell)
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _sweep_summary(items):
+    summary = {"total": len(items), "ok": 0, "error": 0, "invalid": 0, "duplicates": 0}
+    for item in items:
+        summary[item["status"]] += 1
+        summary["duplicates"] += item.get("duplicate_of") is not None
+    return summary
+
+
+async def _stream_sweep(plan: Dict[str, Any], cells):
+    yield orjson.dumps({"plan": plan}) + b"\n"
+    items = []
+    async for cell in cells:
+        items.append(cell)
+        yield orjson.dumps(cell) + b"\n"
+    yield orjson.dumps({"summary": _sweep_summary(items)}) + b"\n"
+
+
+@app.post("/sweep", response_model=SweepResponse)
+async def sweep(req: SweepRequest, stream: bool = False):
+    """
+    Render every combination of `axes` applied to `structured_json`.
+    Variants are auto-fixed and deduplicated by canonical hash as they are
+    pulled, so combinations that resolve to the same scene render once and
+    share the result; renders run SWEEP_CONCURRENCY at a time on the bulk
+    lane. `?stream=true` sends a `{"plan": ...}` line, then one line per
+    cell as it finishes, then the summary.
+    """
+    try:
+        check_axes(req.axes)
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+
+    size = sweep_size(req.axes)
+    if size > settings.SWEEP_MAX_VARIANTS:
+        raise HTTPException(413, f"Sweep has {size} variants; at most {settings.SWEEP_MAX_VARIANTS} allowed.")
+
+    cells = _sweep_cells(
+        iter_variants(req.structured_json, req.axes), max(1, settings.SWEEP_CONCURRENCY)
+    )
+
+    if stream:
+        return StreamingResponse(
+            _stream_sweep({"axes": req.axes, "total": size}, cells),
+            media_type="application/x-ndjson"
+        )
+
+    items = sorted([cell async for cell in cells], key=lambda cell: cell["index"])
+    return {"axes": req.axes, "items": items, "summary": _sweep_summary(items)}
+
+
+# ---------------------------------------------------------
+# 7️⃣ JOBS — Durable background generation
+# ---------------------------------------------------------
+def _get_job_or_404(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found.")
+    return job
+
+
+@app.post("/jobs", response_model=JobStatusResponse, status_code=202)
+def submit_job(
+    req: JobSubmitRequest,
+    idempotency_key: Optional[str] = Header(None)
+):
+    try:
+        return get_job_queue().submit(
+            req.kind,
+            req.payload,
+            idempotency_key=req.idempotency_key or idempotency_key,
+            max_attempts=req.max_attempts
+        )
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def job_status(job_id: str):
+    return _get_job_or_404(job_id)
+
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = _get_job_or_404(job_id)
+
+    if job["status"] == "succeeded":
+        return job["result"]
+
+    if job["status"] == "failed":
+        raise HTTPException(409, f"Job failed: {job['error']}")
+
+    return JSONResponse({"id": job_id, "status": job["status"]}, status_code=202)
+
+
+# ---------------------------------------------------------
+# MEDIA — Local copies of renders + thumbnails
+# ---------------------------------------------------------
+# /media/{digest}[/thumb/{size}] are content-addressed and never change, so
+# browsers and CDNs may cache them forever. /media/scenes/{scene_hash} is the
+# stable URL handed out in responses; it redirects to the stored blob, or to
+# Bria's own URL while the background download is still running.
+@app.get("/media/scenes/{scene_hash}")
+async def media_for_scene(scene_hash: str, size: Optional[int] = None):
+    digest = media_store.resolve(scene_hash)
+
+    if digest is None:
+        cached = result_cache.get(scene_hash)
+        if cached is None:
+            raise HTTPException(404, "Unknown scene_hash.")
+        media_store.schedule(cached["image_url"], scene_hash)
+        return RedirectResponse(cached["image_url"], status_code=307)
+
+    target = f"/media/{digest}" if size is None else f"/media/{digest}/thumb/{size}"
+    return RedirectResponse(target, status_code=307)
+
+
+@app.get("/media/{digest}")
+def media_blob(digest: str, request: Request):
+    if not media_store.has(digest):
+        raise HTTPException(404, "Media not found.")
+
+    media_store.touch(digest)
+    return file_response(request, media_store.blob_path(digest), media_store.media_type(digest), digest)
+
+
+@app.get("/media/{digest}/thumb/{size}")
+async def media_thumbnail(digest: str, size: int, request: Request):
+    if not is_digest(digest):
+        raise HTTPException(404, "Media not found.")
+
+    path = await asyncio.to_thread(media_store.thumbnail, digest, size)
+    if path is None:
+        raise HTTPException(404, f"No {size}px thumbnail; sizes: {list(media_store.thumbnail_sizes)}.")
+
+    return file_response(request, path, THUMBNAIL_MEDIA_TYPE, f"{digest}-{size}")
+
+
+# ---------------------------------------------------------
+# BRIA COMPLETION CALLBACK
+# ---------------------------------------------------------
+# Mounted only in callback mode, and then always behind the shared token:
+# a forged payload would otherwise get its image_url fetched and served.
+async def bria_callback(payload: Dict[str, Any] = Body(...), token: str = ""):
+    if not hmac.compare_digest(token.encode(), settings.BRIA_CALLBACK_TOKEN.encode()):
+        raise HTTPException(403, "Invalid callback token.")
+
+    request_id = payload.get("request_id")
+    if not request_id:
+        raise HTTPException(422, "request_id is required.")
+
+    return {"accepted": True, "matched": callbacks.resolve(request_id, payload)}
+
+
+if settings.BRIA_CALLBACK_URL:
+    app.post("/callbacks/bria")(bria_callback)
+
+
+# ---------------------------------------------------------
+# PROGRESS — WebSocket push of render events
+# ---------------------------------------------------------
+def _request_ids(value) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [v for v in value if isinstance(v, str)]
+    return []
+
+
+async def _send_progress(websocket: WebSocket, queue: asyncio.Queue):
+    while True:
+        await websocket.send_text(orjson.dumps(await queue.get()).decode())
+
+
+@app.websocket("/ws/progress")
+async def progress_socket(websocket: WebSocket, ids: Optional[str] = None):
+    """
+    One socket carries the events of any number of renders. Send
+    `{"subscribe": id | [ids]}` / `{"unsubscribe": ...}` (or pass `?ids=a,b`)
+    with the X-Request-ID of the HTTP calls to follow; events already
+    published for an id are replayed on subscribe. A binary frame closes
+    the socket with 1003.
+
+    Events: queued, submitted, poll (Bria status), completed (image_url,
+    media_url) and failed per render; result / error end a background
+    request. Multi-shot and batch events carry the item's `index`.
+    """
+    await websocket.accept()
+    queue = progress.new_queue()
+    subscribed = set()
+
+    def subscribe(request_ids):
+        for request_id in request_ids:
+            if request_id in subscribed:
+                continue
+            subscribed.add(request_id)
+            for event in progress.subscribe(request_id, queue):
+                if not queue.full():
+                    queue.put_nowait(event)
+
+    subscribe(ids.split(",") if ids else [])
+    sender = asyncio.create_task(_send_progress(websocket, queue))
+    progress.connections += 1
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            if frame.get("text") is None:
+                # receive_text() would raise KeyError on a binary frame.
+                await websocket.close(code=1003, reason="Only text frames are accepted.")
+                break
+
+            try:
+                message = orjson.loads(frame["text"])
+            except orjson.JSONDecodeError:
+                message = None
+            if not isinstance(message, dict):
+                if not queue.full():
+                    queue.put_nowait({"event": "error", "detail": "Expected a JSON object."})
+                continue
+
+            subscribe(_request_ids(message.get("subscribe")))
+            for request_id in _request_ids(message.get("unsubscribe")):
+                subscribed.discard(request_id)
+                progress.unsubscribe(request_id, queue)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        progress.connections -= 1
+        sender.cancel()
+        for request_id in subscribed:
+            progress.unsubscribe(request_id, queue)
+
+
+@register_collector
+def _progress_samples():
+    snap = progress.snapshot()
+    yield ("studio_progress_connections", "gauge", "Open /ws/progress sockets.",
+           {}, snap["connections"])
+    yield ("studio_progress_subscriptions", "gauge", "Request ids with a live subscriber.",
+           {}, snap["subscribed_ids"])
 
 
 # ---------------------------------------------------------
-# 6️⃣ LIST GEMINI MODELS
+# 8️⃣ LIST GEMINI MODELS
 # ---------------------------------------------------------
 @app.get("/list-models")
-def list_models():
+async def list_models():
     try:
-        if hasattr(client, "models") and hasattr(client.models, "list"):
-            return {"models": client.models.list()}
-        return {"models": []}
+        return {"models": [model.name for model in await list_models_async()]}
     except Exception as e:
         return {"error": str(e)}
@@ -1,11 +1,66 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+
+from schemas.project_schema import Project, RevisionCommit
+from services.db_service import ProjectNameTaken, get_db
 
 router = APIRouter()
 
+
+def _project_or_404(project_id: str):
+    project = get_db().get_project(project_id)
+    if project is None:
+        raise HTTPException(404, "Project not found.")
+    return project
+
+
 @router.post('/project/save')
-def save_project(payload: dict):
-    return {"status":"saved"}
+def save_project(project: Project):
+    try:
+        return {"status": "saved", "project": get_db().save_project(project)}
+    except ProjectNameTaken as e:
+        raise HTTPException(409, str(e))
 
 @router.get('/project/load')
-def load_project():
-    return {"project": null}
+def load_project(id: Optional[str] = None, name: Optional[str] = None):
+    if id:
+        project = get_db().get_project(id)
+    elif name:
+        project = get_db().find_project(name)
+    else:
+        raise HTTPException(422, "Pass id or name.")
+    if project is None:
+        raise HTTPException(404, "Project not found.")
+    return {"project": project}
+
+@router.get('/project/list')
+def list_projects(limit: int = 50, offset: int = 0):
+    return {"projects": get_db().list_projects(limit, offset)}
+
+@router.get('/project/by-render/{render_hash}')
+def revisions_for_render(render_hash: str):
+    return {"revisions": get_db().find_by_render(render_hash)}
+
+@router.delete('/project/{project_id}')
+def delete_project(project_id: str):
+    if not get_db().delete_project(project_id):
+        raise HTTPException(404, "Project not found.")
+    return {"status": "deleted"}
+
+@router.post('/project/{project_id}/revisions')
+def commit_revision(project_id: str, req: RevisionCommit):
+    _project_or_404(project_id)
+    return get_db().commit(project_id, req.scene, render_hash=req.render_hash, message=req.message)
+
+@router.get('/project/{project_id}/revisions')
+def revision_history(project_id: str, limit: int = 100, before: Optional[int] = None):
+    _project_or_404(project_id)
+    return {"revisions": get_db().history(project_id, limit=limit, before=before)}
+
+@router.get('/project/{project_id}/revisions/{number}')
+def checkout_revision(project_id: str, number: int):
+    scene = get_db().checkout(project_id, number)
+    if scene is None:
+        raise HTTPException(404, "Revision not found.")
+    return {**get_db().revision(project_id, number), "scene": scene}
@@ -5,3 +5,11 @@ class Project(BaseModel):
     id: str | None = None
     name: str
     data: dict[str, Any]
+    render_hash: str | None = None   # scene_hash of the render `data` produced
+    message: str | None = None
+
+
+class RevisionCommit(BaseModel):
+    scene: dict[str, Any]
+    render_hash: str | None = None
+    message: str | None = None
@@ -1,5 +1,8 @@
+from typing import Literal
+
 from pydantic import BaseModel
 
 class RefinePatch(BaseModel):
-    path: str
-    value: object
+    path: str                    # RFC 6901 JSON pointer, e.g. "/lighting/conditions"
+    value: object = None
+    op: Literal["replace", "add", "remove"] = "replace"
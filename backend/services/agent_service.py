@@ -1,10 +1,79 @@
-def auto_fix_json(json_data):
-    # Fix exposure
-    if json_data.get("lighting", {}).get("exposure", 1) > 1.3:
-        json_data["lighting"]["exposure"] = 1.0
+import json
+from collections import Counter as HitCounter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List
 
-    # Fix palette warmth
-    if json_data.get("color_palette", {}).get("warmth", 0.5) < 0.2:
-        json_data["color_palette"]["warmth"] = 0.5
+from config.settings import settings
+from utils.metrics import Counter, span
+from utils.rule_engine import RuleSet
 
-    return json_data
+
+AUTO_FIX_HITS = Counter(
+    "studio_auto_fix_hits_total", "Scene values changed by auto-fix, by rule.", ("rule",)
+)
+
+
+@lru_cache(maxsize=None)
+def get_auto_fix_rules() -> RuleSet:
+    """Compile AUTO_FIX_RULES_PATH once; a bad rule fails here, not per request."""
+    with open(settings.AUTO_FIX_RULES_PATH, "r", encoding="utf-8") as f:
+        return RuleSet(json.load(f)["rules"])
+
+
+def _count(hits: HitCounter):
+    for rule_id, n in hits.items():
+        AUTO_FIX_HITS.inc(n, rule=rule_id)
+
+
+def auto_fix_json(json_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply the auto-fix rules. The input is never modified: a fixed copy is
+    returned, or the input itself when no rule changed anything.
+    """
+    hits = HitCounter()
+    with span("auto_fix"):
+        fixed = get_auto_fix_rules().apply(json_data, hits)
+    _count(hits)
+    return fixed
+
+
+def auto_fix_many(scenes: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """auto_fix_json over many scenes in one pass (one span, one counter update per rule)."""
+    hits = HitCounter()
+    with span("auto_fix"):
+        fixed = get_auto_fix_rules().apply_many(scenes, hits)
+    _count(hits)
+    return fixed
+
+
+SHOT_PRESETS = {
+    "establishing": {
+        "camera_angle": "high angle, wide establishing view",
+        "lens_focal_length": "24mm wide-angle",
+        "depth_of_field": "deep",
+    },
+    "medium": {
+        "camera_angle": "eye level",
+        "lens_focal_length": "50mm standard",
+        "depth_of_field": "medium",
+    },
+    "hero": {
+        "camera_angle": "low angle, heroic",
+        "lens_focal_length": "35mm",
+        "depth_of_field": "shallow",
+    },
+    "closeup": {
+        "camera_angle": "eye level, tight close-up",
+        "lens_focal_length": "85mm portrait",
+        "depth_of_field": "very shallow",
+    },
+}
+
+
+def generate_shot_json(base_json, shot_type):
+    """Derive a shot variant of `base_json` without touching the original."""
+    shot_json = dict(base_json)
+    photo = dict(shot_json.get("photographic_characteristics") or {})
+    photo.update(SHOT_PRESETS.get(shot_type, {"camera_angle": shot_type}))
+    shot_json["photographic_characteristics"] = photo
+    return shot_json
@@ -0,0 +1,66 @@
+# backend/services/bria_callbacks.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class CallbackRegistry:
+    """
+    Pending Bria generations waiting for a completion callback, by request_id.
+
+    A callback can beat `register` (Bria answers before our submit coroutine
+    resumes), so unmatched payloads are parked for `early_ttl` seconds and
+    handed to the next registration for that id. At most `max_early` are
+    parked; the oldest go first.
+
+    The registry is per process: a callback that lands on another worker
+    never matches here, which is why waiters keep polling slowly as well.
+    """
+
+    def __init__(self, early_ttl: float = 120, max_early: int = 1024):
+        self.early_ttl = early_ttl
+        self.max_early = max_early
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._early: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def register(self, request_id: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+
+        early = self._early.pop(request_id, None)
+        if early is not None and early[0] >= time.monotonic():
+            future.set_result(early[1])
+        else:
+            self._pending[request_id] = future
+
+        return future
+
+    def resolve(self, request_id: str, payload: Dict[str, Any]) -> bool:
+        """Deliver a callback payload. Returns True if a waiter was woken."""
+        future = self._pending.pop(request_id, None)
+        if future is not None and not future.done():
+            future.set_result(payload)
+            return True
+
+        self._prune_early()
+        self._early[request_id] = (time.monotonic() + self.early_ttl, payload)
+        self._early.move_to_end(request_id)
+        while len(self._early) > self.max_early:
+            self._early.popitem(last=False)
+        return False
+
+    def discard(self, request_id: Optional[str]):
+        if request_id:
+            self._pending.pop(request_id, None)
+
+    def _prune_early(self):
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._early.items() if expires < now]:
+            del self._early[key]
+
+    def __len__(self):
+        return len(self._pending)
+
+
+callbacks = CallbackRegistry()
@@ -0,0 +1,300 @@
+# backend/services/cache_service.py
+
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import orjson
+
+
+# ============================================================
+# 🔹 In-process LRU tier
+# ============================================================
+
+class MemoryCache:
+    """Thread-safe LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ============================================================
+# 🔹 On-disk tier (shared by every uvicorn worker)
+# ============================================================
+
+class DiskCache:
+    """
+    One JSON file per key under `directory`, fanned out by key prefix.
+    Writes go through a temp file + os.replace so concurrent workers
+    never observe a half-written entry.
+
+    Bounded by `max_bytes` / `max_entries` (0 = unbounded): every
+    `sweep_interval` seconds a `set` starts a background sweep that deletes
+    expired entries and stale temp files, then the least recently read
+    entries until the directory is back under both limits. A file's mtime
+    is its write time (so mtime + ttl is its expiry) and its atime is
+    bumped on every hit, whatever the filesystem's atime policy.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl_seconds: float = 86400,
+        max_bytes: int = 0,
+        max_entries: int = 0,
+        sweep_interval: float = 600,
+    ):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.stats = {"sweeps": 0, "expired": 0, "evicted": 0, "bytes": 0, "entries": 0}
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return None
+
+        if entry.get("expires_at", 0) < time.time():
+            self.delete(key)
+            return None
+
+        self._touch(path)
+        return entry.get("value")
+
+    def set(self, key: str, value: Any):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps({"expires_at": time.time() + self.ttl_seconds, "value": value}))
+        os.replace(tmp_path, path)
+
+        self._maybe_sweep()
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def contains(self, key: str) -> bool:
+        """Whether an unexpired entry exists, without reading it."""
+        try:
+            return os.stat(self._path(key)).st_mtime + self.ttl_seconds >= time.time()
+        except FileNotFoundError:
+            return False
+
+    # ---------- bounding ----------
+
+    @staticmethod
+    def _touch(path: str):
+        """Mark `path` as just read, keeping its mtime (= write time)."""
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+
+    def _maybe_sweep(self):
+        if time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return  # a sweep is already running
+        self._last_sweep = time.monotonic()
+        threading.Thread(target=self._sweep_locked, name="disk-cache-sweep", daemon=True).start()
+
+    def _sweep_locked(self):
+        try:
+            self._sweep()
+        finally:
+            self._sweep_lock.release()
+
+    def sweep(self):
+        """Run one sweep now, in the calling thread."""
+        with self._sweep_lock:
+            self._sweep()
+
+    def _sweep(self):
+        now = time.time()
+        live = []  # (atime, size, path)
+
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+                if name.endswith(".tmp"):
+                    # Left behind by a writer that died mid-write.
+                    if st.st_mtime < now - 3600:
+                        _remove(path)
+                elif name.endswith(".json"):
+                    if st.st_mtime + self.ttl_seconds < now:
+                        _remove(path)
+                        self.stats["expired"] += 1
+                    else:
+                        live.append((st.st_atime, st.st_size, path))
+
+        total = sum(size for _, size, _ in live)
+        count = len(live)
+        live.sort()
+        for _, size, path in live:
+            over_bytes = self.max_bytes and total > self.max_bytes
+            over_entries = self.max_entries and count > self.max_entries
+            if not (over_bytes or over_entries):
+                break
+            _remove(path)
+            total -= size
+            count -= 1
+            self.stats["evicted"] += 1
+
+        self.stats.update(sweeps=self.stats["sweeps"] + 1, bytes=total, entries=count)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# ============================================================
+# 🔹 Two-tier cache
+# ============================================================
+
+class TwoTierCache:
+    """Memory LRU in front of an optional shared disk tier, with counters."""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600,
+        disk_dir: Optional[str] = None,
+        disk_ttl_seconds: Optional[float] = None,
+        disk_max_bytes: int = 0,
+        disk_max_entries: int = 0,
+        disk_sweep_interval: float = 600,
+    ):
+        self.name = name
+        self.memory = MemoryCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.disk = (
+            DiskCache(
+                disk_dir,
+                ttl_seconds=disk_ttl_seconds or ttl_seconds,
+                max_bytes=disk_max_bytes,
+                max_entries=disk_max_entries,
+                sweep_interval=disk_sweep_interval,
+            )
+            if disk_dir else None
+        )
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.stats["disk_hits"] += 1
+                self.memory.set(key, value)
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        self.stats["sets"] += 1
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = (
+            self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        )
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        snapshot = {
+            **self.stats,
+            "memory_entries": len(self.memory),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+        if self.disk is not None:
+            snapshot["disk"] = dict(self.disk.stats)
+        return snapshot
+
+
+def versioned_cache_dir(root: Optional[str], version: str) -> Optional[str]:
+    """
+    `root/version`, purging sibling directories left by other versions so
+    entries produced under an old prompt/model are never served again.
+    """
+    if not root:
+        return None
+
+    os.makedirs(root, exist_ok=True)
+    for name in os.listdir(root):
+        if name != version:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    return os.path.join(root, version)
@@ -1,6 +1,290 @@
+# backend/services/db_service.py
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from utils.canonical import canonical_hash
+from utils.json_patch import apply_patches, diff
+
+
+# ============================================================
+# 🔹 SQLite project store with delta-encoded scene history
+# ============================================================
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL,
+    head_revision INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revisions (
+    project_id TEXT NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    number INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    body TEXT NOT NULL,
+    scene_hash TEXT NOT NULL,
+    render_hash TEXT,
+    message TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (project_id, number)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS revisions_render ON revisions (render_hash);
+"""
+
+
+class ProjectNameTaken(Exception):
+    def __init__(self, name: str):
+        super().__init__(f"A project named {name!r} already exists.")
+        self.name = name
+
+
 class DBService:
-    def __init__(self):
-        pass
+    """
+    Projects hold their current scene (`data`) plus a revision history.
+
+    Revision 1 and every PROJECT_SNAPSHOT_INTERVAL-th revision store the full
+    scene; the rest store only the JSON-pointer patches from the previous
+    revision. Checking out revision n replays at most interval - 1 deltas
+    on top of the nearest snapshot, and the head is read straight from
+    `projects.data`.
+
+    Like JobQueue, every method opens its own connection so one instance can
+    be shared by threads and by the API and worker processes.
+    """
+
+    def __init__(self, path: str, snapshot_interval: int = 25):
+        self.path = path
+        self.snapshot_interval = max(1, snapshot_interval)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    # ---------------------------------------------------------
+    # Projects
+    # ---------------------------------------------------------
+    def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return self._project(row) if row else None
+
+    def find_project(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM projects WHERE name = ?", (name,)).fetchone()
+        return self._project(row) if row else None
+
+    def list_projects(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, name, head_revision, created_at, updated_at FROM projects"
+                " ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_project(self, project) -> Dict[str, Any]:
+        """
+        Create or update a project and commit its `data` as a new revision
+        when the scene changed. With an id, that project is updated (or
+        created under the id if unknown); without one, the project is looked
+        up by name. Raises ProjectNameTaken when renaming onto, or racing to
+        create, a name another project holds.
+        """
+        try:
+            project_id = self._upsert_project(project)
+        except sqlite3.IntegrityError:
+            raise ProjectNameTaken(project.name) from None
+
+        self.commit(
+            project_id,
+            project.data,
+            render_hash=getattr(project, "render_hash", None),
+            message=getattr(project, "message", None),
+        )
+        return self.get_project(project_id)
+
+    def _upsert_project(self, project) -> str:
+        # An explicit id never falls back to the name: that could re-target
+        # the save at a different project that happens to share it.
+        if project.id:
+            existing = self.get_project(project.id)
+        else:
+            existing = self.find_project(project.name)
+
+        if existing is None:
+            project_id = project.id or uuid.uuid4().hex
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO projects (id, name, data, created_at, updated_at)"
+                    " VALUES (?, ?, '{}', ?, ?)",
+                    (project_id, project.name, now, now),
+                )
+        else:
+            project_id = existing["id"]
+            if existing["name"] != project.name:
+                with self._connect() as conn:
+                    conn.execute(
+                        "UPDATE projects SET name = ?, updated_at = ? WHERE id = ?",
+                        (project.name, time.time(), project_id),
+                    )
+        return project_id
+
+    def delete_project(self, project_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM projects WHERE id = ?", (project_id,)).rowcount > 0
+
+    # ---------------------------------------------------------
+    # Revisions
+    # ---------------------------------------------------------
+    def commit(
+        self,
+        project_id: str,
+        scene: Dict[str, Any],
+        render_hash: Optional[str] = None,
+        message: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Append `scene` as the next revision. Committing the head scene again
+        adds nothing (it only fills in a missing render_hash) and returns
+        the head revision.
+        """
+        scene_hash = canonical_hash(scene)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT data, head_revision FROM projects WHERE id = ?", (project_id,)
+                ).fetchone()
+                if row is None:
+                    raise KeyError(project_id)
+
+                head = row["head_revision"]
+                head_row = conn.execute(
+                    "SELECT scene_hash, render_hash FROM revisions"
+                    " WHERE project_id = ? AND number = ?",
+                    (project_id, head),
+                ).fetchone()
+
+                if head_row is not None and head_row["scene_hash"] == scene_hash:
+                    if render_hash and not head_row["render_hash"]:
+                        conn.execute(
+                            "UPDATE revisions SET render_hash = ?"
+                            " WHERE project_id = ? AND number = ?",
+                            (render_hash, project_id, head),
+                        )
+                    conn.execute("COMMIT")
+                    return self.revision(project_id, head)
+
+                number = head + 1
+                if number == 1 or (number - 1) % self.snapshot_interval == 0:
+                    kind, body = "snapshot", scene
+                else:
+                    kind, body = "delta", diff(json.loads(row["data"]), scene)
+
+                conn.execute(
+                    "INSERT INTO revisions (project_id, number, kind, body, scene_hash,"
+                    " render_hash, message, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (project_id, number, kind, json.dumps(body), scene_hash,
+                     render_hash, message, now),
+                )
+                conn.execute(
+                    "UPDATE projects SET data = ?, head_revision = ?, updated_at = ?"
+                    " WHERE id = ?",
+                    (json.dumps(scene), number, now, project_id),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return self.revision(project_id, number)
+
+    def revision(self, project_id: str, number: int) -> Optional[Dict[str, Any]]:
+        """Revision metadata (no scene body)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT project_id, number, kind, scene_hash, render_hash, message, created_at"
+                " FROM revisions WHERE project_id = ? AND number = ?",
+                (project_id, number),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def history(
+        self,
+        project_id: str,
+        limit: int = 100,
+        before: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Newest-first revision metadata, paged with `before`."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT project_id, number, kind, scene_hash, render_hash, message, created_at"
+                " FROM revisions WHERE project_id = ? AND number < ?"
+                " ORDER BY number DESC LIMIT ?",
+                (project_id, before if before is not None else 2 ** 62, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def checkout(self, project_id: str, number: int) -> Optional[Dict[str, Any]]:
+        """The scene as of revision `number`, or None if it doesn't exist."""
+        with self._connect() as conn:
+            project = conn.execute(
+                "SELECT data, head_revision FROM projects WHERE id = ?", (project_id,)
+            ).fetchone()
+            if project is None or not 1 <= number <= project["head_revision"]:
+                return None
+            if number == project["head_revision"]:
+                return json.loads(project["data"])
+
+            rows = conn.execute(
+                "SELECT kind, body FROM revisions WHERE project_id = ? AND number <= ?"
+                " AND number >= (SELECT MAX(number) FROM revisions"
+                "   WHERE project_id = ? AND number <= ? AND kind = 'snapshot')"
+                " ORDER BY number",
+                (project_id, number, project_id, number),
+            ).fetchall()
+
+        scene = None
+        for row in rows:
+            body = json.loads(row["body"])
+            scene = body if row["kind"] == "snapshot" else apply_patches(scene, body)[0]
+        return scene
+
+    def find_by_render(self, render_hash: str) -> List[Dict[str, Any]]:
+        """Every revision (across projects) that was rendered as `render_hash`."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT project_id, number, kind, scene_hash, render_hash, message, created_at"
+                " FROM revisions WHERE render_hash = ? ORDER BY created_at",
+                (render_hash,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _project(row: sqlite3.Row) -> Dict[str, Any]:
+        project = dict(row)
+        project["data"] = json.loads(project["data"])
+        return project
+
 
-    def save_project(self, project):
-        return True
+@lru_cache(maxsize=None)
+def get_db() -> DBService:
+    return DBService(settings.PROJECTS_DB_PATH, settings.PROJECT_SNAPSHOT_INTERVAL)
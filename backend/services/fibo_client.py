@@ -1,10 +1,10 @@
 # backend/services/fibo_client.py
-import requests
 from config.settings import settings
+from services.http_client import get_http_client
 
 BRIA_FIBO_URL = "https://api.bria.ai/v1/image/generate"
 
-def generate_image(json_prompt: dict):
+async def generate_image(json_prompt: dict):
     """Generate an image using BRIA FIBO model."""
     headers = {
         "Authorization": f"Bearer {settings.BRIA_API_KEY}",
@@ -18,7 +18,7 @@ def generate_image(json_prompt: dict):
         "aspect_ratio": "16:9"
     }
 
-    res = requests.post(BRIA_FIBO_URL, json=payload, headers=headers)
+    res = await get_http_client().post(BRIA_FIBO_URL, json=payload, headers=headers)
 
     if res.status_code != 200:
         raise Exception(f"BRIA FIBO error: {res.text}")
@@ -0,0 +1,66 @@
+# backend/services/http_client.py
+
+from typing import TYPE_CHECKING, Optional
+
+from config.settings import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+
+# ============================================================
+# 🔹 Shared pooled AsyncClient (application lifetime)
+# ============================================================
+
+_client: Optional["httpx.AsyncClient"] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> "httpx.AsyncClient":
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.HTTP_CONNECT_TIMEOUT,
+        read=settings.HTTP_READ_TIMEOUT,
+        write=settings.HTTP_WRITE_TIMEOUT,
+        pool=settings.HTTP_POOL_TIMEOUT,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=settings.HTTP2_ENABLED and _http2_available(),
+    )
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    """
+    Return the shared client. Created lazily (httpx is only imported here)
+    so scripts and the worker can use services without FastAPI startup.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def startup():
+    get_http_client()
+
+
+async def shutdown():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,235 @@
+# backend/services/image_cache.py
+
+import asyncio
+import copy
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import settings
+from services.cache_service import TwoTierCache, versioned_cache_dir
+from services.vlm_client import (
+    GEMINI_IMAGE_MODEL,
+    IMAGE_ANALYSIS_PROMPT,
+    image_bytes_to_json_async,
+)
+from utils.deadline import within_deadline, without_deadline
+from utils.singleflight import SingleFlight
+
+
+# ============================================================
+# 🔹 Image → JSON analysis cache
+# ============================================================
+
+ANALYSIS_VERSION = hashlib.sha256(
+    f"{GEMINI_IMAGE_MODEL}\n{IMAGE_ANALYSIS_PROMPT}".encode("utf-8")
+).hexdigest()[:16]
+
+
+def content_key(img_bytes: bytes) -> str:
+    return hashlib.sha256(img_bytes).hexdigest()
+
+
+def dhash(img_bytes: bytes, hash_size: int = 8) -> Optional[int]:
+    """
+    64-bit difference hash. Survives re-encoding and resizing, so the same
+    reference photo uploaded as PNG or as a smaller JPEG maps to (nearly)
+    the same value. Returns None if Pillow is missing or decoding fails.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(io.BytesIO(img_bytes)) as img:
+            # JPEG: let the decoder skip straight to a small DCT scale.
+            img.draft("L", (hash_size * 8, hash_size * 8))
+            small = img.convert("L").resize((hash_size + 1, hash_size))
+    except Exception:
+        return None
+
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+class PerceptualIndex:
+    """
+    Bounded map of perceptual hash → content key, persisted as an append-only
+    `hash key` line file that other processes' additions are re-read from.
+
+    Once the file holds more than twice `max_entries` lines it is compacted:
+    rewritten (temp file + os.replace) with the entries held in memory,
+    minus those whose analysis is no longer `live` in the cache. Other
+    processes notice the replaced file and re-read it from the start.
+    Concurrent compactions may drop each other's latest additions, which
+    only costs a near-duplicate hit.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        max_entries: int = 4096,
+        live: Optional[Callable[[str], bool]] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.live = live
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._offset = 0
+        self._lines = 0
+        self._inode: Optional[int] = None
+        self._lock = threading.Lock()
+        self._refresh()
+
+    def _remember(self, key: str, phash: int):
+        self._entries[key] = phash
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _refresh(self):
+        if not self.path:
+            return
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # First read, or another process compacted the file.
+            self._inode, self._offset, self._lines = st.st_ino, 0, 0
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # another process is mid-write
+                self._offset += len(line.encode("utf-8"))
+                self._lines += 1
+                try:
+                    phash, key = line.split()
+                    self._remember(key, int(phash, 16))
+                except ValueError:
+                    continue
+
+    def add(self, key: str, phash: int):
+        with self._lock:
+            self._remember(key, phash)
+
+            if self.path:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(f"{phash:016x} {key}\n")
+                self._lines += 1
+
+                if self._lines > 2 * self.max_entries:
+                    self._compact()
+
+    def _compact(self):
+        self._refresh()
+        if self.live is not None:
+            for key in [k for k in self._entries if not self.live(k)]:
+                del self._entries[key]
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{phash:016x} {key}\n" for key, phash in self._entries.items())
+        os.replace(tmp_path, self.path)
+
+        st = os.stat(self.path)
+        self._inode, self._offset, self._lines = st.st_ino, st.st_size, len(self._entries)
+
+    def nearest(self, phash: int, max_distance: int) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+
+            best_key, best_distance = None, max_distance + 1
+            for key, other in self._entries.items():
+                distance = (phash ^ other).bit_count()
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+                    if distance == 0:
+                        break
+            return best_key
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_disk_dir = versioned_cache_dir(settings.IMAGE_CACHE_DIR, ANALYSIS_VERSION)
+
+image_cache = TwoTierCache(
+    "images",
+    max_entries=settings.IMAGE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.IMAGE_CACHE_TTL_SECONDS,
+    disk_dir=_disk_dir,
+    disk_max_bytes=settings.IMAGE_CACHE_DISK_MAX_BYTES,
+    disk_sweep_interval=settings.DISK_CACHE_SWEEP_SECONDS,
+)
+
+perceptual_index = PerceptualIndex(
+    os.path.join(_disk_dir, "phash.index") if _disk_dir else None,
+    max_entries=settings.IMAGE_CACHE_MAX_ENTRIES,
+    live=image_cache.disk.contains if image_cache.disk else None,
+)
+
+near_duplicate_stats = {"hits": 0}
+
+analysis_flight = SingleFlight("image_analysis")
+
+
+async def cached_image_bytes_to_json(img_bytes: bytes, mime_type: str = "image/jpeg") -> Dict[str, Any]:
+    """
+    image_bytes_to_json_async behind an exact content-hash lookup, then a
+    perceptual near-duplicate lookup within IMAGE_CACHE_PHASH_DISTANCE bits.
+    """
+    key = content_key(img_bytes)
+
+    if not settings.IMAGE_CACHE_ENABLED:
+        async with within_deadline("image_analysis"):
+            result = await analysis_flight.do(
+                key, without_deadline(lambda: image_bytes_to_json_async(img_bytes, mime_type=mime_type))
+            )
+        return copy.deepcopy(result)
+
+    cached = image_cache.get(key)
+    if cached is None:
+        async with within_deadline("image_analysis"):
+            cached = await analysis_flight.do(
+                key, without_deadline(lambda: _analyze_and_store(key, img_bytes, mime_type))
+            )
+
+    return copy.deepcopy(cached)
+
+
+async def _analyze_and_store(key: str, img_bytes: bytes, mime_type: str) -> Dict[str, Any]:
+    phash = await asyncio.to_thread(dhash, img_bytes)
+
+    if phash is not None:
+        # File re-reads, compaction and the O(N) scan stay off the event loop.
+        near_key = await asyncio.to_thread(
+            perceptual_index.nearest, phash, settings.IMAGE_CACHE_PHASH_DISTANCE
+        )
+        cached = image_cache.get(near_key) if near_key else None
+        if cached is not None:
+            near_duplicate_stats["hits"] += 1
+            image_cache.set(key, cached)
+            return cached
+
+    result = await image_bytes_to_json_async(img_bytes, mime_type=mime_type)
+
+    image_cache.set(key, result)
+    if phash is not None:
+        await asyncio.to_thread(perceptual_index.add, key, phash)
+
+    return result
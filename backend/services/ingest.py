@@ -0,0 +1,153 @@
+# backend/services/ingest.py
+
+import asyncio
+import io
+from typing import IO, TYPE_CHECKING, NamedTuple, Optional
+
+from config.settings import settings
+from utils.logger import logger
+from utils.metrics import Counter, span
+
+if TYPE_CHECKING:
+    from fastapi import UploadFile
+
+
+# ============================================================
+# 🔹 Reference-image ingestion (before the VLM call)
+# ============================================================
+# Uploads reach the handlers already spooled to disk by Starlette (above
+# 1 MB) and capped by UploadLimit while streaming. Here they are decoded
+# at reduced scale and re-encoded to at most INGEST_MAX_EDGE, so Gemini
+# gets a few hundred KB instead of a 20 MB photo and no request holds the
+# full upload (or its base64) in memory.
+
+# Formats Gemini accepts as inline image data, sent as-is when small enough.
+PASSTHROUGH_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+INGEST_BYTES = Counter(
+    "studio_ingest_bytes_total", "Reference image bytes, as uploaded and as sent on.", ("stage",)
+)
+INGEST_REJECTED = Counter(
+    "studio_ingest_rejected_total", "Uploads refused by ingestion.", ("reason",)
+)
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, reason: str, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+
+
+class IngestedImage(NamedTuple):
+    data: bytes
+    mime_type: str
+    original_bytes: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    reencoded: bool = False
+
+    @property
+    def bytes_saved(self) -> int:
+        return max(0, self.original_bytes - len(self.data))
+
+
+def _reject(status_code: int, reason: str, detail: str):
+    INGEST_REJECTED.inc(reason=reason)
+    raise UploadRejected(status_code, reason, detail)
+
+
+def _file_size(f: IO[bytes]) -> int:
+    f.seek(0, io.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    return size
+
+
+def prepare_image(f: IO[bytes], mime_type: Optional[str] = None) -> IngestedImage:
+    """
+    Decode `f` (any seekable file) and return what should be sent to the
+    VLM: the original bytes when they are already a small JPEG/PNG/WebP,
+    otherwise a JPEG whose longer edge is at most INGEST_MAX_EDGE.
+
+    JPEGs are decoded straight at a reduced DCT scale (`draft`), then
+    `reduce` box-downsamples by an integer factor before the final
+    LANCZOS resize, so a 24 MP photo is never fully expanded in memory.
+    """
+    size = _file_size(f)
+    if size > settings.INGEST_MAX_UPLOAD_BYTES:
+        _reject(413, "too_large", f"Image exceeds {settings.INGEST_MAX_UPLOAD_BYTES} bytes.")
+    if size == 0:
+        _reject(422, "empty", "Image upload is empty.")
+
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return IngestedImage(f.read(), mime_type or "image/jpeg", size)
+
+    max_edge = settings.INGEST_MAX_EDGE
+
+    try:
+        with Image.open(f) as img:
+            width, height = img.size
+            if width * height > settings.INGEST_MAX_PIXELS:
+                _reject(413, "too_many_pixels", f"Image exceeds {settings.INGEST_MAX_PIXELS} pixels.")
+
+            if (
+                img.format in PASSTHROUGH_TYPES
+                and max(width, height) <= max_edge
+                and size <= settings.INGEST_PASSTHROUGH_BYTES
+            ):
+                f.seek(0)
+                return IngestedImage(f.read(), PASSTHROUGH_TYPES[img.format], size, width, height)
+
+            img.draft("RGB", (max_edge, max_edge))
+            img = ImageOps.exif_transpose(img)
+
+            factor = max(img.size) // max_edge
+            if factor >= 2:
+                img = img.reduce(factor)
+            if max(img.size) > max_edge:
+                img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=settings.INGEST_JPEG_QUALITY, optimize=True)
+    except UploadRejected:
+        raise
+    except Exception:
+        _reject(415, "undecodable", "Unsupported or corrupt image.")
+
+    return IngestedImage(out.getvalue(), "image/jpeg", size, *img.size, reencoded=True)
+
+
+def _record(image: IngestedImage):
+    INGEST_BYTES.inc(image.original_bytes, stage="received")
+    INGEST_BYTES.inc(len(image.data), stage="sent")
+    if image.reencoded:
+        logger.info(
+            "ingested image",
+            extra={"fields": {
+                "original_bytes": image.original_bytes,
+                "sent_bytes": len(image.data),
+                "bytes_saved": image.bytes_saved,
+                "size": f"{image.width}x{image.height}",
+            }},
+        )
+
+
+async def ingest_upload(upload: "UploadFile") -> IngestedImage:
+    """prepare_image on an UploadFile's (spooled) file, off the event loop."""
+    with span("ingest"):
+        image = await asyncio.to_thread(prepare_image, upload.file, upload.content_type)
+    _record(image)
+    return image
+
+
+async def ingest_bytes(data: bytes, mime_type: Optional[str] = None) -> IngestedImage:
+    """Same for bytes already in memory (e.g. a job's base64 payload)."""
+    with span("ingest"):
+        image = await asyncio.to_thread(prepare_image, io.BytesIO(data), mime_type)
+    _record(image)
+    return image
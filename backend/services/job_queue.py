@@ -0,0 +1,255 @@
+# backend/services/job_queue.py
+
+import json
+import os
+import random
+import sqlite3
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+
+# ============================================================
+# 🔹 SQLite-backed durable job queue
+# ============================================================
+
+# Payload fields each kind's worker handler reads, with their JSON types.
+JOB_FIELDS = {
+    "generate": {"structured_json": dict},
+    "refine": {"structured_json": dict, "instruction": str},
+    "inspire": {"image_b64": str},
+}
+JOB_KINDS = tuple(JOB_FIELDS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    run_after REAL NOT NULL,
+    lease_expires REAL,
+    lease_token TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_after);
+"""
+
+
+class JobQueue:
+    """
+    Jobs move queued → running → succeeded | failed. A running job holds a
+    lease, identified by the `lease_token` handed out by `claim`, which its
+    worker renews while it works; if the worker dies the lease expires and
+    another worker picks the job up. `renew`, `complete` and `fail` only
+    act on a job still leased under the caller's token, so a worker that
+    lost its lease cannot overwrite the new holder's outcome. Failed
+    attempts are re-queued with exponential backoff until `max_attempts`
+    is reached; permanent failures are not retried.
+
+    Every method opens its own connection, so one instance can be shared by
+    threads (asyncio.to_thread) and several processes can share the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "lease_token" not in columns:  # queue files from before lease tokens
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_token TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ---------------------------------------------------------
+    # Producer side
+    # ---------------------------------------------------------
+    def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Enqueue a job, or return the existing one for a repeated key.
+        Raises ValueError for an unknown kind, a payload missing a field its
+        handler needs, or max_attempts < 1; max_attempts is capped at
+        JOBS_MAX_ATTEMPTS_LIMIT.
+        """
+        if kind not in JOB_FIELDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        for field, expected in JOB_FIELDS[kind].items():
+            if not isinstance(payload.get(field), expected):
+                raise ValueError(f"A {kind} job needs payload.{field} ({expected.__name__}).")
+        if max_attempts is not None and max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+        max_attempts = min(max_attempts or settings.JOBS_MAX_ATTEMPTS, settings.JOBS_MAX_ATTEMPTS_LIMIT)
+
+        now = time.time()
+        job_id = uuid.uuid4().hex
+
+        with self._connect() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, payload, status, max_attempts,"
+                    " idempotency_key, run_after, created_at, updated_at)"
+                    " VALUES (?, ?, ?, 'queued', ?, ?, ?, ?, ?)",
+                    (
+                        job_id, kind, json.dumps(payload),
+                        max_attempts,
+                        idempotency_key, now, now, now,
+                    ),
+                )
+            except sqlite3.IntegrityError:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                return self._to_dict(row)
+
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    # ---------------------------------------------------------
+    # Worker side
+    # ---------------------------------------------------------
+    def claim(self, lease_seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take the oldest runnable job (or one with a dead lease).
+        The returned job carries the `lease_token` the other worker-side
+        calls need. A dead lease on a job that has used up its attempts
+        (its worker crashed or hung every time) fails the job instead.
+        """
+        now = time.time()
+        lease = lease_seconds or settings.JOBS_LEASE_SECONDS
+        lease_token = uuid.uuid4().hex
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed',"
+                    " error = 'Lease expired after ' || attempts || ' attempts',"
+                    " lease_expires = NULL, lease_token = NULL, updated_at = ?"
+                    " WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                    (now, now),
+                )
+                row = conn.execute(
+                    "SELECT id FROM jobs"
+                    " WHERE (status = 'queued' AND run_after <= ?)"
+                    "    OR (status = 'running' AND lease_expires < ?)"
+                    " ORDER BY run_after LIMIT 1",
+                    (now, now),
+                ).fetchone()
+
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1,"
+                    " lease_expires = ?, lease_token = ?, updated_at = ? WHERE id = ?",
+                    (now + lease, lease_token, now, row["id"]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return self.get(row["id"])
+
+    def renew(self, job_id: str, lease_token: str, lease_seconds: Optional[float] = None) -> bool:
+        """Extend a running job's lease. False if the lease was lost."""
+        now = time.time()
+        lease = lease_seconds or settings.JOBS_LEASE_SECONDS
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ?"
+                " WHERE id = ? AND status = 'running' AND lease_token = ?",
+                (now + lease, now, job_id, lease_token),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, lease_token: str, result: Dict[str, Any]) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL,"
+                " lease_expires = NULL, lease_token = NULL, updated_at = ?"
+                " WHERE id = ? AND status = 'running' AND lease_token = ?",
+                (json.dumps(result), time.time(), job_id, lease_token),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, lease_token: str, error: str, permanent: bool = False) -> bool:
+        """
+        Re-queue with backoff, or mark failed once attempts are used up or
+        when the error is `permanent` (retrying cannot help).
+        """
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                job = conn.execute(
+                    "SELECT attempts, max_attempts FROM jobs"
+                    " WHERE id = ? AND status = 'running' AND lease_token = ?",
+                    (job_id, lease_token),
+                ).fetchone()
+
+                if job is None:
+                    conn.execute("COMMIT")
+                    return False
+
+                if not permanent and job["attempts"] < job["max_attempts"]:
+                    delay = min(
+                        settings.JOBS_RETRY_BASE_DELAY * 2 ** (job["attempts"] - 1),
+                        settings.JOBS_RETRY_MAX_DELAY,
+                    )
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', error = ?, run_after = ?,"
+                        " lease_expires = NULL, lease_token = NULL, updated_at = ? WHERE id = ?",
+                        (error, now + delay * random.uniform(0.5, 1.0), now, job_id),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?,"
+                        " lease_expires = NULL, lease_token = NULL, updated_at = ? WHERE id = ?",
+                        (error, now, job_id),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return True
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+@lru_cache(maxsize=None)
+def get_job_queue() -> JobQueue:
+    return JobQueue(settings.JOBS_DB_PATH)
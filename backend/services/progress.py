@@ -0,0 +1,95 @@
+# backend/services/progress.py
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Set
+
+from utils.logger import request_id_var
+from utils.metrics import Counter
+
+
+# ============================================================
+# 🔹 Render progress events, pushed over /ws/progress
+# ============================================================
+
+# Extra fields stamped on every event published from the current task,
+# e.g. {"index": 2, "shot": "hero"} inside one multi-shot render.
+progress_fields: ContextVar[Dict[str, Any]] = ContextVar("progress_fields", default={})
+
+PROGRESS_EVENTS = Counter(
+    "studio_progress_events_total", "Progress events published, by event.", ("event",)
+)
+
+
+class ProgressHub:
+    """
+    Fan-out of progress events keyed by request id (X-Request-ID).
+
+    A WebSocket connection owns one queue and may subscribe it to many ids,
+    so any number of renders share one socket. The last `history` events of
+    recent ids are kept, and replayed on subscribe, so a client that opens
+    the socket after starting a render still sees everything.
+    """
+
+    def __init__(self, history: int = 64, max_ids: int = 4096, queue_size: int = 256):
+        self.history = history
+        self.max_ids = max_ids
+        self.queue_size = queue_size
+        self._recent: "OrderedDict[str, deque]" = OrderedDict()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.connections = 0
+
+    def new_queue(self) -> asyncio.Queue:
+        return asyncio.Queue(maxsize=self.queue_size)
+
+    def publish(self, event: str, **data):
+        request_id = request_id_var.get()
+        if request_id == "-":
+            return
+
+        message = {
+            "request_id": request_id,
+            "event": event,
+            "ts": round(time.time(), 3),
+            **progress_fields.get(),
+            **data,
+        }
+        PROGRESS_EVENTS.inc(event=event)
+
+        recent = self._recent.get(request_id)
+        if recent is None:
+            recent = self._recent[request_id] = deque(maxlen=self.history)
+            while len(self._recent) > self.max_ids:
+                self._recent.popitem(last=False)
+        else:
+            self._recent.move_to_end(request_id)
+        recent.append(message)
+
+        for queue in self._subscribers.get(request_id, ()):
+            if queue.full():
+                queue.get_nowait()  # slow reader: drop its oldest event
+            queue.put_nowait(message)
+
+    def subscribe(self, request_id: str, queue: asyncio.Queue) -> List[Dict[str, Any]]:
+        """Register `queue` for `request_id`; returns the events so far."""
+        self._subscribers.setdefault(request_id, set()).add(queue)
+        return list(self._recent.get(request_id, ()))
+
+    def unsubscribe(self, request_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(request_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[request_id]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "connections": self.connections,
+            "subscribed_ids": len(self._subscribers),
+            "recent_ids": len(self._recent),
+        }
+
+
+progress = ProgressHub()
@@ -0,0 +1,130 @@
+# backend/services/render_service.py
+
+import copy
+from typing import Any, Dict, Optional
+
+import orjson
+
+from config.settings import settings
+from services.cache_service import TwoTierCache
+from services.progress import progress
+from services.storage_service import media_store
+from services.vlm_client import generate_image_and_wait
+from utils.canonical import canonical_hash
+from utils.deadline import within_deadline, without_deadline
+from utils.metrics import span
+from utils.singleflight import SingleFlight
+from utils.validators import ensure_valid_scene
+
+
+# ============================================================
+# 🔹 Result cache — fixed structured prompt → Bria result
+# ============================================================
+
+result_cache = TwoTierCache(
+    "results",
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+    disk_dir=settings.RESULT_CACHE_DIR or None,
+    disk_max_bytes=settings.RESULT_CACHE_DISK_MAX_BYTES,
+    disk_sweep_interval=settings.DISK_CACHE_SWEEP_SECONDS,
+)
+
+# Every rendered scene by its hash, so clients can refine by reference
+# (see /refine/patch) instead of resending the whole document.
+scene_store = TwoTierCache(
+    "scenes",
+    max_entries=settings.SCENE_STORE_MAX_ENTRIES,
+    ttl_seconds=settings.SCENE_STORE_TTL_SECONDS,
+    disk_dir=settings.SCENE_STORE_DIR or None,
+    disk_max_bytes=settings.SCENE_STORE_DISK_MAX_BYTES,
+    disk_sweep_interval=settings.DISK_CACHE_SWEEP_SECONDS,
+)
+
+# Identical scenes submitted concurrently share one Bria job.
+render_flight = SingleFlight("renders")
+
+
+async def _render_uncached(key: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    result = await generate_image_and_wait(body)
+
+    if settings.RESULT_CACHE_ENABLED:
+        result_cache.set(key, {
+            "image_url": result["image_url"],
+            "request_id": result.get("request_id"),
+            "metadata": result.get("metadata"),
+        })
+
+    return result
+
+
+def remember_scene(key: str, fixed_json: Dict[str, Any]):
+    if scene_store.memory.get(key) is None:
+        scene_store.set(key, copy.deepcopy(fixed_json))
+
+
+def media_url(scene_hash: str, image_url: str) -> Optional[str]:
+    """
+    Stable /media URL for a render; the first call starts copying Bria's
+    (expiring) image into the local media store in the background.
+    """
+    if not settings.MEDIA_STORE_ENABLED or not image_url:
+        return None
+    media_store.schedule(image_url, scene_hash)
+    return f"/media/scenes/{scene_hash}"
+
+
+def load_scene(scene_hash: str) -> Optional[Dict[str, Any]]:
+    scene = scene_store.get(scene_hash)
+    return copy.deepcopy(scene) if scene is not None else None
+
+
+async def render_scene(
+    fixed_json: Dict[str, Any],
+    params: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Render an auto-fixed scene through Bria, reusing a previous result when
+    the canonical hash of (scene, params) has already been rendered.
+
+    `params` are any extra Bria generation parameters sent alongside the
+    structured prompt; they are part of the cache key.
+
+    Raises SceneValidationError before any network call if the scene does
+    not match schemas/fibo_json_schema.json, and DeadlineExceeded when the
+    request deadline passes first (the shared Bria job is cancelled once
+    no caller waits for it). Publishes a "completed" or
+    "failed" progress event for the scene.
+    """
+    with span("validate"):
+        ensure_valid_scene(fixed_json)
+    with span("canonical_hash"):
+        key = canonical_hash(fixed_json, params)
+    remember_scene(key, fixed_json)
+
+    if settings.RESULT_CACHE_ENABLED:
+        cached = result_cache.get(key)
+        if cached is not None:
+            return _completed({**cached, "cached": True}, key)
+
+    body = {**(params or {}), "structured_prompt": orjson.dumps(fixed_json).decode()}
+    try:
+        async with within_deadline("render"):
+            result = await render_flight.do(key, without_deadline(lambda: _render_uncached(key, body)))
+    except Exception as e:
+        progress.publish("failed", scene_hash=key, error=str(e))
+        raise
+
+    return _completed({**result, "cached": False}, key)
+
+
+def _completed(result: Dict[str, Any], key: str) -> Dict[str, Any]:
+    result = {**result, "scene_hash": key, "media_url": media_url(key, result["image_url"])}
+    progress.publish(
+        "completed",
+        scene_hash=key,
+        image_url=result["image_url"],
+        media_url=result["media_url"],
+        cached=result["cached"],
+    )
+    return result
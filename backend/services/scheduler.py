@@ -0,0 +1,178 @@
+# backend/services/scheduler.py
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+from utils.metrics import Histogram
+
+
+# ============================================================
+# 🔹 Priority lanes for outbound Bria / Gemini capacity
+# ============================================================
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# Set per request (header or endpoint default) and inherited by every task
+# the request spawns, so outbound calls don't need a lane argument.
+current_lane: ContextVar[str] = ContextVar("current_lane", default=INTERACTIVE)
+
+SLOT_WAIT_SECONDS = Histogram(
+    "studio_scheduler_wait_seconds",
+    "Time spent queued for an outbound slot.",
+    ("scheduler", "lane"),
+)
+
+
+class _Lane:
+    def __init__(self, name: str, max_concurrency: int, weight: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.weight = weight
+        self.waiters: "deque[asyncio.Future]" = deque()
+        self.in_flight = 0
+        self.virtual_time = 0.0
+        self.granted = 0
+        self.wait_seconds_total = 0.0
+        self.recent_waits: "deque[float]" = deque(maxlen=512)
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sorted(self.recent_waits)
+
+        def pct(p):
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 4) if waits else 0.0
+
+        return {
+            "queue_depth": len(self.waiters),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "weight": self.weight,
+            "granted": self.granted,
+            "wait_seconds_total": round(self.wait_seconds_total, 4),
+            "wait_p50": pct(0.50),
+            "wait_p95": pct(0.95),
+        }
+
+
+class PriorityScheduler:
+    """
+    Admission control for one upstream. At most `capacity` calls run at
+    once, each lane has its own cap, and when several lanes are waiting the
+    next free slot goes to the lane with the lowest virtual time (weighted
+    fair queuing: a lane with weight 4 gets ~4 slots per 1 of a weight-1 lane).
+    """
+
+    def __init__(self, name: str, capacity: int, lanes: Dict[str, tuple]):
+        self.name = name
+        self.capacity = capacity
+        self.lanes = {
+            lane: _Lane(lane, max_concurrency, weight)
+            for lane, (max_concurrency, weight) in lanes.items()
+        }
+        self.in_flight = 0
+        self._virtual_now = 0.0
+
+    def _eligible(self, lane: _Lane) -> bool:
+        return self.in_flight < self.capacity and lane.in_flight < lane.max_concurrency
+
+    def _activate(self, lane: _Lane):
+        # An idle lane doesn't bank credit: it restarts from the current clock
+        # when it gets work again. A waiting lane keeps its place.
+        lane.virtual_time = max(lane.virtual_time, self._virtual_now)
+
+    def _grant(self, lane: _Lane):
+        self.in_flight += 1
+        lane.in_flight += 1
+        lane.granted += 1
+        self._virtual_now = max(self._virtual_now, lane.virtual_time)
+        lane.virtual_time += 1 / lane.weight
+
+    def _dispatch(self):
+        while True:
+            ready = [
+                lane for lane in self.lanes.values()
+                if lane.waiters and self._eligible(lane)
+            ]
+            if not ready:
+                return
+
+            lane = min(ready, key=lambda l: l.virtual_time + 1 / l.weight)
+            future = lane.waiters.popleft()
+            if future.done():
+                continue
+
+            self._grant(lane)
+            future.set_result(None)
+
+    def _release(self, lane: _Lane):
+        self.in_flight -= 1
+        lane.in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane_name: Optional[str] = None):
+        lane = self.lanes.get(lane_name or current_lane.get()) or self.lanes[INTERACTIVE]
+        started = time.monotonic()
+
+        if not lane.waiters:
+            self._activate(lane)
+
+        if not lane.waiters and self._eligible(lane):
+            self._grant(lane)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            lane.waiters.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release(lane)  # granted just as we were cancelled
+                else:
+                    try:
+                        lane.waiters.remove(future)
+                    except ValueError:
+                        pass
+                raise
+
+        waited = time.monotonic() - started
+        lane.wait_seconds_total += waited
+        lane.recent_waits.append(waited)
+        SLOT_WAIT_SECONDS.observe(waited, scheduler=self.name, lane=lane.name)
+
+        try:
+            yield
+        finally:
+            self._release(lane)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "lanes": {name: lane.snapshot() for name, lane in self.lanes.items()},
+        }
+
+
+def _lanes(bulk_max_concurrency: int, capacity: int):
+    return {
+        INTERACTIVE: (capacity, settings.LANE_INTERACTIVE_WEIGHT),
+        BULK: (bulk_max_concurrency, settings.LANE_BULK_WEIGHT),
+    }
+
+
+bria_scheduler = PriorityScheduler(
+    "bria",
+    settings.BRIA_MAX_CONCURRENCY,
+    _lanes(settings.BRIA_BULK_MAX_CONCURRENCY, settings.BRIA_MAX_CONCURRENCY),
+)
+
+vlm_scheduler = PriorityScheduler(
+    "gemini",
+    settings.VLM_MAX_CONCURRENCY,
+    _lanes(settings.VLM_BULK_MAX_CONCURRENCY, settings.VLM_MAX_CONCURRENCY),
+)
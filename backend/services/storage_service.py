@@ -1,6 +1,363 @@
+# backend/services/storage_service.py
+
+import asyncio
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from config.settings import settings
+from services.http_client import get_http_client
+from utils.logger import logger
+from utils.metrics import span
+from utils.singleflight import SingleFlight
+
+
+# ============================================================
+# 🔹 Content-addressed media store (local disk)
+# ============================================================
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+_MAGIC = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+THUMBNAIL_MEDIA_TYPE = "image/webp"
+
+
+def is_digest(value: str) -> bool:
+    return bool(_DIGEST.match(value))
+
+
+def sniff_media_type(head: bytes) -> str:
+    for magic, media_type in _MAGIC:
+        if head.startswith(magic):
+            return media_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
 class StorageService:
-    def __init__(self):
-        pass
+    """
+    Blobs are stored once under their SHA-256, so the same render fetched
+    twice (or by two workers) takes one file:
+
+        blobs/ab/<digest>                 original bytes
+        thumbs/<size>/ab/<digest>.webp    longest edge <= size
+        refs/cd/<sha256(name)>            name (source URL, scene hash) → digest
+
+    Blobs never change, which is what lets /media serve them as immutable.
+
+    The store is capped at `max_total_bytes` (0 = unbounded): every
+    `sweep_interval` seconds a new blob starts a background sweep that
+    deletes the least recently served blobs, with their thumbnails, until
+    it is back under the cap. Refs to a deleted blob resolve to None, so
+    /media/scenes/{scene_hash} falls back to Bria's URL and re-downloads.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        thumbnail_sizes: Tuple[int, ...] = (256, 512),
+        max_bytes: int = 50 * 1024 * 1024,
+        download_concurrency: int = 4,
+        max_total_bytes: int = 0,
+        sweep_interval: float = 600,
+    ):
+        self.root = root
+        self.thumbnail_sizes = thumbnail_sizes
+        self.max_bytes = max_bytes
+        self.download_concurrency = max(1, download_concurrency)
+        self.max_total_bytes = max_total_bytes
+        self.sweep_interval = sweep_interval
+        self._refs: Dict[str, str] = {}
+        self._downloads = SingleFlight("media_downloads")
+        self._limiter: Optional[asyncio.Semaphore] = None
+        self._background: Set[asyncio.Task] = set()
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+        self.stats = {"stored": 0, "deduplicated": 0, "failed": 0, "bytes_stored": 0, "evicted": 0}
+
+    # ---------- paths ----------
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def thumbnail_path(self, digest: str, size: int) -> str:
+        return os.path.join(self.root, "thumbs", str(size), digest[:2], f"{digest}.webp")
+
+    def _ref_path(self, name: str) -> str:
+        key = hashlib.sha256(name.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, "refs", key[:2], key)
+
+    def has(self, digest: str) -> bool:
+        return is_digest(digest) and os.path.exists(self.blob_path(digest))
+
+    def media_type(self, digest: str) -> str:
+        with open(self.blob_path(digest), "rb") as f:
+            return sniff_media_type(f.read(16))
+
+    # ---------- refs ----------
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Digest stored under `name`, or None if it was never fetched."""
+        digest = self._refs.get(name)
+        if digest is not None and self.has(digest):
+            return digest
+
+        try:
+            with open(self._ref_path(name), "r", encoding="utf-8") as f:
+                digest = f.read().strip()
+        except OSError:
+            return None
+
+        if not self.has(digest):
+            return None
+        self._refs[name] = digest
+        return digest
+
+    def link(self, name: str, digest: str):
+        if self._refs.get(name) != digest:
+            _write_atomic(self._ref_path(name), digest.encode("ascii"))
+            self._refs[name] = digest
+
+    # ---------- writes ----------
+
+    def _commit(self, tmp_path: str, digest: str, size: int):
+        """Move a fully written temp file into place unless the blob exists."""
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            self.stats["deduplicated"] += 1
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        self.stats["stored"] += 1
+        self.stats["bytes_stored"] += size
+        self._maybe_sweep()
+
+    def _tmp_file(self):
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        return os.fdopen(fd, "wb"), tmp_path
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        if self.has(digest):
+            self.stats["deduplicated"] += 1
+            return digest
+
+        f, tmp_path = self._tmp_file()
+        with f:
+            f.write(data)
+        self._commit(tmp_path, digest, len(data))
+        return digest
+
+    def upload(self, path: str, data: bytes) -> Dict[str, Any]:
+        """Store `data`, remember it under `path`, and build its thumbnails."""
+        digest = self.put(data)
+        self.link(path, digest)
+        self.make_thumbnails(digest)
+        return {"url": f"/media/{digest}", "hash": digest}
+
+    # ---------- thumbnails ----------
+
+    def _render_thumbnail(self, digest: str, size: int):
+        from PIL import Image
+
+        with Image.open(self.blob_path(digest)) as img:
+            # JPEG: decode at a reduced DCT scale instead of full size.
+            img.draft("RGB", (size, size))
+            img.thumbnail((size, size))
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+            out = io.BytesIO()
+            img.save(out, "WEBP", quality=80, method=4)
+
+        _write_atomic(self.thumbnail_path(digest, size), out.getvalue())
+
+    def make_thumbnails(self, digest: str):
+        with span("media_thumbnails"):
+            for size in self.thumbnail_sizes:
+                if not os.path.exists(self.thumbnail_path(digest, size)):
+                    self._render_thumbnail(digest, size)
+
+    def thumbnail(self, digest: str, size: int) -> Optional[str]:
+        """Path of the `size` thumbnail (built on demand), or None."""
+        if size not in self.thumbnail_sizes or not self.has(digest):
+            return None
+
+        self.touch(digest)
+        path = self.thumbnail_path(digest, size)
+        if not os.path.exists(path):
+            self._render_thumbnail(digest, size)
+        return path
+
+    # ---------- bounding ----------
+
+    def touch(self, digest: str):
+        """Mark a blob as just served (its atime orders evictions)."""
+        path = self.blob_path(digest)
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+
+    def _maybe_sweep(self):
+        if not self.max_total_bytes or time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        self._last_sweep = time.monotonic()
+        threading.Thread(target=self._sweep_locked, name="media-sweep", daemon=True).start()
+
+    def _sweep_locked(self):
+        try:
+            self._sweep()
+        finally:
+            self._sweep_lock.release()
+
+    def sweep(self):
+        """Run one sweep now, in the calling thread."""
+        with self._sweep_lock:
+            self._sweep()
+
+    def _sweep(self):
+        now = time.time()
+        tmp_dir = os.path.join(self.root, "tmp")
+        for name in os.listdir(tmp_dir) if os.path.isdir(tmp_dir) else ():
+            path = os.path.join(tmp_dir, name)
+            try:
+                if os.stat(path).st_mtime < now - 3600:
+                    os.remove(path)  # a download that died mid-write
+            except OSError:
+                pass
+
+        blobs = []  # (atime, bytes incl. thumbnails, digest)
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, "blobs")):
+            for digest in filenames:
+                if not is_digest(digest):
+                    continue
+                try:
+                    st = os.stat(os.path.join(dirpath, digest))
+                except FileNotFoundError:
+                    continue
+                thumbs = sum(_size(self.thumbnail_path(digest, size)) for size in self.thumbnail_sizes)
+                blobs.append((st.st_atime, st.st_size + thumbs, digest))
+
+        total = sum(size for _, size, _ in blobs)
+        blobs.sort()
+        for _, size, digest in blobs:
+            if total <= self.max_total_bytes:
+                break
+            for path in (self.blob_path(digest), *(self.thumbnail_path(digest, s) for s in self.thumbnail_sizes)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            self.stats["evicted"] += 1
+
+    # ---------- downloads ----------
+
+    async def fetch(self, url: str, names: Iterable[str] = ()) -> str:
+        """
+        Stream `url` to disk (hashing as it goes), dedupe by digest, build
+        thumbnails off the event loop, and link `url` plus `names` to it.
+        """
+        if self._limiter is None:
+            self._limiter = asyncio.Semaphore(self.download_concurrency)
+
+        async with self._limiter:
+            f, tmp_path = self._tmp_file()
+            hasher = hashlib.sha256()
+            size = 0
+            try:
+                with f, span("media_download"):
+                    async with get_http_client().stream("GET", url) as res:
+                        res.raise_for_status()
+                        async for chunk in res.aiter_bytes():
+                            size += len(chunk)
+                            if size > self.max_bytes:
+                                raise ValueError(f"Media exceeds {self.max_bytes} bytes: {url}")
+                            hasher.update(chunk)
+                            f.write(chunk)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+        digest = hasher.hexdigest()
+        self._commit(tmp_path, digest, size)
+
+        try:
+            await asyncio.to_thread(self.make_thumbnails, digest)
+        except Exception:
+            # Originals are still served; thumbnails are rebuilt on request.
+            logger.warning("Thumbnail generation failed", exc_info=True, extra={"fields": {"digest": digest}})
+
+        for name in (url, *names):
+            self.link(name, digest)
+        return digest
+
+    def schedule(self, url: str, *names: str) -> Optional[str]:
+        """
+        Digest for `url` if already stored; otherwise start a background
+        download (at most one per URL) and return None.
+        """
+        digest = self.resolve(url)
+        if digest is not None:
+            for name in names:
+                self.link(name, digest)
+            return digest
+
+        task = asyncio.ensure_future(self._fetch_in_background(url, names))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return None
+
+    async def _fetch_in_background(self, url: str, names: Tuple[str, ...]):
+        try:
+            await self._downloads.do(url, lambda: self.fetch(url, names))
+        except Exception:
+            self.stats["failed"] += 1
+            logger.warning("Media download failed", exc_info=True, extra={"fields": {"url": url}})
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "downloading": len(self._background)}
+
 
-    def upload(self, path, data):
-        return {"url":""}
+media_store = StorageService(
+    settings.MEDIA_DIR,
+    thumbnail_sizes=tuple(int(s) for s in settings.MEDIA_THUMBNAIL_SIZES.split(",") if s.strip()),
+    max_bytes=settings.MEDIA_MAX_BYTES,
+    download_concurrency=settings.MEDIA_DOWNLOAD_CONCURRENCY,
+    max_total_bytes=settings.MEDIA_MAX_TOTAL_BYTES,
+    sweep_interval=settings.DISK_CACHE_SWEEP_SECONDS,
+)
@@ -0,0 +1,62 @@
+# backend/services/sweep_service.py
+
+import itertools
+import math
+from typing import Any, Dict, Iterator, List
+
+from services.agent_service import auto_fix_json
+from utils.canonical import canonical_hash
+from utils.json_patch import apply_patches, parse_pointer
+from utils.validators import scene_errors
+
+
+# ============================================================
+# 🔹 Parameter sweeps — one base scene × value lists per field
+# ============================================================
+
+def sweep_size(axes: Dict[str, List[Any]]) -> int:
+    return math.prod(len(values) for values in axes.values())
+
+
+def check_axes(axes: Dict[str, List[Any]]):
+    """Raise ValueError for a non-pointer / root path or an empty value list."""
+    for path, values in axes.items():
+        if not parse_pointer(path):
+            raise ValueError("A sweep axis cannot replace the whole scene.")
+        if not values:
+            raise ValueError(f"Axis {path} has no values.")
+
+
+def iter_variants(base: Dict[str, Any], axes: Dict[str, List[Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily walk the Cartesian product of `axes` (JSON pointer → values) in
+    row-major order, the first axis varying slowest. Each variant is the
+    base with one value per axis applied (copy-on-write, so variants share
+    untouched subtrees), then auto-fixed and canonically hashed.
+
+    A variant whose fixed scene hashes like an earlier one, e.g. because
+    auto-fix clamped two values to the same one or a value equals the
+    base's, gets `duplicate_of` that variant's index and is not rendered.
+    Variants that fail schema validation, or whose values cannot be applied
+    to the base, carry their `errors`.
+    """
+    paths = list(axes)
+    first_by_hash: Dict[str, int] = {}
+
+    for index, values in enumerate(itertools.product(*axes.values())):
+        coords = dict(zip(paths, values))
+        try:
+            scene, _ = apply_patches(base, [{"path": p, "value": v} for p, v in coords.items()])
+        except ValueError as e:
+            yield {"index": index, "coords": coords, "json": None, "scene_hash": None, "errors": [str(e)]}
+            continue
+        fixed = auto_fix_json(scene)
+        scene_hash = canonical_hash(fixed)
+
+        variant = {"index": index, "coords": coords, "json": fixed, "scene_hash": scene_hash}
+        if scene_hash in first_by_hash:
+            variant["duplicate_of"] = first_by_hash[scene_hash]
+        else:
+            first_by_hash[scene_hash] = index
+            variant["errors"] = scene_errors(fixed)
+        yield variant
@@ -0,0 +1,100 @@
+# backend/services/translation_cache.py
+
+import copy
+import hashlib
+from typing import Any, Dict
+
+from config.settings import settings
+from services.cache_service import TwoTierCache, versioned_cache_dir
+from services.vlm_client import (
+    BRIA_SCHEMA_PROMPT,
+    GEMINI_TEXT_MODEL,
+    prompt_to_json_async,
+    stream_prompt_to_json,
+)
+from utils.deadline import within_deadline, without_deadline
+from utils.singleflight import SingleFlight
+
+
+# ============================================================
+# 🔹 Prompt → JSON memoization
+# ============================================================
+
+def prompt_version(model: str, schema_prompt: str) -> str:
+    return hashlib.sha256(f"{model}\n{schema_prompt}".encode("utf-8")).hexdigest()[:16]
+
+
+# Any edit to the schema prompt or model changes the version, so entries
+# produced under the old prompt can never be served again.
+PROMPT_VERSION = prompt_version(GEMINI_TEXT_MODEL, BRIA_SCHEMA_PROMPT)
+
+
+translation_cache = TwoTierCache(
+    "translations",
+    max_entries=settings.TRANSLATION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TRANSLATION_CACHE_TTL_SECONDS,
+    disk_dir=versioned_cache_dir(settings.TRANSLATION_CACHE_DIR, PROMPT_VERSION),
+    disk_max_bytes=settings.TRANSLATION_CACHE_DISK_MAX_BYTES,
+    disk_sweep_interval=settings.DISK_CACHE_SWEEP_SECONDS,
+)
+
+translation_flight = SingleFlight("translations")
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split()).casefold()
+
+
+def translation_key(prompt: str) -> str:
+    return hashlib.sha256(
+        f"{PROMPT_VERSION}\n{normalize_prompt(prompt)}".encode("utf-8")
+    ).hexdigest()
+
+
+async def cached_prompt_to_json(prompt: str) -> Dict[str, Any]:
+    """prompt_to_json_async, memoized on the normalized prompt + prompt version."""
+    key = translation_key(prompt)
+
+    if not settings.TRANSLATION_CACHE_ENABLED:
+        async with within_deadline("translate"):
+            result = await translation_flight.do(
+                key, without_deadline(lambda: prompt_to_json_async(prompt))
+            )
+        return copy.deepcopy(result)
+
+    cached = translation_cache.get(key)
+    if cached is None:
+        async with within_deadline("translate"):
+            cached = await translation_flight.do(
+                key, without_deadline(lambda: _translate_and_store(key, prompt))
+            )
+
+    # Callers may mutate the document; keep the cache pristine.
+    return copy.deepcopy(cached)
+
+
+async def _translate_and_store(key: str, prompt: str) -> Dict[str, Any]:
+    result = await prompt_to_json_async(prompt)
+    translation_cache.set(key, result)
+    return result
+
+
+async def stream_cached_prompt_to_json(prompt: str):
+    """
+    stream_prompt_to_json with the same cache: a hit replays the cached
+    fields immediately, a miss streams from Gemini and stores the result.
+    """
+    key = translation_key(prompt)
+
+    cached = translation_cache.get(key) if settings.TRANSLATION_CACHE_ENABLED else None
+    if cached is not None:
+        cached = copy.deepcopy(cached)
+        for field, value in cached.items():
+            yield ("field", field, value)
+        yield ("result", cached)
+        return
+
+    async for event in stream_prompt_to_json(prompt):
+        if event[0] == "result" and settings.TRANSLATION_CACHE_ENABLED:
+            translation_cache.set(key, copy.deepcopy(event[1]))
+        yield event
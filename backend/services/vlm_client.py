@@ -3,24 +3,71 @@
 import json
 import base64
 import asyncio
-from typing import Any, Dict
-
-import requests
-import httpx
-from fastapi import UploadFile
-from google import genai
+import random
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict
+from urllib.parse import urlencode
 
 from config.settings import settings
+from services.http_client import get_http_client
+from services.progress import progress
+from services.bria_callbacks import callbacks
+from services.scheduler import bria_scheduler, vlm_scheduler
+from utils.incremental_json import IncrementalObjectParser
+from utils.deadline import DeadlineExceeded, within_deadline
+from utils.logger import logger
+from utils.metrics import Counter, span
+from utils.rate_limit import TokenBucket
+from utils.resilience import Upstream
+
+if TYPE_CHECKING:
+    from fastapi import UploadFile
 
 
 # ============================================================
 # 🔹 BRIA API
 # ============================================================
 
-BRIA_BASE_URL = "https://engine.prod.bria-api.com/v2"
+BRIA_BASE_URL = settings.BRIA_BASE_URL.rstrip("/")
 BRIA_GENERATE_URL = f"{BRIA_BASE_URL}/image/generate"
 
 
+class BriaRequestError(Exception):
+    """Bria refused a generation request; `status_code` is its HTTP status."""
+
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"Generation failed: {body}")
+        self.status_code = status_code
+
+
+# Every Bria submit (interactive or batch) draws from one bucket so bursts
+# are smoothed out instead of coming back as 429s.
+bria_submit_bucket = TokenBucket(settings.BRIA_SUBMIT_RPS, settings.BRIA_SUBMIT_BURST)
+
+
+def _upstream(name: str, **kwargs) -> Upstream:
+    return Upstream(
+        name,
+        failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+        reset_seconds=settings.BREAKER_RESET_SECONDS,
+        max_attempts=settings.RETRY_MAX_ATTEMPTS,
+        base_delay=settings.RETRY_BASE_DELAY,
+        max_delay=settings.RETRY_MAX_DELAY,
+        budget_ratio=settings.RETRY_BUDGET_RATIO,
+        **kwargs
+    )
+
+
+# One breaker + retry budget per upstream, shared by every request path.
+bria_upstream = _upstream("bria")
+gemini_upstream = _upstream(
+    "gemini",
+    hedge_percentile=settings.GEMINI_HEDGE_PERCENTILE if settings.GEMINI_HEDGE_ENABLED else None,
+    hedge_min_delay=settings.GEMINI_HEDGE_MIN_DELAY,
+)
+
+
 def _bria_headers():
     return {
         "Content-Type": "application/json",
@@ -32,16 +79,12 @@ def _bria_headers():
 # 🔹 1. GEMINI — Prompt → JSON
 # ============================================================
 
-GEMINI_URL = (
-    "https://generativelanguage.googleapis.com/v1beta/models/"
-    "gemini-2.5-flash:generateContent"
-)
-
-
-def prompt_to_json(prompt: str):
-    """Convert natural language → JSON using Gemini."""
+GEMINI_BASE_URL = settings.GEMINI_BASE_URL.rstrip("/")
+GEMINI_TEXT_MODEL = "models/gemini-2.5-flash"
+GEMINI_URL = f"{GEMINI_BASE_URL}/{GEMINI_TEXT_MODEL}:generateContent"
+GEMINI_STREAM_URL = f"{GEMINI_BASE_URL}/{GEMINI_TEXT_MODEL}:streamGenerateContent"
 
-    system_prompt = """
+BRIA_SCHEMA_PROMPT = """
     You MUST output a valid Bria V2 structured_prompt JSON.
 
     EXACT REQUIRED SCHEMA:
@@ -90,131 +133,351 @@ def prompt_to_json(prompt: str):
     - No backticks.
     """
 
-    payload = {
+
+def _gemini_headers():
+    return {
+        "x-goog-api-key": settings.GEMINI_API_KEY,
+        "Content-Type": "application/json"
+    }
+
+
+def _prompt_payload(prompt: str):
+    return {
         "contents": [
             {
                 "parts": [
-                    {"text": system_prompt + "\n\nUser prompt:\n" + prompt}
+                    {"text": BRIA_SCHEMA_PROMPT + "\n\nUser prompt:\n" + prompt}
                 ]
             }
         ]
     }
 
-    headers = {
-        "x-goog-api-key": settings.GEMINI_API_KEY,
-        "Content-Type": "application/json"
-    }
 
-    res = requests.post(GEMINI_URL, headers=headers, json=payload)
+def _parse_json_text(text: str):
+    # Clean for JSON
+    cleaned = text.strip().replace("```json", "").replace("```", "")
+    return json.loads(cleaned)
+
 
-    if res.status_code != 200:
-        print("Gemini ERROR:", res.status_code, res.text)
+def _parse_gemini_response(status_code: int, body: str, data_fn):
+    if status_code != 200:
+        logger.warning("Gemini request failed", extra={"fields": {"status": status_code, "body": body[:500]}})
         raise Exception("Gemini request failed")
 
-    text = res.json()["candidates"][0]["content"]["parts"][0]["text"]
+    text = data_fn()["candidates"][0]["content"]["parts"][0]["text"]
+    return _parse_json_text(text)
 
-    # Clean for JSON
-    cleaned = text.strip().replace("```json", "").replace("```", "")
 
-    return json.loads(cleaned)
+def prompt_to_json(prompt: str):
+    """Convert natural language → JSON using Gemini."""
+
+    import requests
+
+    res = requests.post(GEMINI_URL, headers=_gemini_headers(), json=_prompt_payload(prompt))
+    return _parse_gemini_response(res.status_code, res.text, res.json)
+
+
+async def prompt_to_json_async(prompt: str):
+    """Async prompt_to_json on the shared pooled client, within the request deadline."""
+
+    async with within_deadline("gemini_prompt"), vlm_scheduler.slot():
+        with span("gemini_prompt"):
+            res = await gemini_upstream.request(
+                lambda: get_http_client().post(
+                    GEMINI_URL,
+                    headers=_gemini_headers(),
+                    json=_prompt_payload(prompt)
+                ),
+                hedge=True
+            )
+    return _parse_gemini_response(res.status_code, res.text, res.json)
+
+
+@asynccontextmanager
+async def _breaker_stream(method: str, url: str, **kwargs):
+    """
+    Streams are neither retried nor hedged (fields may already have been
+    yielded), but they still respect and feed the Gemini breaker.
+    """
+    import httpx
+
+    gemini_upstream.breaker.before()
+    try:
+        async with get_http_client().stream(method, url, **kwargs) as res:
+            gemini_upstream.breaker.record_status(res.status_code)
+            yield res
+    except httpx.TransportError:
+        gemini_upstream.breaker.failure()
+        raise
+
+
+async def stream_prompt_to_json(prompt: str):
+    """
+    Streamed prompt_to_json. Yields ("field", key, value) for each top-level
+    field as soon as it parses, then ("result", document) where `document`
+    is parsed from the full text exactly like prompt_to_json does. The
+    stream is cut off at the request deadline like the unstreamed calls.
+    """
+
+    parser = IncrementalObjectParser()
+
+    async with within_deadline("gemini_prompt_stream"), vlm_scheduler.slot():
+        with span("gemini_prompt_stream"):
+            async with _breaker_stream(
+                "POST",
+                GEMINI_STREAM_URL,
+                params={"alt": "sse"},
+                headers=_gemini_headers(),
+                json=_prompt_payload(prompt)
+            ) as res:
+                if res.status_code != 200:
+                    body = (await res.aread()).decode("utf-8", "replace")
+                    _parse_gemini_response(res.status_code, body, None)
+
+                async for line in res.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+
+                    chunk = json.loads(line[5:])
+                    for part in chunk["candidates"][0].get("content", {}).get("parts", []):
+                        for key, value in parser.feed(part.get("text", "")):
+                            yield ("field", key, value)
+
+    yield ("result", _parse_json_text(parser.buffer))
 
 
 # ============================================================
 # 🔹 2. GEMINI — Image → JSON
 # ============================================================
 
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
+GEMINI_IMAGE_MODEL = "models/gemini-2.0-flash-exp-image-generation"
+GEMINI_IMAGE_URL = f"{GEMINI_BASE_URL}/{GEMINI_IMAGE_MODEL}:generateContent"
 
+IMAGE_ANALYSIS_PROMPT = (
+    "Analyze this image and output a COMPLETE Bria structured_prompt JSON. "
+    "Return ONLY valid JSON. No markdown."
+)
 
-def image_to_json(image: UploadFile):
-    img_bytes = image.file.read()
-    b64 = base64.b64encode(img_bytes).decode("utf-8")
+@lru_cache(maxsize=None)
+def get_genai_client():
+    """
+    google-genai is slow to import, so the SDK client is built on first use
+    (or by the startup warm-up) instead of at import time. Sync calls go
+    through `client.models`, async ones through `client.aio.models`.
+    """
+    from google import genai
 
-    response = client.models.generate_content(
-        model="models/gemini-2.0-flash-exp-image-generation",
-        contents=[
-            {
-                "parts": [
-                    {
-                        "inline_data": {
-                            "mime_type": image.content_type,
-                            "data": b64
-                        }
-                    },
-                    {
-                        "text": (
-                            "Analyze this image and output a COMPLETE Bria structured_prompt JSON. "
-                            "Return ONLY valid JSON. No markdown."
-                        )
+    return genai.Client(api_key=settings.GEMINI_API_KEY)
+
+
+def _image_contents(img_bytes: bytes, mime_type: str):
+    return [
+        {
+            "parts": [
+                {
+                    "inline_data": {
+                        "mime_type": mime_type,
+                        "data": base64.b64encode(img_bytes).decode("utf-8")
                     }
-                ]
-            }
-        ]
+                },
+                {"text": IMAGE_ANALYSIS_PROMPT}
+            ]
+        }
+    ]
+
+
+def image_bytes_to_json(img_bytes: bytes, mime_type: str = "image/jpeg"):
+    response = get_genai_client().models.generate_content(
+        model=GEMINI_IMAGE_MODEL,
+        contents=_image_contents(img_bytes, mime_type)
     )
+    return _parse_json_text(response.text)
+
+
+async def image_bytes_to_json_async(img_bytes: bytes, mime_type: str = "image/jpeg"):
+    """Async image → JSON over REST on the shared pooled client, within the request deadline."""
 
-    text = response.text.strip().replace("```json", "").replace("```", "")
-    return json.loads(text)
+    async with within_deadline("gemini_image"), vlm_scheduler.slot():
+        with span("gemini_image"):
+            res = await gemini_upstream.request(
+                lambda: get_http_client().post(
+                    GEMINI_IMAGE_URL,
+                    headers=_gemini_headers(),
+                    json={"contents": _image_contents(img_bytes, mime_type)}
+                ),
+                hedge=True
+            )
+    return _parse_gemini_response(res.status_code, res.text, res.json)
 
 
+def image_to_json(image: "UploadFile"):
+    return image_bytes_to_json(image.file.read(), mime_type=image.content_type)
+
+
+async def list_models_async():
+    pager = await get_genai_client().aio.models.list()
+    return [model async for model in pager]
 
 
 # ============================================================
 # 🔹 3. BRIA — JSON → IMAGE (Async)
 # ============================================================
 
-async def generate_image_and_wait(json_body, timeout_seconds=60, max_polls=12):
-    """
-    Uses Bria V2 async image generation.
-    Polls until image is ready.
-    """
+def _poll_delays():
+    """Short first wait, then exponential backoff with jitter, capped."""
+    delay = settings.BRIA_POLL_INITIAL_DELAY
+    jitter = settings.BRIA_POLL_JITTER
 
-    async with httpx.AsyncClient(timeout=30) as client:
+    while True:
+        yield delay * random.uniform(1 - jitter, 1 + jitter)
+        delay = min(delay * settings.BRIA_POLL_BACKOFF, settings.BRIA_POLL_MAX_DELAY)
 
-        # Step 1 — send request
-        resp = await client.post(
-            BRIA_GENERATE_URL,
-            json=json_body,
-            headers=_bria_headers()
-        )
 
-        if resp.status_code not in [200, 202]:
-            raise Exception(f"Generation failed: {resp.text}")
+def _callback_poll_delays():
+    """Slow safety-net polling while a completion callback is awaited."""
+    jitter = settings.BRIA_POLL_JITTER
 
-        data = resp.json()
+    while True:
+        yield settings.BRIA_CALLBACK_POLL_INTERVAL * random.uniform(1 - jitter, 1 + jitter)
 
-        # Sync result returned instantly
-        if resp.status_code == 200 and "result" in data:
-            return {
-                "image_url": data["result"]["image_url"],
-                "request_id": data.get("request_id"),
-                "metadata": data["result"]
-            }
 
-        # Async flow
-        status_url = data.get("status_url")
-        request_id = data.get("request_id")
+def _callback_url():
+    separator = "&" if "?" in settings.BRIA_CALLBACK_URL else "?"
+    return f"{settings.BRIA_CALLBACK_URL}{separator}{urlencode({'token': settings.BRIA_CALLBACK_TOKEN})}"
+
 
-        if not status_url:
-            raise Exception("No status_url in async Bria response")
+def _completed_result(poll_data, request_id):
+    """Map a Bria status payload to our result dict, or None if still running."""
+    status = poll_data.get("status")
 
-        # Poll
-        for _ in range(max_polls):
-            await asyncio.sleep(timeout_seconds / max_polls)
+    if status == "COMPLETED":
+        result = poll_data.get("result")
+        return {
+            "image_url": result["image_url"],
+            "request_id": request_id,
+            "metadata": result
+        }
 
-            poll = await client.get(status_url, headers=_bria_headers())
-            poll_data = poll.json()
+    if status == "ERROR":
+        raise Exception(poll_data.get("error"))
 
-            status = poll_data.get("status")
+    return None
 
-            if status == "COMPLETED":
-                result = poll_data.get("result")
-                return {
-                    "image_url": result["image_url"],
-                    "request_id": request_id,
-                    "metadata": result
-                }
 
-            if status == "ERROR":
-                raise Exception(poll_data.get("error"))
+bria_polls = Counter("studio_bria_polls_total", "Bria status polls issued.")
+bria_cancelled = Counter(
+    "studio_bria_renders_cancelled_total",
+    "Bria renders abandoned mid-wait (client gone or request deadline passed).",
+)
+
+
+async def _poll_status(client, status_url, request_id):
+    bria_polls.inc()
+    with span("bria_poll"):
+        # Bria already accepted this job: an open submit breaker must not
+        # fail it, and its poll results say nothing about new submits.
+        poll = await bria_upstream.request(
+            lambda: client.get(status_url, headers=_bria_headers()),
+            gated=False
+        )
+    poll_data = poll.json()
+    progress.publish("poll", bria_request_id=request_id, status=poll_data.get("status"))
+    return _completed_result(poll_data, request_id)
+
+
+async def generate_image_and_wait(json_body, timeout_seconds=None):
+    """
+    Uses Bria V2 async image generation.
+    Waits for the image until `timeout_seconds` (total deadline) elapses,
+    either by adaptive polling or, when BRIA_CALLBACK_URL is set, by waiting
+    for Bria to call /callbacks/bria while polling every
+    BRIA_CALLBACK_POLL_INTERVAL seconds as a fallback.
+
+    Runs inside a bria_scheduler slot for the caller's priority lane, and
+    within the request deadline if one is set (raising DeadlineExceeded).
+    Cancellation stops the polling immediately.
+    Publishes "queued" before waiting for the slot, then "submitted" and one
+    "poll" event per status check (see services/progress.py).
+    """
+
+    progress.publish("queued")
+    try:
+        async with within_deadline("bria"), bria_scheduler.slot():
+            return await _generate_image_and_wait(json_body, timeout_seconds)
+    except (asyncio.CancelledError, DeadlineExceeded):
+        bria_cancelled.inc()
+        raise
+
+
+async def _generate_image_and_wait(json_body, timeout_seconds):
+    client = get_http_client()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (timeout_seconds or settings.BRIA_DEADLINE_SECONDS)
+
+    if settings.BRIA_CALLBACK_URL:
+        json_body = {**json_body, "callback_url": _callback_url()}
+
+    # Step 1 — send request (each retry waits for its own submit token)
+    async def submit():
+        with span("bria_submit_wait"):
+            await bria_submit_bucket.acquire()
+        with span("bria_submit"):
+            return await client.post(
+                BRIA_GENERATE_URL,
+                json=json_body,
+                headers=_bria_headers()
+            )
+
+    resp = await bria_upstream.request(submit, idempotent=False)
+
+    if resp.status_code not in [200, 202]:
+        raise BriaRequestError(resp.status_code, resp.text)
+
+    data = resp.json()
+
+    # Sync result returned instantly
+    if resp.status_code == 200 and "result" in data:
+        return {
+            "image_url": data["result"]["image_url"],
+            "request_id": data.get("request_id"),
+            "metadata": data["result"]
+        }
 
-        raise TimeoutError("Image generation took too long")
+    # Async flow
+    status_url = data.get("status_url")
+    request_id = data.get("request_id")
+    progress.publish("submitted", bria_request_id=request_id)
+
+    if not status_url:
+        raise Exception("No status_url in async Bria response")
+
+    # Callback mode: wait for /callbacks/bria, polling slowly in case the
+    # callback went to another worker process or never comes
+    future = callbacks.register(request_id) if settings.BRIA_CALLBACK_URL and request_id else None
+    delays = _poll_delays() if future is None else _callback_poll_delays()
+
+    try:
+        while (remaining := deadline - loop.time()) > 0:
+            wait = min(next(delays), remaining)
+
+            if future is None:
+                with span("bria_poll_wait"):
+                    await asyncio.sleep(wait)
+            else:
+                with span("bria_callback_wait"):
+                    done, _ = await asyncio.wait({future}, timeout=wait)
+                if done:
+                    result = _completed_result(future.result(), request_id)
+                    if result is not None:
+                        return result
+                    # Non-final callback: poll at the normal pace from here
+                    future, delays = None, _poll_delays()
+                    continue
+
+            result = await _poll_status(client, status_url, request_id)
+            if result is not None:
+                return result
+    finally:
+        callbacks.discard(request_id)
+
+    raise TimeoutError("Image generation took too long")
@@ -0,0 +1,44 @@
+# backend/services/warmup.py
+
+import asyncio
+import time
+
+from services import http_client
+from services.agent_service import get_auto_fix_rules
+from services.vlm_client import get_genai_client
+from utils.logger import logger
+from utils.validators import get_scene_validator
+
+
+# ============================================================
+# 🔹 Optional startup warm-up
+# ============================================================
+# Heavy imports and SDK clients are lazy so a new replica can accept
+# traffic immediately. These hooks pay those costs ahead of the first
+# request instead, in the background unless WARMUP_BLOCKING is set.
+
+def _warm_pillow():
+    from PIL import Image  # noqa: F401
+
+
+WARMUP_HOOKS = [
+    ("http_client", http_client.startup),
+    ("scene_validator", get_scene_validator),
+    ("auto_fix_rules", get_auto_fix_rules),
+    ("genai_client", get_genai_client),
+    ("pillow", _warm_pillow),
+]
+
+
+async def run_warmup():
+    for name, hook in WARMUP_HOOKS:
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(hook):
+                await hook()
+            else:
+                await asyncio.to_thread(hook)
+        except Exception:
+            logger.exception("warm-up hook %s failed", name)
+            continue
+        logger.info("warm-up %s took %.0f ms", name, (time.perf_counter() - started) * 1000)
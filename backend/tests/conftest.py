@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+# Settings are read once at import time. Before any app module loads, give
+# the SDK keys dummy values and point every on-disk store at a scratch
+# directory so the suite never touches backend/.cache.
+_SCRATCH = tempfile.mkdtemp(prefix="studio-tests-")
+
+for _name, _default in {
+    "BRIA_API_KEY": "test",
+    "GEMINI_API_KEY": "test",
+    "WARMUP_ON_STARTUP": "0",
+    "RESULT_CACHE_DIR": os.path.join(_SCRATCH, "results"),
+    "SCENE_STORE_DIR": os.path.join(_SCRATCH, "scenes"),
+    "TRANSLATION_CACHE_DIR": os.path.join(_SCRATCH, "translations"),
+    "IMAGE_CACHE_DIR": os.path.join(_SCRATCH, "images"),
+    "MEDIA_DIR": os.path.join(_SCRATCH, "media"),
+    "JOBS_DB_PATH": os.path.join(_SCRATCH, "jobs.sqlite3"),
+    "PROJECTS_DB_PATH": os.path.join(_SCRATCH, "projects.sqlite3"),
+}.items():
+    os.environ.setdefault(_name, _default)
@@ -0,0 +1,37 @@
+import asyncio
+
+from services.bria_callbacks import CallbackRegistry
+
+
+def test_early_callback_is_handed_to_the_next_registration():
+    async def run():
+        registry = CallbackRegistry()
+        assert registry.resolve("r1", {"status": "COMPLETED"}) is False
+        future = registry.register("r1")
+        assert future.done() and future.result() == {"status": "COMPLETED"}
+
+    asyncio.run(run())
+
+
+def test_registered_waiter_is_woken():
+    async def run():
+        registry = CallbackRegistry()
+        future = registry.register("r1")
+        assert registry.resolve("r1", {"status": "COMPLETED"}) is True
+        assert await future == {"status": "COMPLETED"}
+        assert len(registry) == 0
+
+    asyncio.run(run())
+
+
+def test_parked_callbacks_are_capped_oldest_first():
+    async def run():
+        registry = CallbackRegistry(max_early=3)
+        for i in range(5):
+            registry.resolve(f"r{i}", {"i": i})
+
+        assert list(registry._early) == ["r2", "r3", "r4"]
+        assert not registry.register("r0").done()
+        assert registry.register("r4").result() == {"i": 4}
+
+    asyncio.run(run())
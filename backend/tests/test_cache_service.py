@@ -0,0 +1,72 @@
+import os
+import time
+
+from services.cache_service import DiskCache
+
+
+def _age(cache: DiskCache, key: str, written_ago: float = 0, read_ago: float = 0):
+    path = cache._path(key)
+    now = time.time()
+    os.utime(path, (now - read_ago, now - written_ago))
+
+
+def test_sweep_removes_expired_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl_seconds=60)
+    cache.set("aa01", {"v": 1})
+    cache.set("aa02", {"v": 2})
+    _age(cache, "aa01", written_ago=120)
+
+    cache.sweep()
+
+    assert not os.path.exists(cache._path("aa01"))
+    assert cache.get("aa02") == {"v": 2}
+    assert cache.stats["expired"] == 1
+    assert cache.stats["entries"] == 1
+
+
+def test_sweep_evicts_least_recently_read_over_max_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl_seconds=3600, max_entries=2)
+    for i, key in enumerate(("aa01", "bb02", "cc03")):
+        cache.set(key, i)
+        _age(cache, key, written_ago=30 - i, read_ago=30 - i)
+
+    # Reading the oldest entry makes it the most recently used.
+    assert cache.get("aa01") == 0
+    cache.sweep()
+
+    assert cache.get("aa01") == 0
+    assert cache.get("bb02") is None
+    assert cache.get("cc03") == 2
+    assert cache.stats["evicted"] == 1
+
+
+def test_sweep_enforces_max_bytes(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl_seconds=3600)
+    for i in range(10):
+        key = f"{i:02d}key"
+        cache.set(key, "x" * 100)
+        _age(cache, key, read_ago=100 - i)
+    newest = sum(os.path.getsize(cache._path(f"{i:02d}key")) for i in range(6, 10))
+
+    cache.max_bytes = newest
+    cache.sweep()
+
+    assert cache.stats["entries"] == 4
+    assert cache.stats["bytes"] <= cache.max_bytes
+    assert [cache.get(f"{i:02d}key") is not None for i in range(10)] == [False] * 6 + [True] * 4
+
+
+def test_set_triggers_background_sweep_once_due(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl_seconds=60, sweep_interval=3600)
+    cache.set("aa01", 1)
+    _age(cache, "aa01", written_ago=120)
+    assert os.path.exists(cache._path("aa01"))
+
+    cache.sweep_interval = 0
+    cache.set("bb02", 2)
+    deadline = time.monotonic() + 5
+    while os.path.exists(cache._path("aa01")) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not os.path.exists(cache._path("aa01"))
+    assert cache.get("bb02") == 2
@@ -0,0 +1,24 @@
+from utils.canonical import canonical_hash, canonical_json
+
+
+def test_key_order_and_float_noise_do_not_change_the_hash():
+    a = {"lighting": {"intensity": 0.30000000000000004, "angle": 45.0}, "objects": [1, 2]}
+    b = {"objects": [1, 2], "lighting": {"angle": 45, "intensity": 0.3}}
+    assert canonical_hash(a) == canonical_hash(b)
+    assert canonical_hash(a) != canonical_hash(b, {"seed": 1})
+
+
+def test_integral_floats_outside_int64_stay_floats():
+    # Regression: 1e20 used to become int(1e20), which orjson refuses
+    # ("Integer exceeds 64-bit range").
+    assert canonical_json({"warmth": 1e20}) == b'{"warmth":1e20}'
+    assert canonical_hash({"a": 1e20}) == canonical_hash({"a": 10 ** 20})
+    assert canonical_hash({"a": -1e300}) != canonical_hash({"a": 1e300})
+
+
+def test_integral_floats_inside_int64_become_ints():
+    assert canonical_json({"n": 2.0 ** 62, "m": -3.0}) == b'{"m":-3,"n":4611690000000000000}'
+
+
+def test_non_finite_floats_are_serializable():
+    assert canonical_json([float("nan"), float("inf")]) == b'["nan","inf"]'
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils.deadline import DeadlineExceeded, deadline_var, parse_timeout, remaining, within_deadline, without_deadline
+from utils.resilience import CircuitOpenError
+from utils.validators import SceneValidationError
+
+
+def test_parse_timeout_falls_back_and_caps():
+    assert parse_timeout("5", 30, 60) == 5
+    assert parse_timeout(None, 30, 60) == 30
+    assert parse_timeout("soon", 30, 60) == 30
+    assert parse_timeout("-1", 30, 60) == 30
+    assert parse_timeout("nan", 30, 60) == 30
+    assert parse_timeout("600", 30, 60) == 60
+
+
+def test_within_deadline_cancels_the_body():
+    async def run():
+        deadline_var.set(asyncio.get_running_loop().time() + 0.05)
+        async with within_deadline("bria_poll"):
+            await asyncio.sleep(5)
+
+    with pytest.raises(DeadlineExceeded) as e:
+        asyncio.run(run())
+    assert e.value.stage == "bria_poll"
+
+
+def test_within_deadline_is_a_noop_without_one():
+    async def run():
+        async with within_deadline("bria_poll"):
+            await asyncio.sleep(0)
+        return remaining()
+
+    assert asyncio.run(run()) is None
+
+
+def test_without_deadline_clears_it_for_shared_work():
+    async def run():
+        deadline_var.set(asyncio.get_running_loop().time() + 30)
+        inner = await asyncio.create_task(without_deadline(lambda: asyncio.sleep(0, remaining()))())
+        return inner, remaining()
+
+    inner, outer = asyncio.run(run())
+    assert inner is None
+    assert 0 < outer <= 30
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_request_past_its_deadline_answers_504(client, monkeypatch):
+    async def slow_translation(prompt):
+        async with within_deadline("vlm"):
+            await asyncio.sleep(5)
+
+    monkeypatch.setattr(main, "cached_prompt_to_json", slow_translation)
+
+    response = client.post("/translate", json={"prompt": "a cat"}, headers={"X-Request-Timeout": "0.05"})
+
+    assert response.status_code == 504
+    assert "vlm" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("error, status", [
+    (CircuitOpenError("bria", 2.2), 503),
+    (SceneValidationError(["short_description is required"]), 422),
+])
+def test_upstream_and_validation_errors_are_mapped_once(client, monkeypatch, error, status):
+    async def failing_translation(prompt):
+        raise error
+
+    monkeypatch.setattr(main, "cached_prompt_to_json", failing_translation)
+
+    response = client.post("/translate", json={"prompt": "a cat"})
+
+    assert response.status_code == status
+    if status == 503:
+        assert response.headers["Retry-After"] == "3"
+    else:
+        assert response.json()["detail"] == ["short_description is required"]
+
+
+def test_background_renders_drop_the_request_deadline():
+    seen = []
+
+    async def handler():
+        seen.append(remaining())
+        return {"ok": True}
+
+    async def run():
+        deadline_var.set(asyncio.get_running_loop().time() + 0.05)
+        main._run_in_background(handler)
+        await asyncio.gather(*main._background_renders)
+
+    asyncio.run(run())
+    assert seen == [None]
+
+
+def test_unhandled_errors_keep_the_request_id(monkeypatch):
+    async def broken_translation(prompt):
+        raise RuntimeError("kaput")
+
+    monkeypatch.setattr(main, "cached_prompt_to_json", broken_translation)
+
+    with TestClient(main.app) as client:
+        response = client.post("/translate", json={"prompt": "a cat"}, headers={"X-Request-ID": "req-500"})
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "kaput"}
+    assert response.headers["X-Request-ID"] == "req-500"
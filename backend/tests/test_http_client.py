@@ -0,0 +1,73 @@
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services import http_client, vlm_client
+
+
+def _gemini_reply(document):
+    return {"candidates": [{"content": {"parts": [{"text": "```json\n" + json.dumps(document) + "\n```"}]}}]}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route the shared client through httpx.MockTransport; returns the captured requests."""
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        if request.url.path.endswith(vlm_client.GEMINI_IMAGE_MODEL.split("/")[-1] + ":generateContent"):
+            return httpx.Response(200, json=_gemini_reply({"short_description": "from image"}))
+        return httpx.Response(200, json=_gemini_reply({"short_description": "from prompt"}))
+
+    monkeypatch.setattr(http_client, "_build_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield requests
+    asyncio.run(http_client.shutdown())
+
+
+def test_client_is_shared_and_rebuilt_once_closed(upstream):
+    async def run():
+        first = http_client.get_http_client()
+        assert http_client.get_http_client() is first
+        await first.aclose()
+        return first, http_client.get_http_client()
+
+    first, second = asyncio.run(run())
+    assert second is not first and not second.is_closed
+
+
+def test_lifespan_creates_the_client_and_closes_it_on_shutdown(upstream, monkeypatch):
+    monkeypatch.setattr(main.settings, "WARMUP_BLOCKING", True)
+    monkeypatch.setattr(main.settings, "WARMUP_ON_STARTUP", False)
+
+    with TestClient(main.app):
+        client = http_client._client
+        assert client is not None and not client.is_closed
+
+    assert client.is_closed
+    assert http_client._client is None
+
+
+def test_prompt_to_json_async_goes_through_the_shared_client(upstream):
+    result = asyncio.run(vlm_client.prompt_to_json_async("a red mug"))
+
+    assert result == {"short_description": "from prompt"}
+    (request,) = upstream
+    assert str(request.url) == vlm_client.GEMINI_URL
+    assert request.headers["x-goog-api-key"] == main.settings.GEMINI_API_KEY
+    assert "a red mug" in json.loads(request.content)["contents"][0]["parts"][0]["text"]
+
+
+def test_image_bytes_to_json_async_goes_through_the_shared_client(upstream):
+    result = asyncio.run(vlm_client.image_bytes_to_json_async(b"png-bytes", mime_type="image/png"))
+
+    assert result == {"short_description": "from image"}
+    (request,) = upstream
+    assert str(request.url) == vlm_client.GEMINI_IMAGE_URL
+    inline = json.loads(request.content)["contents"][0]["parts"][0]["inline_data"]
+    assert inline == {"mime_type": "image/png", "data": base64.b64encode(b"png-bytes").decode()}
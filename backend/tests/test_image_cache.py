@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+from services import image_cache
+from services.image_cache import PerceptualIndex
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_index_file_is_compacted_to_the_live_entries(tmp_path):
+    path = str(tmp_path / "phash.index")
+    expired = {"k1", "k3"}
+    index = PerceptualIndex(path, max_entries=4, live=lambda key: key not in expired)
+
+    for i in range(9):
+        index.add(f"k{i}", i)
+
+    # The 9th line crossed 2 × max_entries: only the 4 newest remain, minus
+    # expired ones (k1 and k3 had already fallen out of the bound).
+    assert _lines(path) == [f"{i:016x} k{i}" for i in (5, 6, 7, 8)]
+    assert index.nearest(8, 0) == "k8"
+    assert index.nearest(1, 0) is None
+
+
+def test_other_processes_reread_a_compacted_file(tmp_path):
+    path = str(tmp_path / "phash.index")
+    writer = PerceptualIndex(path, max_entries=2)
+    reader = PerceptualIndex(path, max_entries=2)
+
+    for i in range(4):
+        writer.add(f"k{i}", i)
+    assert reader.nearest(3, 0) == "k3"
+
+    writer.add("k4", 4)  # compacts
+    writer.add("k5", 0xFF)
+    assert len(_lines(path)) == 3
+    assert reader.nearest(0xFF, 0) == "k5"
+    assert reader.nearest(4, 0) == "k4"
+
+
+def test_index_lookups_run_off_the_event_loop(monkeypatch):
+    loop_thread = threading.get_ident()
+    threads = []
+
+    class SpyIndex:
+        def nearest(self, phash, max_distance):
+            threads.append(threading.get_ident())
+            return None
+
+        def add(self, key, phash):
+            threads.append(threading.get_ident())
+
+    async def fake_analysis(img_bytes, mime_type=None):
+        return {"short_description": "a lamp"}
+
+    monkeypatch.setattr(image_cache, "perceptual_index", SpyIndex())
+    monkeypatch.setattr(image_cache, "dhash", lambda img_bytes: 0xABC)
+    monkeypatch.setattr(image_cache, "image_bytes_to_json_async", fake_analysis)
+
+    result = asyncio.run(image_cache._analyze_and_store("lamp-key", b"lamp", "image/png"))
+
+    assert result == {"short_description": "a lamp"}
+    assert len(threads) == 2 and loop_thread not in threads
@@ -0,0 +1,72 @@
+"""
+Import-time budget for the API process: `import main` in a fresh
+interpreter (`python -X importtime`, best of IMPORT_TIME_RUNS) must stay
+under IMPORT_TIME_BUDGET_MS and must not load SDKs that are meant to be
+imported lazily, on first use or in the startup warm-up.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1000"))
+RUNS = int(os.getenv("IMPORT_TIME_RUNS", "3"))
+
+LAZY_MODULES = (
+    "google.genai",
+    "requests",
+    "httpx",
+    "PIL",
+    "jsonschema",
+    "torch",
+    "transformers",
+    "diffusers",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _measure():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+@pytest.fixture(scope="module")
+def best_run():
+    runs = [_measure() for _ in range(RUNS)]
+    return min(runs, key=lambda m: m["main"][1])
+
+
+def test_import_main_within_budget(best_run):
+    total_ms = best_run["main"][1] / 1000
+    slowest = sorted(best_run.items(), key=lambda kv: -kv[1][1])[:10]
+    report = "\n".join(f"  {cumulative / 1000:8.1f} ms  {name}" for name, (_, cumulative) in slowest)
+
+    assert total_ms <= BUDGET_MS, f"import main took {total_ms:.0f} ms > {BUDGET_MS:.0f} ms\n{report}"
+
+
+def test_sdks_are_imported_lazily(best_run):
+    eager = sorted(
+        name for name in best_run
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+    assert not eager, "eagerly imported: " + ", ".join(eager)
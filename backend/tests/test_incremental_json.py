@@ -0,0 +1,93 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services import vlm_client
+from utils.deadline import DeadlineExceeded, deadline_var
+from utils.incremental_json import IncrementalObjectParser
+
+
+def _feed_all(chunks):
+    parser = IncrementalObjectParser()
+    members = []
+    for chunk in chunks:
+        members.extend(parser.feed(chunk))
+    return parser, members
+
+
+def test_fence_split_across_chunks():
+    parser, members = _feed_all(["``", "`js", 'on\n{"a": 1,', ' "b": 2}\n`', "``"])
+
+    assert members == [("a", 1), ("b", 2)]
+    assert parser.done
+
+
+def test_escaped_quotes_and_braces_inside_strings():
+    text = '{"s": "say \\"hi\\" {not} [a, b]", "t": "back\\\\slash"}'
+    _, members = _feed_all(text[i:i + 3] for i in range(0, len(text), 3))
+
+    assert members == [("s", 'say "hi" {not} [a, b]'), ("t", "back\\slash")]
+
+
+def test_nested_values_come_out_whole():
+    _, members = _feed_all(['{"lighting": {"a": [1, {"b": 2}],', ' "c": "x"}, "n": null}'])
+
+    assert members == [("lighting", {"a": [1, {"b": 2}], "c": "x"}), ("n", None)]
+
+
+def test_a_malformed_member_is_skipped():
+    _, members = _feed_all(['{"a": 1, "b": tru, "c": 3}'])
+
+    assert members == [("a", 1), ("c", 3)]
+
+
+def test_trailing_chatter_is_ignored():
+    parser, members = _feed_all(['Sure! {"a": 1}', " Hope this helps, {\"b\": 2}"])
+
+    assert members == [("a", 1)]
+    assert parser.done
+
+
+def test_stream_stops_at_the_request_deadline(monkeypatch):
+    class SlowResponse:
+        status_code = 200
+
+        async def aiter_lines(self):
+            yield 'data: {"candidates": [{"content": {"parts": [{"text": "{\\"a\\": 1,"}]}}]}'
+            await asyncio.sleep(5)
+
+    @asynccontextmanager
+    async def slow_stream(method, url, **kwargs):
+        yield SlowResponse()
+
+    monkeypatch.setattr(vlm_client, "_breaker_stream", slow_stream)
+
+    async def run():
+        deadline_var.set(asyncio.get_running_loop().time() + 0.05)
+        return [event async for event in vlm_client.stream_prompt_to_json("a cat")]
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+
+
+def test_translate_stream_frames_one_json_object_per_line(monkeypatch):
+    async def fake_stream(prompt):
+        yield ("field", "short_description", " a cat ")
+        yield ("result", {"short_description": " a cat "})
+
+    monkeypatch.setattr(main, "stream_cached_prompt_to_json", fake_stream)
+
+    with TestClient(main.app) as client:
+        response = client.post("/translate/stream", json={"prompt": "a cat"})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.endswith("\n")
+    lines = [orjson.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {"field": "short_description", "value": " a cat "},
+        {"result": {"short_description": "a cat"}},
+    ]
@@ -0,0 +1,113 @@
+import io
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from services import ingest
+from services.ingest import UploadRejected, prepare_image
+from utils.upload_limit import UploadLimit
+
+
+def _image(size, fmt="JPEG", mode="RGB") -> io.BytesIO:
+    buf = io.BytesIO()
+    Image.new(mode, size, "orange").save(buf, fmt)
+    buf.seek(0)
+    return buf
+
+
+@pytest.fixture
+def reduced(monkeypatch):
+    """Factors passed to Image.reduce."""
+    factors = []
+    reduce = Image.Image.reduce
+
+    def spy(img, factor, box=None):
+        factors.append(factor)
+        return reduce(img, factor, box)
+
+    monkeypatch.setattr(Image.Image, "reduce", spy)
+    return factors
+
+
+@pytest.fixture
+def small_limits(monkeypatch):
+    monkeypatch.setattr(ingest.settings, "INGEST_MAX_EDGE", 256)
+    monkeypatch.setattr(ingest.settings, "INGEST_MAX_PIXELS", 5_000_000)
+    monkeypatch.setattr(ingest.settings, "INGEST_MAX_UPLOAD_BYTES", 2_000_000)
+
+
+def test_large_jpeg_is_drafted_reduced_and_reencoded(small_limits, reduced):
+    image = prepare_image(_image((2000, 1000)))
+
+    assert image.reencoded and image.mime_type == "image/jpeg"
+    assert (image.width, image.height) == (256, 128)
+    # draft() decoded at 1/2 scale (1000x500); reduce took it to 333x166.
+    assert reduced == [3]
+    with Image.open(io.BytesIO(image.data)) as out:
+        assert out.size == (256, 128)
+
+
+def test_large_png_is_box_reduced_before_resizing(small_limits, reduced):
+    image = prepare_image(_image((1200, 600), "PNG", "RGBA"))
+
+    # No draft for PNG: the full 1200x600 decode is box-reduced by 4.
+    assert reduced[0] == 4
+    assert (image.width, image.height, image.mime_type) == (256, 128, "image/jpeg")
+
+
+def test_small_images_pass_through_untouched(small_limits):
+    original = _image((200, 100), "PNG")
+    image = prepare_image(original)
+
+    assert not image.reencoded
+    assert image.data == original.getvalue()
+    assert image.mime_type == "image/png"
+    assert image.bytes_saved == 0
+
+
+@pytest.mark.parametrize("data, status, reason", [
+    (b"", 422, "empty"),
+    (b"not an image at all", 415, "undecodable"),
+    (b"x" * 2_000_001, 413, "too_large"),
+])
+def test_rejected_uploads(small_limits, data, status, reason):
+    with pytest.raises(UploadRejected) as e:
+        prepare_image(io.BytesIO(data))
+    assert (e.value.status_code, e.value.reason) == (status, reason)
+
+
+def test_too_many_pixels_is_rejected(small_limits, monkeypatch):
+    monkeypatch.setattr(ingest.settings, "INGEST_MAX_PIXELS", 10_000)
+    with pytest.raises(UploadRejected) as e:
+        prepare_image(_image((200, 100)))
+    assert e.value.status_code == 413
+
+
+@pytest.fixture
+def limited_client():
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(UploadLimit, max_bytes=1000, paths=("/upload",))
+    return TestClient(app)
+
+
+def test_declared_content_length_over_the_limit_is_refused(limited_client):
+    response = limited_client.post("/upload", content=b"x" * 1001)
+    assert response.status_code == 413
+
+    assert limited_client.post("/upload", content=b"x" * 1000).json() == {"size": 1000}
+
+
+def test_chunked_body_over_the_limit_is_cut_off(limited_client):
+    def chunks():
+        for _ in range(5):
+            yield b"x" * 300
+
+    response = limited_client.post("/upload", content=chunks())
+    assert response.status_code == 413
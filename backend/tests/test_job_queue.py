@@ -0,0 +1,108 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.job_queue import JobQueue
+
+
+def _queue(tmp_path, **submit):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job = queue.submit("generate", {"structured_json": {}}, **submit)
+    return queue, job
+
+
+def test_complete_requires_the_current_lease(tmp_path):
+    queue, job = _queue(tmp_path)
+    first = queue.claim(lease_seconds=0.01)
+    time.sleep(0.02)
+
+    # The lease expired: another worker takes the job over.
+    second = queue.claim(lease_seconds=60)
+    assert second["id"] == job["id"] and second["attempts"] == 2
+    assert second["lease_token"] != first["lease_token"]
+
+    assert queue.renew(job["id"], first["lease_token"]) is False
+    assert queue.complete(job["id"], first["lease_token"], {"stale": True}) is False
+    assert queue.fail(job["id"], first["lease_token"], "stale") is False
+    assert queue.get(job["id"])["status"] == "running"
+
+    assert queue.complete(job["id"], second["lease_token"], {"ok": True}) is True
+    done = queue.get(job["id"])
+    assert (done["status"], done["result"], done["lease_token"]) == ("succeeded", {"ok": True}, None)
+
+
+def test_renew_keeps_the_job_from_being_reclaimed(tmp_path):
+    queue, job = _queue(tmp_path)
+    claimed = queue.claim(lease_seconds=0.05)
+
+    assert queue.renew(job["id"], claimed["lease_token"], lease_seconds=60) is True
+    time.sleep(0.06)
+    assert queue.claim() is None
+
+
+def test_transient_failure_is_requeued_until_attempts_run_out(tmp_path):
+    queue, job = _queue(tmp_path, max_attempts=2)
+
+    claimed = queue.claim()
+    assert queue.fail(job["id"], claimed["lease_token"], "timeout") is True
+    assert queue.get(job["id"])["status"] == "queued"
+
+    queue._connect().execute("UPDATE jobs SET run_after = 0")
+    claimed = queue.claim()
+    queue.fail(job["id"], claimed["lease_token"], "timeout")
+    assert queue.get(job["id"])["status"] == "failed"
+
+
+def test_expired_lease_fails_the_job_once_attempts_run_out(tmp_path):
+    queue, job = _queue(tmp_path, max_attempts=2)
+
+    for _ in range(2):
+        assert queue.claim(lease_seconds=0.01)["id"] == job["id"]
+        time.sleep(0.02)
+
+    # Both attempts ended with the worker losing its lease.
+    assert queue.claim(lease_seconds=0.01) is None
+    failed = queue.get(job["id"])
+    assert (failed["status"], failed["attempts"]) == ("failed", 2)
+    assert failed["error"] == "Lease expired after 2 attempts"
+    assert failed["lease_token"] is None
+
+
+def test_permanent_failure_is_not_retried(tmp_path):
+    queue, job = _queue(tmp_path, max_attempts=5)
+
+    claimed = queue.claim()
+    queue.fail(job["id"], claimed["lease_token"], "Invalid structured_json", permanent=True)
+
+    failed = queue.get(job["id"])
+    assert (failed["status"], failed["attempts"]) == ("failed", 1)
+
+
+@pytest.mark.parametrize("kind, payload", [
+    ("generate", {}),
+    ("generate", {"structured_json": "a cat"}),
+    ("refine", {"structured_json": {}}),
+    ("inspire", {"image": "..."}),
+])
+def test_submit_rejects_payloads_the_worker_cannot_run(tmp_path, kind, payload):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    with pytest.raises(ValueError):
+        queue.submit(kind, payload)
+
+
+def test_submit_caps_max_attempts(tmp_path, monkeypatch):
+    monkeypatch.setattr(main.settings, "JOBS_MAX_ATTEMPTS_LIMIT", 4)
+    queue, job = _queue(tmp_path, max_attempts=1000)
+    assert job["max_attempts"] == 4
+
+    with pytest.raises(ValueError):
+        queue.submit("generate", {"structured_json": {}}, max_attempts=0)
+
+
+def test_jobs_endpoint_answers_422_for_a_bad_payload():
+    with TestClient(main.app) as client:
+        response = client.post("/jobs", json={"kind": "generate", "payload": {}})
+    assert response.status_code == 422
+    assert "structured_json" in response.json()["detail"]
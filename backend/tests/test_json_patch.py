@@ -0,0 +1,96 @@
+import pytest
+
+from utils.json_patch import apply_patches, diff, parse_pointer, same
+
+
+BASE = {
+    "short_description": "a cat",
+    "lighting": {"conditions": "soft", "direction": "left"},
+    "objects": [{"description": "cat"}, {"description": "sofa"}],
+}
+
+
+def test_parse_pointer_unescapes_tokens():
+    assert parse_pointer("") == []
+    assert parse_pointer("/a~1b/c~0d/0") == ["a/b", "c~d", "0"]
+    with pytest.raises(ValueError):
+        parse_pointer("lighting")
+
+
+def test_same_is_json_equality():
+    assert same({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]})
+    assert not same(True, 1)
+    assert not same(1, 1.0)
+
+
+def test_apply_is_copy_on_write():
+    doc, changed = apply_patches(BASE, [{"path": "/lighting/conditions", "value": "hard"}])
+
+    assert changed
+    assert doc["lighting"] == {"conditions": "hard", "direction": "left"}
+    assert BASE["lighting"]["conditions"] == "soft"
+    assert doc["objects"] is BASE["objects"]  # untouched subtrees are shared
+
+
+def test_add_remove_and_append_on_lists():
+    doc, _ = apply_patches(BASE, [
+        {"op": "add", "path": "/objects/0", "value": {"description": "lamp"}},
+        {"op": "remove", "path": "/objects/2"},
+        {"op": "add", "path": "/objects/-", "value": {"description": "rug"}},
+    ])
+    assert [o["description"] for o in doc["objects"]] == ["lamp", "cat", "rug"]
+
+
+def test_missing_parents_are_created():
+    doc, _ = apply_patches(BASE, [{"path": "/photographic_characteristics/lens_focal_length", "value": "50mm"}])
+    assert doc["photographic_characteristics"] == {"lens_focal_length": "50mm"}
+
+
+def test_no_op_patches_report_unchanged():
+    doc, changed = apply_patches(BASE, [
+        {"path": "/lighting/conditions", "value": "soft"},
+        {"op": "remove", "path": "/background_setting"},
+        {"op": "remove", "path": "/objects/5"},
+    ])
+    assert not changed
+    assert doc is BASE
+
+
+def test_invalid_patches_raise():
+    with pytest.raises(ValueError):
+        apply_patches(BASE, [{"path": "/objects/5", "value": {}}])
+    with pytest.raises(ValueError):
+        apply_patches(BASE, [{"path": "/short_description/x", "value": 1}])
+    with pytest.raises(ValueError):
+        apply_patches(BASE, [{"op": "remove", "path": ""}])
+
+
+NEW = {
+    "short_description": "a cat on a sofa",
+    "lighting": {"conditions": "soft", "direction": "right", "shadows": "long"},
+    "objects": [{"description": "cat", "pose": "curled"}],
+    "aesthetics": {"mood": "calm"},
+}
+
+
+def test_diff_round_trips_through_apply():
+    patches = diff(BASE, NEW)
+    doc, changed = apply_patches(BASE, patches)
+    assert changed and same(doc, NEW)
+    assert diff(NEW, NEW) == []
+
+
+def test_diff_descends_into_changed_subtrees():
+    patches = diff(BASE, NEW)
+    paths = {p["path"] for p in patches}
+    assert "/lighting/direction" in paths
+    assert "/objects/0/pose" in paths
+    assert "/lighting" not in paths
+
+
+def test_diff_keeps_strict_json_types_and_escapes_keys():
+    old = {"flag": 1, "a/b": {"~k": 1}}
+    new = {"flag": True, "a/b": {"~k": 2}}
+    patches = diff(old, new)
+    assert {p["path"] for p in patches} == {"/flag", "/a~1b/~0k"}
+    assert same(apply_patches(old, patches)[0], new)
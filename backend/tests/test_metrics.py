@@ -0,0 +1,100 @@
+import re
+
+import pytest
+
+from utils.metrics import STAGE_ERRORS, STAGE_SECONDS, Counter, Histogram, register_collector, render_prometheus, span
+
+# One sample line of the text exposition format: name, optional labels, value.
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(,|$)')
+
+
+def _parse(text):
+    """{family: {"help", "type", "samples": [(name, labels, value)]}}, checking each line."""
+    families = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name, help_text = line[7:].split(" ", 1)
+            current = families.setdefault(name, {"samples": []})
+            current["help"] = help_text
+        elif line.startswith("# TYPE "):
+            name, kind = line[7:].split(" ")
+            assert name in families and kind in ("counter", "gauge", "histogram")
+            families[name]["type"] = kind
+        else:
+            match = SAMPLE.match(line)
+            assert match, line
+            name, _, raw_labels, value = match.groups()
+            labels = {}
+            if raw_labels:
+                pairs = LABEL.findall(raw_labels)
+                assert "".join(f'{k}="{v}"{sep}' for k, v, sep in pairs) == raw_labels, line
+                labels = {k: v for k, v, _ in pairs}
+            assert name.startswith(tuple(families)), line
+            current["samples"].append((name, labels, float(value)))
+    return families
+
+
+def test_counter_labels_are_escaped():
+    counter = Counter("test_escaped_total", "Escaping check.", ("path",))
+    counter.inc(2, path='a "quoted"\\path\nnext')
+
+    family = _parse(render_prometheus())["test_escaped_total"]
+
+    assert family["type"] == "counter"
+    assert family["samples"] == [
+        ("test_escaped_total", {"path": 'a \\"quoted\\"\\\\path\\nnext'}, 2.0)
+    ]
+
+
+def test_histogram_buckets_are_cumulative_with_inf_sum_and_count():
+    hist = Histogram("test_latency_seconds", "Bucket check.", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        hist.observe(value, route="/x")
+
+    samples = _parse(render_prometheus())["test_latency_seconds"]["samples"]
+
+    assert samples == [
+        ("test_latency_seconds_bucket", {"route": "/x", "le": "0.1"}, 1),
+        ("test_latency_seconds_bucket", {"route": "/x", "le": "1"}, 3),
+        ("test_latency_seconds_bucket", {"route": "/x", "le": "+Inf"}, 4),
+        ("test_latency_seconds_sum", {"route": "/x"}, 4.05),
+        ("test_latency_seconds_count", {"route": "/x"}, 4),
+    ]
+
+
+def test_collector_samples_are_grouped_by_family():
+    @register_collector
+    def collect():
+        yield ("test_queue_depth", "gauge", "Queue depth.", {"queue": "a"}, 1)
+        yield ("test_other", "gauge", "Other.", {}, 7)
+        yield ("test_queue_depth", "gauge", "Queue depth.", {"queue": "b"}, 2)
+
+    text = render_prometheus()
+    families = _parse(text)
+
+    assert [s[1]["queue"] for s in families["test_queue_depth"]["samples"]] == ["a", "b"]
+    assert text.count("# TYPE test_queue_depth gauge") == 1
+
+
+def _stage_count(stage):
+    series = STAGE_SECONDS._series.get((stage,))
+    return sum(series[:-1]) if series else 0
+
+
+def test_span_times_successful_blocks():
+    with span("test_ok"):
+        pass
+
+    assert _stage_count("test_ok") == 1
+    assert STAGE_ERRORS.value(stage="test_ok", error_type="ValueError") == 0
+
+
+def test_span_times_and_counts_failing_blocks():
+    with pytest.raises(ValueError):
+        with span("test_fail"):
+            raise ValueError("boom")
+
+    assert _stage_count("test_fail") == 1
+    assert STAGE_ERRORS.value(stage="test_fail", error_type="ValueError") == 1
@@ -0,0 +1,56 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.ingest import IngestedImage
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_ingest(image):
+        return IngestedImage(b"jpeg", "image/jpeg", 4)
+
+    async def fake_analysis(data, mime_type=None):
+        return {"short_description": "a mug on a table"}
+
+    async def fake_render(scene):
+        return {"image_url": "http://x/img.png", "scene_hash": "h", "media_url": None}
+
+    monkeypatch.setattr(main, "_ingest", fake_ingest)
+    monkeypatch.setattr(main, "cached_image_bytes_to_json", fake_analysis)
+    monkeypatch.setattr(main, "render_scene", fake_render)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _post(client, shot_types_json):
+    return client.post(
+        "/multi-shot",
+        files={"image": ("mug.jpg", b"jpeg", "image/jpeg")},
+        data={"shot_types_json": shot_types_json},
+    )
+
+
+@pytest.mark.parametrize("shot_types_json", ["not json", '[1, {"a": 1}]', '{"hero": 1}'])
+def test_malformed_shot_types_answer_422(client, shot_types_json):
+    response = _post(client, shot_types_json)
+    assert response.status_code == 422
+    assert "shot_types_json" in response.json()["detail"]
+
+
+def test_a_failing_shot_does_not_fail_the_others(client, monkeypatch):
+    build = main.generate_shot_json
+
+    def flaky_build(base_json, shot):
+        if shot == "broken":
+            raise ValueError("no preset")
+        return build(base_json, shot)
+
+    monkeypatch.setattr(main, "generate_shot_json", flaky_build)
+
+    response = _post(client, '["hero", "broken"]')
+
+    assert response.status_code == 200
+    hero, broken = response.json()["shots"]
+    assert hero["image_url"] == "http://x/img.png"
+    assert (broken["image_url"], broken["json"], broken["error"]) == (None, None, "no preset")
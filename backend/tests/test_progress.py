@@ -0,0 +1,42 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+from services.progress import progress
+from utils.logger import request_id_var
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_subscribe_replays_published_events(client):
+    token = request_id_var.set("req-replay")
+    try:
+        progress.publish("queued")
+        progress.publish("completed", image_url="http://x/img.png")
+    finally:
+        request_id_var.reset(token)
+
+    with client.websocket_connect("/ws/progress") as ws:
+        ws.send_text('{"subscribe": "req-replay"}')
+        assert ws.receive_json()["event"] == "queued"
+        assert ws.receive_json()["image_url"] == "http://x/img.png"
+
+
+def test_invalid_text_gets_an_error_event(client):
+    with client.websocket_connect("/ws/progress") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json() == {"event": "error", "detail": "Expected a JSON object."}
+
+
+def test_binary_frame_closes_the_socket(client):
+    with client.websocket_connect("/ws/progress") as ws:
+        ws.send_bytes(b"\x00\x01")
+        with pytest.raises(WebSocketDisconnect) as e:
+            ws.receive_text()
+        assert e.value.code == 1003
+    assert progress.connections == 0
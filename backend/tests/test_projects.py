@@ -0,0 +1,78 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from schemas.project_schema import Project
+from services.db_service import DBService, ProjectNameTaken
+
+
+def test_history_is_delta_encoded_and_checks_out_every_revision(tmp_path):
+    db = DBService(str(tmp_path / "projects.sqlite3"), snapshot_interval=3)
+    project = db.save_project(Project(name="p", data={"n": 0}))
+    scenes = [{"n": 0}] + [{"n": i, "objects": list(range(i))} for i in range(1, 7)]
+    for scene in scenes[1:]:
+        db.commit(project["id"], scene)
+
+    kinds = [r["kind"] for r in reversed(db.history(project["id"]))]
+    assert kinds == ["snapshot", "delta", "delta", "snapshot", "delta", "delta", "snapshot"]
+    assert [db.checkout(project["id"], n) for n in range(1, 8)] == scenes
+
+    # Re-committing the head scene adds no revision.
+    assert db.commit(project["id"], scenes[-1])["number"] == 7
+
+
+def test_renaming_onto_a_taken_name_raises(tmp_path):
+    db = DBService(str(tmp_path / "projects.sqlite3"))
+    db.save_project(Project(name="first", data={}))
+    second = db.save_project(Project(name="second", data={}))
+
+    with pytest.raises(ProjectNameTaken):
+        db.save_project(Project(id=second["id"], name="first", data={}))
+
+
+
+def test_unknown_id_never_retargets_a_same_named_project(tmp_path):
+    db = DBService(str(tmp_path / "projects.sqlite3"))
+    original = db.save_project(Project(name="shared", data={"n": 1}))
+
+    with pytest.raises(ProjectNameTaken):
+        db.save_project(Project(id="client-chosen-id", name="shared", data={"n": 2}))
+    assert db.get_project(original["id"])["data"] == {"n": 1}
+
+    created = db.save_project(Project(id="client-chosen-id", name="other", data={"n": 3}))
+    assert created["id"] == "client-chosen-id"
+    assert db.get_project(original["id"])["data"] == {"n": 1}
+
+@pytest.fixture
+def client(monkeypatch):
+    async def render_scene(scene):
+        raise AssertionError("rendered before the project was checked")
+
+    monkeypatch.setattr(main, "render_scene", render_scene)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_save_project_name_conflict_is_409(client):
+    first = client.post("/project/save", json={"name": "conflict-a", "data": {}}).json()["project"]
+    client.post("/project/save", json={"name": "conflict-b", "data": {}})
+
+    res = client.post("/project/save", json={"id": first["id"], "name": "conflict-b", "data": {}})
+    assert res.status_code == 409
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/generate", {"structured_json": {"short_description": "x"}}),
+    ("/refine", {"structured_json": {"short_description": "x"}, "instruction": "warmer"}),
+    ("/refine/patch", {"base_hash": "0" * 64, "patches": []}),
+])
+def test_unknown_project_is_404_before_rendering(client, path, body):
+    res = client.post(path, json={**body, "project_id": "missing"})
+    assert res.status_code == 404
+    assert res.json()["detail"] == "Project not found."
+
+
+@pytest.mark.parametrize("query", ["id=missing", "name=never-saved"])
+def test_loading_a_missing_project_is_404(client, query):
+    res = client.get(f"/project/load?{query}")
+    assert res.status_code == 404
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils import rate_limit
+from utils.rate_limit import TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock; asyncio.sleep in rate_limit advances it and records the wait."""
+    state = {"now": 100.0, "sleeps": []}
+
+    async def fake_sleep(seconds):
+        state["sleeps"].append(round(seconds, 6))
+        state["now"] += seconds
+
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: state["now"])
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", fake_sleep)
+    return state
+
+
+def _acquire(bucket, n):
+    async def run():
+        for _ in range(n):
+            await bucket.acquire()
+    asyncio.run(run())
+
+
+def test_burst_is_free_then_callers_wait_their_turn(clock):
+    bucket = TokenBucket(rate=10, burst=3)
+
+    _acquire(bucket, 3)
+    assert clock["sleeps"] == []
+
+    _acquire(bucket, 2)
+    assert clock["sleeps"] == [0.1, 0.1]
+    assert bucket.snapshot()["waited_seconds"] == 0.2
+
+
+def test_tokens_refill_with_time_up_to_the_burst(clock):
+    bucket = TokenBucket(rate=10, burst=3)
+    _acquire(bucket, 3)
+
+    clock["now"] += 0.2
+    assert bucket.snapshot()["tokens"] == 2
+
+    clock["now"] += 60
+    assert bucket.snapshot()["tokens"] == 3
+
+
+def test_concurrent_waiters_queue_behind_each_other(monkeypatch):
+    bucket = TokenBucket(rate=100, burst=1)
+    waits = []
+    sleep = asyncio.sleep
+
+    async def recording_sleep(seconds):
+        waits.append(round(seconds, 2))
+        await sleep(seconds)
+
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", recording_sleep)
+
+    async def run():
+        await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+
+    asyncio.run(run())
+    # One token free, then each reservation waits one interval longer.
+    assert waits == [0.01, 0.02, 0.03]
+
+
+def test_a_cancelled_waiter_hands_its_reservation_back():
+    bucket = TokenBucket(rate=1, burst=1)
+
+    async def run():
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return bucket.snapshot()["tokens"]
+
+    # Back to roughly zero owed, instead of a whole token in debt.
+    assert asyncio.run(run()) > -0.1
+
+
+def test_non_positive_rate_disables_limiting(clock):
+    _acquire(TokenBucket(rate=0), 50)
+    assert clock["sleeps"] == []
+
+
+def test_batch_reports_bad_items_per_item(monkeypatch):
+    async def fake_render(scene):
+        if scene["short_description"] == "explodes":
+            raise RuntimeError("Bria said no")
+        return {"image_url": "http://x/img.png", "request_id": "r1", "cached": False}
+
+    monkeypatch.setattr(main, "render_scene", fake_render)
+
+    items = [
+        {"short_description": "a cat"},
+        {},
+        {"short_description": ""},
+        {"short_description": "explodes"},
+    ]
+    with TestClient(main.app) as client:
+        response = client.post("/generate/batch", json={"items": items})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["status"] for item in body["items"]] == ["ok", "invalid", "invalid", "error"]
+    assert body["items"][1]["error"] == "structured_json is required."
+    assert "short_description" in body["items"][2]["error"]
+    assert body["items"][3]["error"] == "Bria said no"
+    assert body["summary"] == {"total": 4, "ok": 1, "error": 1, "invalid": 2}
@@ -0,0 +1,137 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils.resilience import CircuitBreaker, CircuitOpenError, RetryBudget, Upstream
+
+
+def _sender(*statuses):
+    """send() factory answering `statuses` in turn; counts calls."""
+    calls = []
+
+    async def send():
+        calls.append(1)
+        return httpx.Response(statuses[min(len(calls), len(statuses)) - 1])
+
+    return send, calls
+
+
+def _upstream(**kwargs):
+    kwargs.setdefault("base_delay", 0)
+    kwargs.setdefault("max_delay", 0)
+    return Upstream("test", **kwargs)
+
+
+# ---------- breaker ----------
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=30)
+    breaker.before(); breaker.failure()
+    breaker.before(); breaker.success()
+    breaker.before(); breaker.failure()
+    assert breaker.state == "closed"
+
+    breaker.before(); breaker.failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as e:
+        breaker.before()
+    assert 0 < e.value.retry_after <= 30
+    assert breaker.stats == {"opened": 1, "rejected": 1}
+
+
+def test_half_open_lets_one_probe_through(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utils.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=10)
+    breaker.before(); breaker.failure()
+
+    now[0] += 10
+    breaker.before()  # the probe
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+
+    breaker.failure()
+    assert breaker.state == "open"
+
+    now[0] += 10
+    breaker.before()
+    breaker.success()
+    assert breaker.state == "closed"
+    breaker.before()
+
+
+# ---------- retry budget ----------
+
+def test_retry_budget_caps_retries_at_the_ratio(monkeypatch):
+    monkeypatch.setattr("utils.resilience.time.monotonic", lambda: 0.0)
+    budget = RetryBudget(ratio=0.25, min_per_second=0, cap=1)
+    assert budget.withdraw() is True
+    assert budget.withdraw() is False
+
+    for _ in range(4):
+        budget.deposit()
+    assert budget.withdraw() is True
+    assert budget.withdraw() is False
+
+
+# ---------- upstream ----------
+
+@pytest.mark.parametrize("status, idempotent, attempts", [
+    (502, True, 3),
+    (504, True, 3),
+    (503, True, 3),
+    (502, False, 1),
+    (504, False, 1),
+    (500, False, 1),
+    (503, False, 3),
+    (429, False, 3),
+    (400, True, 1),
+])
+def test_which_statuses_are_retried(status, idempotent, attempts):
+    upstream = _upstream(failure_threshold=100)
+    send, calls = _sender(status)
+
+    response = asyncio.run(upstream.request(send, idempotent=idempotent))
+    assert response.status_code == status
+    assert len(calls) == attempts
+
+
+def test_retry_succeeds_after_transient_failure():
+    upstream = _upstream()
+    send, calls = _sender(503, 200)
+    assert asyncio.run(upstream.request(send)).status_code == 200
+    assert len(calls) == 2
+
+
+def test_non_idempotent_retries_connect_errors_only():
+    upstream = _upstream()
+    calls = []
+
+    async def send():
+        calls.append(1)
+        raise (httpx.ConnectError if len(calls) == 1 else httpx.ReadTimeout)("boom")
+
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(upstream.request(send, idempotent=False))
+    assert len(calls) == 2
+
+
+def test_open_circuit_rejects_gated_requests_only():
+    upstream = _upstream(failure_threshold=1, max_attempts=1)
+    failing, _ = _sender(503)
+    asyncio.run(upstream.request(failing))
+    assert upstream.breaker.state == "open"
+
+    ok, calls = _sender(200)
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(upstream.request(ok))
+    assert calls == []
+
+    # A poll for already-accepted work goes through and is not counted.
+    assert asyncio.run(upstream.request(ok, gated=False)).status_code == 200
+    asyncio.run(upstream.request(failing, gated=False))
+    assert upstream.breaker.stats["rejected"] == 1
+    assert upstream.breaker.state == "open"
+    assert upstream.breaker.failures == 1
@@ -0,0 +1,99 @@
+from collections import Counter
+
+import pytest
+
+from services.agent_service import auto_fix_json
+from utils.rule_engine import RuleError, RuleSet
+
+
+SCENE = {
+    "short_description": "  a cat  ",
+    "lighting": {"conditions": "soft", "direction": "left"},
+    "objects": [{"description": " cat "}, {}, {"description": "sofa"}],
+}
+
+
+def test_predicates_and_fixes():
+    rules = RuleSet([
+        {"id": "cap", "path": "/size", "when": {"gt": 10}, "fix": {"set": 10}},
+        {"id": "clamp", "path": "/ratio", "fix": {"clamp": [0, 1]}},
+        {"id": "style", "path": "/style", "when": {"in": ["sketch", "draft"]}, "fix": {"set": "photo"}},
+        {"id": "mood", "path": "/mood", "fix": {"default": "neutral"}},
+    ])
+
+    hits = Counter()
+    fixed = rules.apply({"size": 12, "ratio": 1.5, "style": "sketch"}, hits)
+
+    assert fixed == {"size": 10, "ratio": 1, "style": "photo", "mood": "neutral"}
+    assert hits == {"cap": 1, "clamp": 1, "style": 1, "mood": 1}
+
+    assert rules.apply({"size": "12", "mood": "calm"}) == {"size": "12", "mood": "calm"}
+
+
+def test_wildcard_fixes_children_before_parent():
+    rules = RuleSet([
+        {"id": "strip", "path": "/objects/*/description", "fix": {"strip": True}},
+        {"id": "drop", "path": "/objects/*", "when": {"blank": True}, "fix": {"delete": True}},
+        {"id": "drop_blank_descriptions", "path": "/objects/*/description",
+         "when": {"blank": True}, "fix": {"delete": True}},
+    ])
+
+    fixed = rules.apply({"objects": [{"description": "  "}, {"description": " cat "}]})
+
+    # The first object loses its description, is then blank and is dropped.
+    assert fixed == {"objects": [{"description": "cat"}]}
+
+
+def test_apply_never_mutates_and_shares_untouched_subtrees():
+    rules = RuleSet([{"id": "strip", "path": "/short_description", "fix": {"strip": True}}])
+
+    fixed = rules.apply(SCENE)
+
+    assert fixed["short_description"] == "a cat"
+    assert SCENE["short_description"] == "  a cat  "
+    assert fixed["lighting"] is SCENE["lighting"]
+
+    clean = {"short_description": "a cat"}
+    assert rules.apply(clean) is clean
+
+
+def test_apply_many_counts_across_scenes():
+    rules = RuleSet([{"id": "strip", "path": "/short_description", "fix": {"strip": True}}])
+    hits = Counter()
+
+    fixed = rules.apply_many([{"short_description": " a "}, {"short_description": "b"}, {"short_description": " c"}], hits)
+
+    assert [s["short_description"] for s in fixed] == ["a", "b", "c"]
+    assert hits == {"strip": 2}
+
+
+@pytest.mark.parametrize("spec", [
+    {"path": "/a", "fix": {"set": 1}},
+    {"id": "r", "path": "a", "fix": {"set": 1}},
+    {"id": "r", "path": "/a", "fix": {"set": 1, "strip": True}},
+    {"id": "r", "path": "/a", "fix": {"explode": True}},
+    {"id": "r", "path": "/a", "when": {"gt": "1"}, "fix": {"set": 1}},
+    {"id": "r", "path": "/a", "when": {"matches": "("}, "fix": {"set": 1}},
+])
+def test_bad_rules_fail_at_compile_time(spec):
+    with pytest.raises(RuleError):
+        RuleSet([spec])
+
+
+def test_duplicate_ids_are_rejected():
+    with pytest.raises(RuleError):
+        RuleSet([
+            {"id": "r", "path": "/a", "fix": {"strip": True}},
+            {"id": "r", "path": "/b", "fix": {"strip": True}},
+        ])
+
+
+def test_shipped_rules_clean_a_v2_scene():
+    fixed = auto_fix_json(SCENE)
+
+    assert fixed == {
+        "short_description": "a cat",
+        "lighting": {"conditions": "soft", "direction": "left"},
+        "objects": [{"description": "cat"}, {"description": "sofa"}],
+    }
+    assert SCENE["objects"][0] == {"description": " cat "}
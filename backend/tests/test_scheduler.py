@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from services.scheduler import BULK, INTERACTIVE, PriorityScheduler, current_lane
+
+
+def _scheduler(capacity=1, interactive=(None, 4), bulk=(None, 1)):
+    return PriorityScheduler("test", capacity, {
+        INTERACTIVE: (interactive[0] or capacity, interactive[1]),
+        BULK: (bulk[0] or capacity, bulk[1]),
+    })
+
+
+def test_capacity_bounds_concurrent_calls():
+    async def run():
+        scheduler = _scheduler(capacity=2)
+        running = peak = 0
+
+        async def call():
+            nonlocal running, peak
+            async with scheduler.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        assert peak == 2
+        assert scheduler.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_lane_cap_leaves_room_for_the_other_lane():
+    async def run():
+        scheduler = _scheduler(capacity=3, bulk=(1, 1))
+        release = asyncio.Event()
+
+        async def hold(lane):
+            async with scheduler.slot(lane):
+                await release.wait()
+
+        bulk = [asyncio.ensure_future(hold(BULK)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert scheduler.lanes[BULK].in_flight == 1
+        assert len(scheduler.lanes[BULK].waiters) == 2
+
+        interactive = asyncio.ensure_future(hold(INTERACTIVE))
+        await asyncio.sleep(0)
+        assert scheduler.lanes[INTERACTIVE].in_flight == 1
+
+        release.set()
+        await asyncio.gather(*bulk, interactive)
+
+    asyncio.run(run())
+
+
+def test_waiting_lanes_share_slots_by_weight():
+    async def run():
+        scheduler = _scheduler(capacity=1, interactive=(None, 4), bulk=(None, 1))
+        order = []
+        gate = asyncio.Event()
+
+        async def blocker():
+            async with scheduler.slot(INTERACTIVE):
+                await gate.wait()
+
+        async def call(lane):
+            async with scheduler.slot(lane):
+                order.append(lane)
+
+        held = asyncio.ensure_future(blocker())
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(call(lane)) for lane in [INTERACTIVE] * 20 + [BULK] * 20]
+        await asyncio.sleep(0)
+
+        gate.set()
+        await asyncio.gather(held, *waiters)
+
+        first = order[:20]
+        assert first.count(INTERACTIVE) == 16
+        assert first.count(BULK) == 4
+
+    asyncio.run(run())
+
+
+def test_lane_defaults_to_the_context_lane():
+    async def run():
+        scheduler = _scheduler(capacity=2)
+        current_lane.set(BULK)
+        async with scheduler.slot():
+            assert scheduler.lanes[BULK].in_flight == 1
+            assert scheduler.lanes[INTERACTIVE].in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def run():
+        scheduler = _scheduler(capacity=1)
+        gate = asyncio.Event()
+
+        async def hold():
+            async with scheduler.slot():
+                await gate.wait()
+
+        held = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert not scheduler.lanes[INTERACTIVE].waiters
+
+        gate.set()
+        await held
+        assert scheduler.in_flight == 0
+        async with scheduler.slot():
+            assert scheduler.in_flight == 1
+
+    asyncio.run(run())
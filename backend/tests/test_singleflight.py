@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def run():
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"value": calls}
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+        assert calls == 1
+        assert all(r is results[0] for r in results)
+        assert flight.snapshot() == {"leaders": 1, "coalesced": 4, "abandoned": 0, "in_flight": 0}
+
+        # Once settled, the next call runs again.
+        await flight.do("k", work)
+        assert calls == 2
+
+    asyncio.run(run())
+
+
+def test_every_waiter_gets_the_exception():
+    async def run():
+        flight = SingleFlight("test")
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(*(flight.do("k", boom) for _ in range(3)), return_exceptions=True)
+        assert [str(r) for r in results] == ["upstream down"] * 3
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_leaves_the_others_running():
+    async def run():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert flight.stats["abandoned"] == 0
+
+    asyncio.run(run())
+
+
+def test_shared_task_is_cancelled_when_the_last_waiter_leaves():
+    async def run():
+        flight = SingleFlight("test")
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+        assert cancelled.is_set()
+        assert flight.snapshot()["in_flight"] == 0
+        assert flight.stats["abandoned"] == 1
+
+    asyncio.run(run())
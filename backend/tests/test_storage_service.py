@@ -0,0 +1,32 @@
+import os
+import time
+
+from services.storage_service import StorageService
+
+
+def _png(seed: int) -> bytes:
+    return b"\x89PNG\r\n\x1a\n" + bytes([seed]) * 1000
+
+
+def test_sweep_evicts_least_recently_served_blobs(tmp_path):
+    store = StorageService(str(tmp_path), thumbnail_sizes=())
+    digests = [store.put(_png(i)) for i in range(4)]
+    now = time.time()
+    for age, digest in zip((40, 30, 20, 10), digests):
+        os.utime(store.blob_path(digest), (now - age, now - age))
+
+    store.touch(digests[0])  # served just now
+    store.link("scene-1", digests[1])
+    store.max_total_bytes = 2 * len(_png(0))
+    store.sweep()
+
+    assert [store.has(d) for d in digests] == [True, False, False, True]
+    assert store.resolve("scene-1") is None
+    assert store.stats["evicted"] == 2
+
+
+def test_unbounded_store_never_sweeps(tmp_path):
+    store = StorageService(str(tmp_path), thumbnail_sizes=(), sweep_interval=0)
+    digests = [store.put(_png(i)) for i in range(3)]
+    assert all(store.has(d) for d in digests)
+    assert store.stats["evicted"] == 0
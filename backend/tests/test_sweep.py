@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+import main
+from services.sweep_service import check_axes, iter_variants, sweep_size
+
+
+BASE = {
+    "short_description": "a cat",
+    "lighting": {"conditions": "soft", "direction": "left"},
+}
+
+
+def test_check_axes_and_size():
+    assert sweep_size({"/a": [1, 2], "/b": [1, 2, 3]}) == 6
+    with pytest.raises(ValueError):
+        check_axes({"": [{}]})
+    with pytest.raises(ValueError):
+        check_axes({"/lighting/conditions": []})
+
+
+def test_variants_are_row_major_and_deduplicated():
+    variants = list(iter_variants(BASE, {
+        "/lighting/conditions": ["soft", "hard"],
+        "/short_description": ["a cat", " a cat "],
+    }))
+
+    assert [v["coords"] for v in variants] == [
+        {"/lighting/conditions": "soft", "/short_description": "a cat"},
+        {"/lighting/conditions": "soft", "/short_description": " a cat "},
+        {"/lighting/conditions": "hard", "/short_description": "a cat"},
+        {"/lighting/conditions": "hard", "/short_description": " a cat "},
+    ]
+    # Auto-fix strips the description, so the padded values resolve to the same scenes.
+    assert [v.get("duplicate_of") for v in variants] == [None, 0, None, 2]
+    assert BASE["lighting"]["conditions"] == "soft"
+
+
+def test_unappliable_values_make_the_variant_invalid():
+    variants = list(iter_variants(BASE, {"/short_description/x": ["y"]}))
+
+    assert variants[0]["scene_hash"] is None
+    assert variants[0]["errors"]
+
+
+def _collect(variants, concurrency):
+    async def run():
+        return [cell async for cell in main._sweep_cells(variants, concurrency)]
+    return asyncio.run(run())
+
+
+def test_duplicates_take_their_twins_status(monkeypatch):
+    async def fake_render(scene):
+        if scene["lighting"]["conditions"] == "broken":
+            raise RuntimeError("upstream failed")
+        return {"image_url": "http://x/" + scene["lighting"]["conditions"], "media_url": None, "cached": False}
+
+    monkeypatch.setattr(main, "render_scene", fake_render)
+
+    variants = iter_variants(BASE, {
+        "/lighting/conditions": ["hard", "broken"],
+        "/short_description": ["a cat", " a cat ", ""],
+    })
+    cells = {cell["index"]: cell for cell in _collect(variants, concurrency=2)}
+
+    assert cells[1]["status"] == "ok" and cells[1]["duplicate_of"] == 0
+    assert cells[1]["image_url"] == cells[0]["image_url"] == "http://x/hard"
+    assert cells[4]["status"] == "error" and cells[4]["duplicate_of"] == 3
+    assert cells[2]["status"] == cells[5]["status"] == "invalid"
+
+    summary = main._sweep_summary(list(cells.values()))
+    assert summary == {"total": 6, "ok": 2, "error": 2, "invalid": 2, "duplicates": 2}
+
+
+def test_invalid_twins_duplicates_are_invalid_too():
+    variants = iter_variants(BASE, {"/short_description": ["", " "]})
+    cells = _collect(variants, concurrency=1)
+
+    assert [cell["status"] for cell in cells] == ["invalid", "invalid"]
+    assert cells[1]["duplicate_of"] == 0
+    assert cells[1]["error"] == cells[0]["error"]
+
+
+def test_variants_are_pulled_as_render_slots_free_up(monkeypatch):
+    cells = []
+    pulled = 0
+    in_flight = peak = 0
+
+    async def fake_render(scene):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"image_url": "http://x", "media_url": None, "cached": False}
+
+    monkeypatch.setattr(main, "render_scene", fake_render)
+
+    def tracked(variants):
+        nonlocal pulled
+        for variant in variants:
+            pulled += 1
+            # Never more than `concurrency` variants ahead of what has settled.
+            assert pulled - len(cells) <= 2
+            yield variant
+
+    async def run():
+        variants = tracked(iter_variants(BASE, {"/lighting/direction": list("abcdefgh")}))
+        async for cell in main._sweep_cells(variants, 2):
+            cells.append(cell)
+
+    asyncio.run(run())
+
+    assert sorted(cell["index"] for cell in cells) == list(range(8))
+    assert peak == 2
@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+from services import translation_cache as tc
+from services.cache_service import versioned_cache_dir
+
+
+def test_whitespace_and_case_variants_share_a_key():
+    assert tc.translation_key("A  Red\n Mug ") == tc.translation_key("a red mug")
+    assert tc.translation_key("a red mug") != tc.translation_key("a blue mug")
+
+
+def test_equivalent_prompts_translate_once(monkeypatch):
+    calls = []
+
+    async def fake_translate(prompt):
+        calls.append(prompt)
+        return {"short_description": "a teapot"}
+
+    monkeypatch.setattr(tc, "prompt_to_json_async", fake_translate)
+
+    async def run():
+        first = await tc.cached_prompt_to_json("A teapot  on a SHELF")
+        first["short_description"] = "mutated by the caller"
+        return await tc.cached_prompt_to_json("a teapot on a shelf\n")
+
+    assert asyncio.run(run()) == {"short_description": "a teapot"}
+    assert calls == ["A teapot  on a SHELF"]
+
+
+def test_prompt_or_model_changes_change_the_version():
+    base = tc.prompt_version("gemini-a", "schema v1")
+
+    assert tc.prompt_version("gemini-a", "schema v1") == base
+    assert tc.prompt_version("gemini-a", "schema v2") != base
+    assert tc.prompt_version("gemini-b", "schema v1") != base
+
+
+def test_new_version_purges_sibling_directories(tmp_path):
+    root = tmp_path / "translations"
+    old = tc.prompt_version("gemini-a", "schema v1")
+    new = tc.prompt_version("gemini-a", "schema v2")
+
+    os.makedirs(root / old)
+    (root / old / "entry.json").write_text("{}")
+
+    assert versioned_cache_dir(str(root), new) == str(root / new)
+    assert os.listdir(root) == []  # the new version's dir is created by DiskCache on first write
+
+    assert versioned_cache_dir(None, new) is None
@@ -0,0 +1,48 @@
+import hashlib
+import math
+
+import orjson
+
+
+# Floats are rounded to this many significant digits before hashing so that
+# 0.30000000000000004 and 0.3 (or 1.0 and 1) address the same cache entry.
+FLOAT_SIGNIFICANT_DIGITS = 6
+
+# orjson only serializes 64-bit integers. Integral values outside this
+# range stay (or become) floats, so 1e20 and 10**20 still hash alike.
+INT64_MIN, INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+def _normalize(value):
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+
+    if isinstance(value, int) and INT64_MIN <= value <= INT64_MAX:
+        return value
+
+    if isinstance(value, (int, float)):
+        value = float(value)
+        if math.isnan(value) or math.isinf(value):
+            return str(value)
+        value = float(f"{value:.{FLOAT_SIGNIFICANT_DIGITS}g}")
+        if value.is_integer() and INT64_MIN <= value <= INT64_MAX:
+            return int(value)
+        return value
+
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+
+    return str(value)
+
+
+def canonical_json(value) -> bytes:
+    """Serialize with sorted keys, normalized floats and no whitespace."""
+    return orjson.dumps(_normalize(value), option=orjson.OPT_SORT_KEYS)
+
+
+def canonical_hash(value, params=None) -> str:
+    """SHA-256 of the canonical form of a scene plus its generation params."""
+    return hashlib.sha256(canonical_json({"scene": value, "params": params or {}})).hexdigest()
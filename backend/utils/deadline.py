@@ -0,0 +1,77 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional
+
+from utils.metrics import Counter
+
+# Absolute deadline of the current request, in event-loop time (None: no
+# deadline). Set per request from X-Request-Timeout or the server default.
+deadline_var: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+REQUESTS_CANCELLED = Counter(
+    "studio_requests_cancelled_total",
+    "Requests whose work was cancelled, by reason (deadline, client_disconnect).",
+    ("reason",),
+)
+DEADLINES_EXCEEDED = Counter(
+    "studio_deadline_exceeded_total", "Waits cut short by the request deadline, by stage.", ("stage",)
+)
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during {stage}")
+        self.stage = stage
+
+
+def parse_timeout(value: Optional[str], default: float, maximum: float) -> float:
+    """X-Request-Timeout (seconds) → a timeout within (0, maximum]; junk means default."""
+    try:
+        seconds = float(value) if value else default
+    except ValueError:
+        seconds = default
+    if not seconds > 0:
+        seconds = default
+    return min(seconds, maximum)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (never negative), or None."""
+    when = deadline_var.get()
+    if when is None:
+        return None
+    return max(0.0, when - asyncio.get_running_loop().time())
+
+
+@asynccontextmanager
+async def within_deadline(stage: str):
+    """
+    Cancel the body when the request deadline passes and raise
+    DeadlineExceeded instead. A no-op when there is no deadline.
+    """
+    when = deadline_var.get()
+    if when is None:
+        yield
+        return
+
+    try:
+        async with asyncio.timeout_at(when) as scope:
+            yield
+    except TimeoutError:
+        if not scope.expired():
+            raise
+        DEADLINES_EXCEEDED.inc(stage=stage)
+        raise DeadlineExceeded(stage) from None
+
+
+def without_deadline(factory: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+    """
+    For work shared through SingleFlight: the shared task must not inherit
+    the deadline of whichever caller started it. Each caller enforces its
+    own with within_deadline, and the task is cancelled once all have left.
+    """
+    async def run():
+        deadline_var.set(None)
+        return await factory()
+    return run
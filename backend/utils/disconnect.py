@@ -0,0 +1,76 @@
+import asyncio
+
+from utils.deadline import REQUESTS_CANCELLED
+
+
+class CancelOnDisconnect:
+    """
+    ASGI middleware that cancels a request's work when its client goes away.
+
+    Once the app has consumed the request body, this middleware becomes the
+    only reader of `receive`. An `http.disconnect` before the response is
+    complete cancels the app task, so Bria polling, pending multi-shot or
+    batch renders, and Gemini calls stop instead of finishing for nobody.
+    Single-flight work shared with other live requests keeps running.
+    Tasks started with `?background=true` are not children of the request
+    and are unaffected.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        has_body = b"transfer-encoding" in headers or headers.get(b"content-length", b"0") != b"0"
+
+        body_done = asyncio.Event()
+        if not has_body:
+            body_done.set()
+        forwarded: asyncio.Queue = asyncio.Queue()
+        response_done = False
+        cancelled = False
+
+        async def app_receive():
+            if body_done.is_set():
+                return await forwarded.get()
+            message = await receive()
+            if message["type"] != "http.request" or not message.get("more_body", False):
+                body_done.set()
+            if message["type"] == "http.disconnect":
+                forwarded.put_nowait(message)
+            return message
+
+        async def app_send(message):
+            nonlocal response_done
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_done = True
+            await send(message)
+
+        task = asyncio.ensure_future(self.app(scope, app_receive, app_send))
+
+        async def watch():
+            nonlocal cancelled
+            await body_done.wait()
+            while True:
+                message = await receive()
+                forwarded.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    break
+            if not response_done and not task.done():
+                cancelled = True
+                REQUESTS_CANCELLED.inc(reason="client_disconnect")
+                task.cancel()
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await task
+        except asyncio.CancelledError:
+            if not cancelled:
+                raise
+        finally:
+            watcher.cancel()
+            if not task.done():
+                task.cancel()
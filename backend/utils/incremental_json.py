@@ -0,0 +1,68 @@
+import json
+from typing import Any, List, Tuple
+
+
+class IncrementalObjectParser:
+    """
+    Feed a JSON object in arbitrary text chunks and get each top-level
+    member back as soon as its value is complete.
+
+    Anything before the first `{` and after the matching `}` is ignored,
+    which makes it tolerant of ```json fences and chatter around the object
+    even when a fence is split across chunks.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._root_start = -1
+        self._member_start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        members = []
+
+        while self._pos < len(self.buffer) and not self.done:
+            ch = self.buffer[self._pos]
+
+            if self._root_start < 0:
+                if ch == "{":
+                    self._root_start = self._pos
+                    self._member_start = self._pos + 1
+                    self._depth = 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    members.extend(self._take_member(self._pos))
+                    self.done = True
+            elif ch == "," and self._depth == 1:
+                members.extend(self._take_member(self._pos))
+                self._member_start = self._pos + 1
+
+            self._pos += 1
+
+        return members
+
+    def _take_member(self, end: int) -> List[Tuple[str, Any]]:
+        text = self.buffer[self._member_start:end].strip()
+        if not text:
+            return []
+        try:
+            return list(json.loads("{" + text + "}").items())
+        except ValueError:
+            return []  # malformed member; the final full parse will report it
@@ -0,0 +1,167 @@
+from typing import Any, Iterable, List, Tuple
+
+_MISSING = object()
+
+
+def parse_pointer(path: str) -> List[str]:
+    """RFC 6901 JSON pointer → list of unescaped reference tokens."""
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer: {path!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in path[1:].split("/")]
+
+
+def same(a: Any, b: Any) -> bool:
+    """JSON equality: unlike ==, True != 1 and 1 != 1.0."""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(v, b[k]) for k, v in a.items())
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit():
+        raise ValueError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise ValueError(f"Array index out of range: {token!r}")
+    return index
+
+
+def get_at(doc: Any, tokens: List[str]) -> Any:
+    """Value at `tokens`, or the module-private _MISSING sentinel."""
+    node = doc
+    for token in tokens:
+        if isinstance(node, dict):
+            node = node.get(token, _MISSING)
+        elif isinstance(node, list):
+            if not token.isdigit() or int(token) >= len(node):
+                return _MISSING
+            node = node[int(token)]
+        else:
+            return _MISSING
+        if node is _MISSING:
+            return _MISSING
+    return node
+
+
+def _with(node: Any, tokens: List[str], op: str, value: Any) -> Any:
+    """
+    Copy-on-write update: only the containers along `tokens` are copied, so
+    the original document is never mutated and untouched subtrees are shared.
+    """
+    token, rest = tokens[0], tokens[1:]
+
+    if node is None or node is _MISSING:
+        node = {}
+
+    if isinstance(node, dict):
+        updated = dict(node)
+        if rest:
+            updated[token] = _with(node.get(token, _MISSING), rest, op, value)
+        elif op == "remove":
+            updated.pop(token, None)
+        else:
+            updated[token] = value
+        return updated
+
+    if isinstance(node, list):
+        updated = list(node)
+        if rest:
+            i = _index(node, token)
+            updated[i] = _with(node[i], rest, op, value)
+        elif op == "remove":
+            del updated[_index(node, token)]
+        elif op == "add":
+            updated.insert(_index(node, token, allow_end=True), value)
+        else:
+            i = _index(node, token, allow_end=True)
+            if i == len(updated):
+                updated.append(value)
+            else:
+                updated[i] = value
+        return updated
+
+    raise ValueError(f"Cannot descend into {type(node).__name__} at {token!r}")
+
+
+def apply_patches(doc: Any, patches: Iterable[Any]) -> Tuple[Any, bool]:
+    """
+    Apply `patches` (objects or dicts with `path`, `value` and optional
+    `op` of replace/add/remove) without mutating `doc`.
+
+    Returns (new_doc, changed). Patches that would leave the value as it
+    already is are skipped, so `changed` is False for an all-no-op list.
+    """
+    changed = False
+
+    for patch in patches:
+        if isinstance(patch, dict):
+            path, value, op = patch["path"], patch.get("value"), patch.get("op", "replace")
+        else:
+            path, value, op = patch.path, patch.value, getattr(patch, "op", "replace")
+
+        tokens = parse_pointer(path)
+        if not tokens:
+            if op == "remove":
+                raise ValueError("Cannot remove the document root")
+            if not same(value, doc):
+                doc, changed = value, True
+            continue
+
+        current = get_at(doc, tokens)
+        if op == "remove":
+            if current is _MISSING:
+                continue
+        elif op == "replace" and current is not _MISSING and same(current, value):
+            continue
+
+        doc = _with(doc, tokens, op, value)
+        changed = True
+
+    return doc, changed
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def diff(old: Any, new: Any, path: str = "") -> List[dict]:
+    """
+    Patches that turn `old` into `new` under apply_patches. Dicts and lists
+    are diffed recursively, so an edit deep inside a scene costs one small
+    patch rather than a copy of the document.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        patches = []
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                patches.append({"op": "add", "path": child, "value": value})
+            elif not same(old[key], value):
+                patches.extend(diff(old[key], value, child))
+        for key in old:
+            if key not in new:
+                patches.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        return patches
+
+    if isinstance(old, list) and isinstance(new, list):
+        patches = []
+        for i in range(min(len(old), len(new))):
+            if not same(old[i], new[i]):
+                patches.extend(diff(old[i], new[i], f"{path}/{i}"))
+        for value in new[len(old):]:
+            patches.append({"op": "add", "path": f"{path}/-", "value": value})
+        for i in range(len(old) - 1, len(new) - 1, -1):
+            patches.append({"op": "remove", "path": f"{path}/{i}"})
+        return patches
+
+    if same(old, new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
@@ -1,9 +1,68 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
+from contextvars import ContextVar
+
+# Set per HTTP request by the request-id middleware (or per job by the
+# worker) and stamped on every log record emitted while handling it.
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Resolve args and the traceback on the calling thread (the stock
+        # QueueHandler flattens them into `msg`), keeping them separate so
+        # the JSON formatter can emit the traceback as its own field.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class _JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in getattr(record, "fields", {}).items():
+            entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
 
 logger = logging.getLogger('studio')
-handler = logging.StreamHandler()
-formatter = logging.Formatter('[%(levelname)s] %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
-logger.setLevel(logging.INFO
-)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logger.propagate = False
+
+# The request path only enqueues records; a listener thread formats and
+# writes them, so slow stdout/log shipping never blocks the event loop.
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+
+_queue_handler = _QueueHandler(_queue)
+_queue_handler.addFilter(_RequestIdFilter())
+logger.addHandler(_queue_handler)
+
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_JSONFormatter())
+
+_listener = logging.handlers.QueueListener(_queue, _stream_handler)
+_listener.start()
+atexit.register(_listener.stop)
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, holding at most `burst`.
+
+    Each caller reserves a token up front (the balance may go negative) and
+    sleeps until its reservation is covered, so waiters are served in
+    arrival order without a lock tied to one event loop. A rate <= 0
+    disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self.waited_seconds = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+
+        self._refill()
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return
+
+        wait = -self._tokens / self.rate
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            self._tokens += 1  # hand the reservation back
+            raise
+
+        self.waited_seconds += wait
+
+    def snapshot(self):
+        self._refill()
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 3),
+            "waited_seconds": round(self.waited_seconds, 3),
+        }
@@ -0,0 +1,290 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import Counter
+
+# Retried (budget permitting) and counted against the breaker. A plain 500
+# is only counted: for a non-idempotent submit it may have been accepted.
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+FAILURE_STATUSES = (429, 500, 502, 503, 504)
+# Non-idempotent requests are only retried on answers that mean the request
+# was refused before being processed; a 502/504 may come from a gateway
+# that already forwarded it.
+REFUSED_STATUSES = (429, 503)
+
+UPSTREAM_RETRIES = Counter(
+    "studio_upstream_retries_total", "Retried upstream requests.", ("upstream",)
+)
+UPSTREAM_HEDGES = Counter(
+    "studio_upstream_hedges_total", "Hedged duplicate requests, by which copy won.", ("upstream", "winner")
+)
+UPSTREAM_REJECTED = Counter(
+    "studio_upstream_rejected_total", "Requests failed fast by an open circuit.", ("upstream",)
+)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open); retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    closed → open after `failure_threshold` consecutive failures; open
+    rejects immediately for `reset_seconds`, then half-open lets a single
+    probe through: success closes the circuit, failure re-opens it. A probe
+    that never reports back (cancelled) is replaced after `reset_seconds`.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def before(self):
+        """Raise CircuitOpenError unless a request may be sent now."""
+        now = time.monotonic()
+
+        if self.state == "open":
+            retry_after = self.opened_at + self.reset_seconds - now
+            if retry_after > 0:
+                self._reject(retry_after)
+            self.state = "half_open"
+            self._probe_started = None
+
+        if self.state == "half_open":
+            if self._probe_started is not None and now - self._probe_started < self.reset_seconds:
+                self._reject(self.reset_seconds - (now - self._probe_started))
+            self._probe_started = now
+
+    def _reject(self, retry_after: float):
+        self.stats["rejected"] += 1
+        UPSTREAM_REJECTED.inc(upstream=self.name)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probe_started = None
+
+    def failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.stats["opened"] += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self._probe_started = None
+
+    def record_status(self, status_code: int):
+        if status_code in FAILURE_STATUSES:
+            self.failure()
+        else:
+            self.success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_after = 0.0
+        if self.state == "open":
+            retry_after = max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after": round(retry_after, 1),
+            **self.stats,
+        }
+
+
+class RetryBudget:
+    """
+    Retries may add at most `ratio` extra load: every request deposits
+    `ratio` tokens, every retry spends one. `min_per_second` keeps a trickle
+    of retries available at low traffic. Once spent, failures surface
+    immediately instead of multiplying load on a struggling upstream.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1, cap: float = 20):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.cap = cap
+        self._tokens = cap
+        self._updated = time.monotonic()
+
+    def deposit(self):
+        now = time.monotonic()
+        refill = (now - self._updated) * self.min_per_second + self.ratio
+        self._tokens = min(self.cap, self._tokens + refill)
+        self._updated = now
+
+    def withdraw(self) -> bool:
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"tokens": round(self._tokens, 2), "ratio": self.ratio}
+
+
+class LatencyTracker:
+    def __init__(self, size: int = 512):
+        self._samples: "deque[float]" = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, p: float, min_samples: int = 1) -> Optional[float]:
+        if len(self._samples) < max(1, min_samples):
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Upstream:
+    """
+    Breaker + retry budget (+ optional hedging) around one upstream API.
+
+    `send` is a zero-argument coroutine factory returning an httpx.Response
+    so every retry or hedge issues a fresh request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 2,
+        budget_ratio: float = 0.2,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_delay: float = 0.5,
+        hedge_min_samples: int = 20,
+    ):
+        self.name = name
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_seconds)
+        self.budget = RetryBudget(budget_ratio)
+        self.latency = LatencyTracker()
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+
+    def hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile is None:
+            return None
+        p = self.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+        return None if p is None else max(p, self.hedge_min_delay)
+
+    async def request(
+        self,
+        send: Callable[[], Awaitable[Any]],
+        idempotent: bool = True,
+        hedge: bool = False,
+        gated: bool = True,
+    ):
+        """
+        Send through the breaker, retrying retryable statuses and transport
+        errors with full-jitter backoff while attempts and budget last.
+        Non-idempotent requests are only retried when nothing was processed
+        (connect failures, 429/503). The last response is returned as-is;
+        callers keep their own status handling.
+
+        `gated=False` bypasses the breaker entirely (no rejection, no
+        failure counted): for follow-ups on work the upstream already
+        accepted, such as status polls, which must not fail because new
+        submits are being shed.
+        """
+        import httpx
+
+        safe_errors = (httpx.TransportError,) if idempotent else (
+            httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout
+        )
+        retryable = RETRYABLE_STATUSES if idempotent else REFUSED_STATUSES
+        self.budget.deposit()
+
+        for attempt in range(1, self.max_attempts + 1):
+            if gated:
+                self.breaker.before()
+            started = time.monotonic()
+            try:
+                delay = self.hedge_delay() if hedge and idempotent else None
+                response = await (self._hedged(send, delay) if delay else send())
+            except httpx.TransportError as e:
+                if gated:
+                    self.breaker.failure()
+                if not isinstance(e, safe_errors) or not self._may_retry(attempt):
+                    raise
+                wait = None
+            else:
+                if gated:
+                    self.breaker.record_status(response.status_code)
+                if response.status_code not in retryable:
+                    self.latency.add(time.monotonic() - started)
+                    return response
+                if not self._may_retry(attempt):
+                    return response
+                wait = _retry_after(response)
+
+            UPSTREAM_RETRIES.inc(upstream=self.name)
+            backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+            await asyncio.sleep(min(self.max_delay, wait) if wait is not None else backoff)
+
+    def _may_retry(self, attempt: int) -> bool:
+        return attempt < self.max_attempts and self.budget.withdraw()
+
+    async def _hedged(self, send, delay: float):
+        """
+        Start `send`; if it hasn't answered within `delay`, start a second
+        copy and take whichever completes first (errors lose to answers).
+        """
+        first = asyncio.ensure_future(send())
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return first.result()
+
+            second = asyncio.ensure_future(send())
+            tasks.add(second)
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        UPSTREAM_HEDGES.inc(upstream=self.name, winner="hedge" if task is second else "primary")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.latency.percentile(0.95)
+        return {
+            **self.breaker.snapshot(),
+            "retry_budget": self.budget.snapshot(),
+            "latency_p95": round(p95, 3) if p95 is not None else None,
+            "hedge_delay": self.hedge_delay(),
+        }
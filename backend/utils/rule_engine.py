@@ -0,0 +1,222 @@
+import copy
+import re
+from collections import Counter as HitCounter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Stands in for an absent key so rules can test for (and fill in) it.
+MISSING = object()
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_blank(value) -> bool:
+    if isinstance(value, str):
+        return not value.strip()
+    return isinstance(value, (list, dict)) and not value
+
+
+_TYPES = {
+    "number": _is_number,
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "null": lambda v: v is None,
+}
+
+
+def _predicate(op: str, arg) -> Callable[[Any], bool]:
+    """One `when` clause → test(value). Every test but `missing` fails on MISSING."""
+    if op in ("gt", "gte", "lt", "lte"):
+        if not _is_number(arg):
+            raise RuleError(f"'{op}' needs a number")
+        compare = {
+            "gt": lambda v: v > arg,
+            "gte": lambda v: v >= arg,
+            "lt": lambda v: v < arg,
+            "lte": lambda v: v <= arg,
+        }[op]
+        return lambda v: _is_number(v) and compare(v)
+    if op == "eq":
+        return lambda v: v is not MISSING and v == arg
+    if op == "ne":
+        return lambda v: v is not MISSING and v != arg
+    if op in ("in", "not_in"):
+        if not isinstance(arg, list):
+            raise RuleError(f"'{op}' needs a list")
+        options = list(arg)
+        if op == "in":
+            return lambda v: v is not MISSING and v in options
+        return lambda v: v is not MISSING and v not in options
+    if op == "type":
+        if arg not in _TYPES:
+            raise RuleError(f"unknown type {arg!r}")
+        return _TYPES[arg]
+    if op == "blank":
+        return lambda v: v is not MISSING and _is_blank(v) == bool(arg)
+    if op == "missing":
+        return lambda v: (v is MISSING or v is None) == bool(arg)
+    if op == "matches":
+        pattern = re.compile(arg)
+        return lambda v: isinstance(v, str) and pattern.search(v) is not None
+    raise RuleError(f"unknown predicate {op!r}")
+
+
+def _fix(spec: Dict[str, Any]) -> Tuple[Callable[[Any], Any], bool]:
+    """`fix` spec → (fix(value) → new value or MISSING, applies_to_missing)."""
+    if len(spec) != 1:
+        raise RuleError("fix needs exactly one operation")
+    (op, arg), = spec.items()
+
+    if op == "set":
+        return (lambda v: copy.deepcopy(arg)), False
+    if op == "default":
+        return (lambda v: copy.deepcopy(arg) if v is MISSING or v is None else v), True
+    if op == "clamp":
+        if not (isinstance(arg, list) and len(arg) == 2 and all(_is_number(x) for x in arg)):
+            raise RuleError("'clamp' needs [min, max]")
+        lo, hi = arg
+        return (lambda v: min(hi, max(lo, v)) if _is_number(v) else v), False
+    if op == "strip":
+        return (lambda v: v.strip() if isinstance(v, str) else v), False
+    if op == "delete":
+        return (lambda v: MISSING), False
+    raise RuleError(f"unknown fix {op!r}")
+
+
+class _Rule:
+    __slots__ = ("id", "tests", "fix", "on_missing")
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.id = spec["id"]
+        when = spec.get("when") or {}
+        self.tests = [_predicate(op, arg) for op, arg in when.items()]
+        self.fix, default_fix = _fix(spec["fix"])
+        self.on_missing = default_fix or when.get("missing") is True
+
+    def apply(self, value):
+        if value is MISSING and not self.on_missing:
+            return value
+        if all(test(value) for test in self.tests):
+            return self.fix(value)
+        return value
+
+
+class _Node:
+    __slots__ = ("children", "rules", "on_missing")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.rules: List[_Rule] = []
+        self.on_missing = False
+
+
+def _split(path: str) -> List[str]:
+    if not path.startswith("/"):
+        raise RuleError("path must be a JSON pointer starting with '/'")
+    return [part.replace("~1", "/").replace("~0", "~") for part in path[1:].split("/")]
+
+
+def _same(a, b) -> bool:
+    return a is b or (type(a) is type(b) and a == b)
+
+
+class RuleSet:
+    """
+    Declarative rules compiled into a trie keyed by JSON-pointer segments
+    (`*` matches every array item / object value):
+
+        {"id": "drop_empty_objects", "path": "/objects/*",
+         "when": {"blank": true}, "fix": {"delete": true}}
+
+    `when` clauses all have to hold (see `_predicate`); `fix` is one of set,
+    default, clamp, strip or delete. One walk per scene visits only paths
+    that have rules, so the cost follows the scene, not the rule count.
+    Children are fixed before their parent; rules on one path run in order.
+
+    Never mutates its input: changed containers are copied on the way back
+    up and untouched subtrees are shared, so a scene no rule changes is
+    returned as the very same object.
+    """
+
+    def __init__(self, specs: Iterable[Dict[str, Any]]):
+        self.root = _Node()
+        self.rule_ids: List[str] = []
+        for spec in specs:
+            rule_id = spec.get("id")
+            if not rule_id or rule_id in self.rule_ids:
+                raise RuleError(f"every rule needs a unique id (got {rule_id!r})")
+            try:
+                rule = _Rule(spec)
+                segments = _split(spec["path"])
+            except (KeyError, TypeError, re.error) as e:
+                raise RuleError(f"rule {rule_id}: {e}") from e
+            except RuleError as e:
+                raise RuleError(f"rule {rule_id}: {e}") from e
+
+            node = self.root
+            for segment in segments:
+                node = node.children.setdefault(segment, _Node())
+            node.rules.append(rule)
+            node.on_missing = node.on_missing or rule.on_missing
+            self.rule_ids.append(rule_id)
+
+    def apply(self, scene, hits: Optional[HitCounter] = None):
+        """Fixed copy of `scene` (or `scene` itself); counts changes per rule into `hits`."""
+        result = self._walk(self.root, scene, hits if hits is not None else HitCounter())
+        return None if result is MISSING else result
+
+    def apply_many(self, scenes: Iterable[Any], hits: Optional[HitCounter] = None) -> List[Any]:
+        hits = hits if hits is not None else HitCounter()
+        return [self.apply(scene, hits) for scene in scenes]
+
+    def _walk(self, node: _Node, value, hits: HitCounter):
+        if node.children and isinstance(value, (dict, list)):
+            value = self._walk_children(node, value, hits)
+
+        for rule in node.rules:
+            fixed = rule.apply(value)
+            if not _same(fixed, value):
+                hits[rule.id] += 1
+                value = fixed
+        return value
+
+    def _walk_children(self, node: _Node, container, hits: HitCounter):
+        is_list = isinstance(container, list)
+        updates = {}
+
+        for segment, child in node.children.items():
+            if segment == "*":
+                keys = range(len(container)) if is_list else list(container)
+            elif is_list:
+                keys = [int(segment)] if segment.isdigit() and int(segment) < len(container) else []
+            elif segment in container or child.on_missing:
+                keys = [segment]
+            else:
+                keys = []
+
+            for key in keys:
+                old = updates.get(key, container[key] if is_list or key in container else MISSING)
+                new = self._walk(child, old, hits)
+                if new is not old:
+                    updates[key] = new
+
+        if not updates:
+            return container
+
+        if is_list:
+            items = (updates.get(i, item) for i, item in enumerate(container))
+            return [item for item in items if item is not MISSING]
+        out = dict(container)
+        for key, new in updates.items():
+            if new is MISSING:
+                out.pop(key, None)
+            else:
+                out[key] = new
+        return out
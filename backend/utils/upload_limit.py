@@ -0,0 +1,45 @@
+from typing import Iterable
+
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+
+
+class UploadLimit:
+    """
+    ASGI middleware capping request bodies on upload routes while they
+    stream in: a declared Content-Length over the limit is refused before
+    anything is read, and a chunked body is cut off as soon as it passes
+    it, instead of after the multipart parser has spooled all of it.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = tuple(paths)
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(413, f"Upload exceeds {self.max_bytes} bytes.")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            return await self.app(scope, receive, send)
+
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            error = self._too_large()
+            response = ORJSONResponse({"detail": error.detail}, status_code=error.status_code)
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside body parsing; FastAPI re-raises HTTPExceptions as-is.
+                    raise self._too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
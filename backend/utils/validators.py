@@ -1,3 +1,48 @@
+import json
+import os
+from functools import lru_cache
+
+SCENE_SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "schemas", "fibo_json_schema.json"
+)
+
+
+class SceneValidationError(ValueError):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("Invalid structured_json: " + "; ".join(errors))
+
+
+@lru_cache(maxsize=None)
+def get_scene_validator():
+    """Load and check the scene schema once; reused for every request."""
+    from jsonschema import Draft7Validator
+
+    with open(SCENE_SCHEMA_PATH, "r", encoding="utf-8") as f:
+        schema = json.load(f)
+
+    Draft7Validator.check_schema(schema)
+    return Draft7Validator(schema)
+
+
+def scene_errors(j):
+    validator = get_scene_validator()
+    # Fast path: is_valid stops at the first failure and builds no error objects.
+    if validator.is_valid(j):
+        return []
+
+    return [
+        f"{'/'.join(str(p) for p in err.absolute_path) or '<root>'}: {err.message}"
+        for err in validator.iter_errors(j)
+    ]
+
+
 def validate_scene_json(j):
-    # minimal validation
-    return isinstance(j, dict)
+    return isinstance(j, dict) and not scene_errors(j)
+
+
+def ensure_valid_scene(j):
+    errors = scene_errors(j)
+    if errors:
+        raise SceneValidationError(errors)
@@ -1,11 +1,31 @@
 import React from 'react';
+import { API_BASE } from '../../lib/config';
+
+// Grid cells use the 256px thumbnail of the locally stored render; the
+// backend falls back to Bria's URL until its copy has been downloaded.
+function thumbnailUrl(shot, size = 256){
+  if (shot.media_url) return `${API_BASE}${shot.media_url}?size=${size}`;
+  return shot.image_url;
+}
+
+export default function MultiShotPreview({ shots = [] }){
+  if (!shots.length) {
+    return (
+      <div className="grid grid-cols-3 gap-2">
+        <div className="h-40 bg-gray-200" />
+        <div className="h-40 bg-gray-200" />
+        <div className="h-40 bg-gray-200" />
+      </div>
+    );
+  }
 
-export default function MultiShotPreview(){
   return (
     <div className="grid grid-cols-3 gap-2">
-      <div className="h-40 bg-gray-200" />
-      <div className="h-40 bg-gray-200" />
-      <div className="h-40 bg-gray-200" />
+      {shots.map((shot, i) => (
+        thumbnailUrl(shot)
+          ? <img key={shot.index ?? i} src={thumbnailUrl(shot)} alt={shot.type} loading="lazy" className="h-40 w-full object-cover" />
+          : <div key={shot.index ?? i} className="h-40 bg-gray-200" title={shot.error || shot.type} />
+      ))}
     </div>
   );
 }
@@ -1,7 +1,13 @@
 import {useState} from 'react';
+import {postWithProgress} from '../lib/progress';
 
 export default function useGenerate(){
   const [loading, setLoading] = useState(false);
-  const generate = async (json) => { setLoading(true); try{ /* call API */ }finally{setLoading(false);} };
-  return {generate, loading};
+  const [progress, setProgress] = useState(null);
+  const generate = async (json) => {
+    setLoading(true);
+    try{ return await postWithProgress('/generate', {structured_json: json}, setProgress); }
+    finally{setLoading(false);}
+  };
+  return {generate, loading, progress};
 }
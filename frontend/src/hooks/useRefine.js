@@ -1,7 +1,13 @@
 import {useState} from 'react';
+import {postWithProgress} from '../lib/progress';
 
 export default function useRefine(){
   const [loading, setLoading] = useState(false);
-  const refine = async (patch) => { setLoading(true); try{}finally{setLoading(false);} };
-  return {refine, loading};
+  const [progress, setProgress] = useState(null);
+  const refine = async (patch) => {
+    setLoading(true);
+    try{ return await postWithProgress('/refine/patch', patch, setProgress); }
+    finally{setLoading(false);}
+  };
+  return {refine, loading, progress};
 }
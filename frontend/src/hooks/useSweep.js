@@ -0,0 +1,25 @@
+import {useState} from 'react';
+import {postNDJSON} from '../lib/api';
+import {API_BASE} from '../lib/config';
+
+// Cells fill in as the server finishes them; a duplicate arrives with the
+// result of the cell it resolved to (`duplicate_of`).
+export default function useSweep(){
+  const [loading, setLoading] = useState(false);
+  const [plan, setPlan] = useState(null);
+  const [cells, setCells] = useState([]);
+
+  const sweep = async (json, axes) => {
+    setLoading(true); setPlan(null); setCells([]);
+    const byIndex = [];
+    const show = () => setCells([...byIndex]);
+    try{
+      await postNDJSON(`${API_BASE}/sweep?stream=true`, {structured_json: json, axes}, (line) => {
+        if (line.plan) { setPlan(line.plan); byIndex.length = line.plan.total; }
+        else if (line.summary) setPlan(p => ({...p, summary: line.summary}));
+        else { byIndex[line.index] = line; show(); }
+      });
+    }finally{setLoading(false);}
+  };
+  return {sweep, loading, plan, cells};
+}
@@ -2,3 +2,20 @@ export async function postJSON(endpoint, payload){
   const res = await fetch(endpoint, {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(payload)});
   return res.json();
 }
+
+// POST and call onLine(obj) for each NDJSON line as it arrives.
+export async function postNDJSON(endpoint, payload, onLine){
+  const res = await fetch(endpoint, {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(payload)});
+  if (!res.ok) throw new Error((await res.json()).detail || res.statusText);
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const {done, value} = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), {stream: !done});
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.filter(Boolean).forEach(line => onLine(JSON.parse(line)));
+    if (done) break;
+  }
+}
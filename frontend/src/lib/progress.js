@@ -0,0 +1,60 @@
+import { API_BASE } from './config';
+
+// One WebSocket for every render in the tab; each request id is a
+// subscription on it. Events: queued, submitted, poll, completed, failed,
+// and result / error at the end of a `?background=true` request.
+const listeners = new Map();
+let socket = null;
+
+function send(message){
+  if (socket && socket.readyState === WebSocket.OPEN) socket.send(JSON.stringify(message));
+}
+
+function connect(){
+  if (socket) return socket;
+  socket = new WebSocket(API_BASE.replace(/^http/, 'ws') + '/ws/progress');
+  socket.onopen = () => send({subscribe: [...listeners.keys()]});
+  socket.onmessage = (msg) => {
+    const event = JSON.parse(msg.data);
+    (listeners.get(event.request_id) || []).forEach(cb => cb(event));
+  };
+  socket.onclose = () => {
+    socket = null;
+    if (listeners.size) setTimeout(connect, 1000);
+  };
+  return socket;
+}
+
+export function subscribe(requestId, onEvent){
+  if (!listeners.has(requestId)) listeners.set(requestId, new Set());
+  listeners.get(requestId).add(onEvent);
+  connect();
+  send({subscribe: requestId});
+
+  return () => {
+    const set = listeners.get(requestId);
+    if (!set) return;
+    set.delete(onEvent);
+    if (!set.size) { listeners.delete(requestId); send({unsubscribe: requestId}); }
+  };
+}
+
+// POST with ?background=true and resolve with the response body once the
+// "result" event arrives; `onEvent` sees every progress event on the way.
+export async function postWithProgress(endpoint, payload, onEvent = () => {}){
+  const requestId = crypto.randomUUID();
+  return new Promise((resolve, reject) => {
+    const unsubscribe = subscribe(requestId, (event) => {
+      onEvent(event);
+      if (event.event === 'result') { unsubscribe(); resolve(event.body); }
+      if (event.event === 'error') { unsubscribe(); reject(new Error(typeof event.detail === 'string' ? event.detail : JSON.stringify(event.detail))); }
+    });
+    fetch(`${API_BASE}${endpoint}?background=true`, {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json', 'X-Request-ID': requestId},
+      body: JSON.stringify(payload)
+    }).then(res => {
+      if (res.status !== 202) res.json().then(body => { unsubscribe(); reject(new Error(body.detail || res.statusText)); });
+    }, err => { unsubscribe(); reject(err); });
+  });
+}
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The worker reuses the backend's services (Bria/Gemini clients, cache, queue).
+BACKEND_DIR = os.path.abspath(
+    os.getenv("STUDIO_BACKEND_DIR", os.path.join(os.path.dirname(__file__), "..", "backend"))
+)
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
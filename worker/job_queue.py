@@ -0,0 +1,14 @@
+# Thin wrapper over the backend's SQLite job queue, shared with the API.
+# (Not named queue.py: that would shadow the stdlib module asyncio relies on.)
+
+import bootstrap  # noqa: F401  (puts backend/ on sys.path)
+
+from services.job_queue import get_job_queue
+
+
+def push(kind, payload, idempotency_key=None):
+    return get_job_queue().submit(kind, payload, idempotency_key=idempotency_key)
+
+
+def pop():
+    return get_job_queue().claim()
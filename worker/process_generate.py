@@ -1,2 +1,15 @@
-def process_generate(task):
-    print('processing generate', task)
+import bootstrap  # noqa: F401
+
+from services.agent_service import auto_fix_json
+from services.render_service import render_scene
+
+
+async def process_generate(task):
+    fixed = auto_fix_json(task["structured_json"])
+    result = await render_scene(fixed)
+    return {
+        "image_url": result["image_url"],
+        "json": fixed,
+        "request_id": result.get("request_id"),
+        "metadata": result.get("metadata")
+    }
@@ -1,2 +1,19 @@
-def process_inspire(task):
-    print('processing inspire', task)
+import base64
+
+import bootstrap  # noqa: F401
+
+from services.agent_service import auto_fix_json
+from services.render_service import render_scene
+from services.image_cache import cached_image_bytes_to_json
+from services.ingest import ingest_bytes
+
+
+async def process_inspire(task):
+    ingested = await ingest_bytes(
+        base64.b64decode(task["image_b64"]), mime_type=task.get("mime_type", "image/jpeg")
+    )
+    extracted = await cached_image_bytes_to_json(ingested.data, mime_type=ingested.mime_type)
+
+    fixed = auto_fix_json(extracted)
+    result = await render_scene(fixed)
+    return {"image_url": result["image_url"], "json": fixed}
@@ -1,2 +1,13 @@
-def process_refine(task):
-    print('processing refine', task)
+import bootstrap  # noqa: F401
+
+from services.agent_service import auto_fix_json
+from services.render_service import render_scene
+
+
+async def process_refine(task):
+    refined = dict(task["structured_json"])
+    refined["refinement_instruction"] = task["instruction"]
+
+    fixed = auto_fix_json(refined)
+    result = await render_scene(fixed)
+    return {"image_url": result["image_url"], "json": fixed}
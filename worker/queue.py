@@ -1,9 +0,0 @@
-from queue import Queue
-
-queue = Queue()
-
-def push(item):
-    queue.put(item)
-
-def pop():
-    return queue.get()
@@ -1,6 +1,103 @@
-import time
+import asyncio
+import signal
 
-if __name__ == '__main__':
-    print('Worker started')
+import bootstrap  # noqa: F401
+
+from config.settings import settings
+from services import http_client
+from services.job_queue import get_job_queue
+from services.scheduler import BULK, current_lane
+from utils.logger import logger, request_id_var
+from utils.validators import SceneValidationError
+
+from process_generate import process_generate
+from process_inspire import process_inspire
+from process_refine import process_refine
+
+HANDLERS = {
+    "generate": process_generate,
+    "refine": process_refine,
+    "inspire": process_inspire,
+}
+
+
+def is_permanent(error: Exception) -> bool:
+    """
+    Failures a retry cannot fix: invalid scenes, malformed payloads
+    (a missing key, bad base64 or an undecodable image) and 4xx refusals.
+    """
+    if isinstance(error, (SceneValidationError, KeyError, ValueError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (408, 429)
+
+
+async def hold_lease(queue, job, work):
+    """Renew the job's lease while `work` runs; cancel `work` if it is lost."""
     while True:
-        time.sleep(5)
+        await asyncio.sleep(settings.JOBS_LEASE_SECONDS / 3)
+        if not await asyncio.to_thread(queue.renew, job["id"], job["lease_token"]):
+            work.cancel()
+            return
+
+
+async def run_worker(name, queue, stop):
+    while not stop.is_set():
+        job = await asyncio.to_thread(queue.claim)
+
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), settings.JOBS_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        token = request_id_var.set(job["id"])
+        logger.info(
+            "Job claimed",
+            extra={"fields": {"worker": name, "kind": job["kind"], "attempt": job["attempts"]}}
+        )
+
+        work = asyncio.ensure_future(HANDLERS[job["kind"]](job["payload"]))
+        lease = asyncio.ensure_future(hold_lease(queue, job, work))
+        try:
+            result = await work
+        except asyncio.CancelledError:
+            if not lease.done():
+                raise  # the worker itself is shutting down
+            logger.warning("Job lease lost; abandoned to its new holder")
+        except Exception as e:
+            permanent = is_permanent(e)
+            logger.exception("Job failed", extra={"fields": {"permanent": permanent}})
+            await asyncio.to_thread(queue.fail, job["id"], job["lease_token"], str(e), permanent)
+        else:
+            if not await asyncio.to_thread(queue.complete, job["id"], job["lease_token"], result):
+                logger.warning("Job lease lost before completion; result dropped")
+        finally:
+            lease.cancel()
+            request_id_var.reset(token)
+
+
+async def run_pool(concurrency=None):
+    concurrency = concurrency or settings.JOBS_WORKER_CONCURRENCY
+    current_lane.set(BULK)  # background jobs never compete as interactive
+    queue = get_job_queue()
+    stop = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("Worker started", extra={"fields": {"slots": concurrency, "queue": queue.path}})
+
+    await http_client.startup()
+    try:
+        await asyncio.gather(*(
+            run_worker(f"w{i}", queue, stop) for i in range(concurrency)
+        ))
+    finally:
+        await http_client.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(run_pool())